@@ -0,0 +1,322 @@
+import logging
+import math
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# 기사 dict 키 -> 컬럼
+FIELDS = {
+    "url": "url",
+    "title": "title",
+    "description": "description",
+    "content": "content",
+    "author": "author",
+    "source": "source",
+    "source_id": "source_id",
+    "provider": "provider",
+    "source_count": "source_count",
+    "sentiment": "sentiment",
+    "relevance": "relevance",
+    "duplicate_of": "duplicate_of",
+}
+COLUMNS = list(FIELDS.values()) + ["published_at", "fetched_at"]
+
+# BM25 에서 제목을 본문 요약보다 두 배 중요하게 본다
+TITLE_WEIGHT = 2.0
+
+_RELATIVE = re.compile(r"(\d+)\s+(minute|hour|day|week)s?\s+ago")
+
+
+def _utc(moment: datetime) -> str:
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.astimezone(timezone.utc).strftime(TS_FORMAT)
+
+
+def parse_published(value, fetched_at: datetime) -> Optional[str]:
+    """
+    ISO timestamps (NewsAPI) or relative ones like ``"3 hours ago"``
+    (SerpAPI) as UTC ``TS_FORMAT``; None if unparseable.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    match = _RELATIVE.search(value)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        return _utc(fetched_at - timedelta(**{unit + "s": amount}))
+    parsed = pd.to_datetime(value, utc=True, errors="coerce")
+    return None if pd.isna(parsed) else parsed.strftime(TS_FORMAT)
+
+
+def match_expression(terms: Union[str, Iterable[str]]) -> str:
+    """
+    FTS5 query matching any of ``terms`` (a list, or a string split on
+    whitespace). Terms are quoted so user input can't inject FTS syntax.
+    """
+    if isinstance(terms, str):
+        terms = terms.split()
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms if term.strip()]
+    return " OR ".join(dict.fromkeys(quoted))
+
+
+def _value(value):
+    # pandas 레코드의 NaN 과 리스트 값은 저장하지 않는다
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (list, dict)):
+        return None
+    return value
+
+
+class ArticleStore:
+    """
+    SQLite news archive, one row per URL.
+
+    ``upsert`` writes a batch in a single transaction: new URLs are inserted
+    and known ones refreshed, keeping the provider that first delivered the
+    article. ``published_at`` is stored as UTC text so time-window queries
+    are range scans on its index instead of a read of the whole archive.
+    ``search`` ranks headlines with the FTS5 index kept in sync by triggers.
+    Syndicated copies of a stored story keep its URL in ``duplicate_of``
+    and are left out of queries unless ``include_duplicates`` is set.
+    """
+
+    def __init__(self, path: str = "news.db", batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        if not self._initialized:
+            self._init_db(conn)
+            self._initialized = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, conn):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                title TEXT,
+                description TEXT,
+                content TEXT,
+                author TEXT,
+                source TEXT,
+                source_id TEXT,
+                provider TEXT,
+                source_count INTEGER,
+                sentiment REAL,
+                relevance REAL,
+                duplicate_of TEXT,
+                published_at TEXT,
+                fetched_at TEXT NOT NULL)
+                """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+            # 중복 표시 도입 전에 만든 아카이브
+            if "duplicate_of" not in columns:
+                conn.execute("ALTER TABLE articles ADD COLUMN duplicate_of TEXT")
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_url ON articles (url)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_articles_published_at "
+                "ON articles (published_at)"
+            )
+            self._init_fts(conn)
+
+    def _init_fts(self, conn):
+        """
+        FTS5 index over title and description (external content, so the
+        text is not stored twice), kept in sync by triggers on every insert,
+        upsert and delete.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5
+            (title, description, content='articles', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2')
+            """)
+        conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles
+            BEGIN
+                INSERT INTO articles_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles
+            BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update
+            AFTER UPDATE OF title, description ON articles
+            BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO articles_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END;
+            """)
+        # 색인 도입 전에 저장된 기사는 한 번에 색인
+        if not exists:
+            conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+
+    def _row(self, article: Dict, provider: Optional[str], fetched_at: datetime):
+        article = dict(article)
+        source = article.get("source")
+        # NewsAPI 원본 응답은 source 가 {"id", "name"} 형태
+        if isinstance(source, dict):
+            article["source"] = source.get("name")
+            article.setdefault("source_id", source.get("id"))
+        if provider and not article.get("provider"):
+            article["provider"] = provider
+        row = {column: _value(article.get(key)) for key, column in FIELDS.items()}
+        row["published_at"] = parse_published(article.get("publishedAt"), fetched_at)
+        row["fetched_at"] = _utc(fetched_at)
+        return row
+
+    def upsert(
+        self,
+        articles: Iterable[Dict],
+        provider: Optional[str] = None,
+        fetched_at: Optional[datetime] = None,
+    ) -> int:
+        """Insert or refresh ``articles`` (dicts as returned by the news clients)."""
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        rows = [
+            self._row(article, provider, fetched_at)
+            for article in articles
+            if article.get("url") and article.get("title") != "[Removed]"
+        ]
+        if not rows:
+            return 0
+
+        placeholders = ", ".join(f":{column}" for column in COLUMNS)
+        # 먼저 받은 공급자와 게시 시각은 유지하고 나머지는 최신 값으로 갱신
+        updates = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, {column})"
+            for column in COLUMNS
+            if column not in ("url", "provider", "published_at")
+        )
+        sql = f"""
+            INSERT INTO articles ({", ".join(COLUMNS)}) VALUES ({placeholders})
+            ON CONFLICT(url) DO UPDATE SET {updates},
+                provider = COALESCE(provider, excluded.provider),
+                published_at = COALESCE(published_at, excluded.published_at)
+            """
+        with self._connect() as conn:
+            for start in range(0, len(rows), self.batch_size):
+                conn.executemany(sql, rows[start : start + self.batch_size])
+        logger.info("Stored %d articles in %s", len(rows), self.path)
+        return len(rows)
+
+    def import_csv(self, path: str = "articles.csv") -> int:
+        """One-off migration of the old ``articles.csv`` archive."""
+        df = pd.read_csv(path).rename(
+            columns={"name": "source", "id": "source_id", "search_date": "fetched_at"}
+        )
+        df = df.drop(columns=["fetched_at"], errors="ignore")
+        return self.upsert(df.to_dict("records"))
+
+    def recent(
+        self,
+        hours: float = 24,
+        limit: Optional[int] = None,
+        now: Optional[datetime] = None,
+        include_duplicates: bool = False,
+    ) -> pd.DataFrame:
+        """Articles published in the last ``hours`` hours, newest first."""
+        since = (now or datetime.now(timezone.utc)) - timedelta(hours=hours)
+        return self.between(since, now, limit, include_duplicates)
+
+    def between(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        include_duplicates: bool = False,
+    ) -> pd.DataFrame:
+        """Articles with ``start <= published_at < end``, newest first."""
+        query = f"""
+            SELECT {", ".join(c for c in COLUMNS if c != "published_at")},
+                   published_at AS publishedAt
+            FROM articles
+            WHERE published_at >= ?"""
+        params: List = [_utc(start)]
+        if not include_duplicates:
+            query += " AND duplicate_of IS NULL"
+        if end is not None:
+            query += " AND published_at < ?"
+            params.append(_utc(end))
+        query += " ORDER BY published_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def search(
+        self,
+        terms: Union[str, Iterable[str]],
+        hours: Optional[float] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 10,
+        now: Optional[datetime] = None,
+        include_duplicates: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Articles matching any of ``terms`` ranked by BM25 (title weighted
+        twice the description), best first, optionally restricted to the
+        last ``hours`` hours or to ``[start, end)``. The ``rank`` column is
+        the BM25 score, lower is better.
+        """
+        expression = match_expression(terms)
+        if not expression:
+            return pd.DataFrame(columns=[*COLUMNS, "rank"])
+        if hours is not None:
+            start = (now or datetime.now(timezone.utc)) - timedelta(hours=hours)
+
+        query = f"""
+            SELECT {", ".join("a." + c for c in COLUMNS if c != "published_at")},
+                   a.published_at AS publishedAt,
+                   bm25(articles_fts, {TITLE_WEIGHT}, 1.0) AS rank
+            FROM articles_fts
+            JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH ?"""
+        params: List = [expression]
+        if not include_duplicates:
+            query += " AND a.duplicate_of IS NULL"
+        if start is not None:
+            query += " AND a.published_at >= ?"
+            params.append(_utc(start))
+        if end is not None:
+            query += " AND a.published_at < ?"
+            params.append(_utc(end))
+        query += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+article_store = ArticleStore()
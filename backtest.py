@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import DEFAULT_PIPELINE, INDICATOR_WARMUP, IndicatorPipeline
+
+# trading.excute_trade 와 같은 주문 규칙
+FEE_FACTOR = 0.9995
+MIN_ORDER_KRW = 5000
+
+
+@dataclass
+class BacktestResult:
+    """Per-candle equity curve plus the list of simulated orders."""
+
+    equity: pd.DataFrame
+    trades: pd.DataFrame
+    initial_krw: float
+
+
+def rule_decision(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Simple vectorized rule on ``add_indicators`` output: buy oversold dips
+    with a rising MACD histogram, sell overbought rallies, hold otherwise.
+    """
+    buy = (df["rsi"] < 30) & (df["macd_diff"] > df["macd_diff"].shift(1))
+    sell = df["rsi"] > 70
+    decision = np.select([buy, sell], ["BUY", "SELL"], default="HOLD")
+    percentage = np.where(decision == "HOLD", 0, 30)
+    return pd.DataFrame({"decision": decision, "percentage": percentage}, df.index)
+
+
+class ReplayDecisions:
+    """
+    Decision function replaying recorded decisions (e.g. cached LLM
+    responses) keyed by candle timestamp; unknown candles are HOLD.
+    """
+
+    def __init__(self, decisions: Dict):
+        self.decisions = decisions
+
+    def __call__(self, window: pd.DataFrame) -> Dict:
+        return self.decisions.get(
+            window.index[-1], {"decision": "HOLD", "percentage": 0}
+        )
+
+
+def _collect_decisions(
+    df: pd.DataFrame, decide: Callable, vectorized: bool, warmup: int, every: int
+) -> pd.DataFrame:
+    if vectorized:
+        decisions = decide(df)
+        decisions = decisions.iloc[warmup::every]
+        return decisions[decisions["decision"] != "HOLD"]
+
+    # LLM 대역 등 캔들 단위 함수: 해당 시점까지의 데이터만 보여준다
+    rows = []
+    for i in range(warmup, len(df), every):
+        result = decide(df.iloc[: i + 1]) or {}
+        decision = str(result.get("decision", "HOLD")).upper()
+        if decision != "HOLD":
+            rows.append((df.index[i], decision, result.get("percentage") or 0))
+    return pd.DataFrame(rows, columns=["index", "decision", "percentage"]).set_index(
+        "index"
+    )
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    decide: Callable = rule_decision,
+    vectorized: bool = True,
+    initial_krw: float = 1_000_000,
+    warmup: int = INDICATOR_WARMUP,
+    every: int = 1,
+    pipeline: IndicatorPipeline = DEFAULT_PIPELINE,
+) -> BacktestResult:
+    """
+    Replay historical OHLCV through the indicator pipeline and ``decide``.
+
+    ``decide`` is either vectorized (frame in, ``decision``/``percentage``
+    frame out) or, with ``vectorized=False``, called once every ``every``
+    candles with the history up to that candle, like the LLM call in
+    ``ai_trading``. Orders fill at the candle close with ``excute_trade``
+    rules: buys spend ``percentage`` of KRW times ``FEE_FACTOR``, sells
+    ``percentage`` of the coin, and orders under ``MIN_ORDER_KRW`` are
+    skipped. Only the sparse order list is walked in Python; holdings and
+    the equity curve are expanded over all candles with NumPy.
+    """
+    df = pipeline.apply(df.copy())
+    decisions = _collect_decisions(df, decide, vectorized, warmup, every)
+
+    positions = df.index.get_indexer(decisions.index)
+    prices = df["close"].to_numpy(dtype=float)[positions]
+    krw, coin = float(initial_krw), 0.0
+    fills = []
+    for position, price, decision, percentage in zip(
+        positions, prices, decisions["decision"], decisions["percentage"]
+    ):
+        fraction = min(max(float(percentage), 0), 100) / 100
+        if decision == "BUY":
+            amount = krw * fraction * FEE_FACTOR
+            if amount <= MIN_ORDER_KRW:
+                continue
+            krw -= krw * fraction
+            coin += amount / price
+            fills.append((position, "BUY", percentage, price, amount, krw, coin))
+        elif decision == "SELL":
+            volume = coin * fraction
+            if volume * price <= MIN_ORDER_KRW:
+                continue
+            coin -= volume
+            # 매도 대금에도 거래소 수수료가 붙는다
+            krw += volume * price * FEE_FACTOR
+            fills.append(
+                (position, "SELL", percentage, price, volume * price, krw, coin)
+            )
+
+    trades = pd.DataFrame(
+        fills,
+        columns=[
+            "position",
+            "decision",
+            "percentage",
+            "price",
+            "krw_amount",
+            "krw",
+            "coin",
+        ],
+    )
+    trades.index = df.index[trades["position"].to_numpy(dtype=int)]
+
+    # 주문 이후 잔고를 다음 주문 전까지 전 구간에 펼친다
+    krw_curve = np.full(len(df), float(initial_krw))
+    coin_curve = np.zeros(len(df))
+    if len(trades):
+        step = np.searchsorted(
+            trades["position"].to_numpy(), np.arange(len(df)), "right"
+        )
+        filled = step > 0
+        krw_curve[filled] = trades["krw"].to_numpy()[step[filled] - 1]
+        coin_curve[filled] = trades["coin"].to_numpy()[step[filled] - 1]
+
+    close = df["close"].to_numpy(dtype=float)
+    equity = pd.DataFrame(
+        {
+            "close": close,
+            "krw": krw_curve,
+            "coin": coin_curve,
+            "equity": krw_curve + coin_curve * close,
+        },
+        index=df.index,
+    )
+    return BacktestResult(
+        equity=equity, trades=trades.drop(columns="position"), initial_krw=initial_krw
+    )
+
+
+def evaluate_performance(
+    result: BacktestResult, periods_per_year: Optional[float] = None
+) -> Dict:
+    """Summary statistics of a backtest, computed over the whole curve at once."""
+    equity = result.equity["equity"].to_numpy()
+    close = result.equity["close"].to_numpy()
+    returns = np.diff(equity) / equity[:-1]
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    if periods_per_year is None:
+        periods_per_year = 365
+        index = result.equity.index
+        if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+            step = pd.Series(index).diff().median()
+            periods_per_year = pd.Timedelta(days=365) / step
+
+    std = returns.std() if len(returns) else 0.0
+    sharpe = float(returns.mean() / std * np.sqrt(periods_per_year)) if std else 0.0
+
+    return {
+        "total_return_pct": (equity[-1] / result.initial_krw - 1) * 100,
+        "buy_and_hold_pct": (close[-1] / close[0] - 1) * 100,
+        "max_drawdown_pct": drawdown.min() * 100,
+        "sharpe": sharpe,
+        "trades": len(result.trades),
+        "exposure_pct": float((result.equity["coin"] > 0).mean() * 100),
+    }
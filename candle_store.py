@@ -0,0 +1,210 @@
+import logging
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import pandas as pd
+import pyupbit
+
+logger = logging.getLogger(__name__)
+
+KST = timezone(timedelta(hours=9))
+
+# pyupbit interval 이름 -> 캔들 간격
+INTERVALS = {
+    "minute1": timedelta(minutes=1),
+    "minute3": timedelta(minutes=3),
+    "minute5": timedelta(minutes=5),
+    "minute10": timedelta(minutes=10),
+    "minute15": timedelta(minutes=15),
+    "minute30": timedelta(minutes=30),
+    "minute60": timedelta(hours=1),
+    "minute240": timedelta(hours=4),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+class CandleStore:
+    """
+    SQLite-backed OHLCV store, one series per (market, interval).
+
+    Timestamps are the KST candle start times used as the index by
+    ``pyupbit.get_ohlcv``. Only candles newer than the last stored one are
+    requested from Upbit; the last stored candle is always re-fetched because
+    it may still have been in progress when it was saved.
+    """
+
+    def __init__(
+        self,
+        path: str = "candles.db",
+        fetcher: Callable = pyupbit.get_ohlcv,
+        page_size: int = 200,
+        period: float = 0.1,
+    ):
+        self.path = path
+        self.fetcher = fetcher
+        self.page_size = page_size
+        # Upbit 시세 캔들 API 는 초당 10회 제한
+        self.period = period
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        if not self._initialized:
+            self._init_db(conn)
+            self._initialized = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, conn):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles
+                (market TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                value REAL,
+                PRIMARY KEY (market, interval, ts)) WITHOUT ROWID
+                """)
+
+    def upsert(self, market: str, interval: str, df: pd.DataFrame) -> int:
+        """Insert or replace candles from a ``pyupbit.get_ohlcv`` frame."""
+        if df is None or df.empty:
+            return 0
+        df = df.reindex(columns=COLUMNS)
+        rows = [
+            (market, interval, ts.strftime(TS_FORMAT), *values)
+            for ts, values in zip(
+                pd.to_datetime(df.index), df.itertuples(index=False, name=None)
+            )
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO candles
+                (market, interval, ts, open, high, low, close, volume, value)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+        return len(rows)
+
+    def _boundary(self, market: str, interval: str, func: str) -> Optional[datetime]:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {func}(ts) FROM candles WHERE market = ? AND interval = ?",
+                (market, interval),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return datetime.strptime(row[0], TS_FORMAT)
+
+    def last_timestamp(self, market: str, interval: str) -> Optional[datetime]:
+        return self._boundary(market, interval, "MAX")
+
+    def first_timestamp(self, market: str, interval: str) -> Optional[datetime]:
+        return self._boundary(market, interval, "MIN")
+
+    def count(self, market: str, interval: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM candles WHERE market = ? AND interval = ?",
+                (market, interval),
+            ).fetchone()[0]
+
+    def load(self, market: str, interval: str, count: Optional[int] = None):
+        """Return the latest ``count`` stored candles in ascending order."""
+        query = """
+            SELECT ts, open, high, low, close, volume, value FROM candles
+            WHERE market = ? AND interval = ? ORDER BY ts DESC"""
+        params = [market, interval]
+        if count is not None:
+            query += " LIMIT ?"
+            params.append(count)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        df = pd.DataFrame.from_records(rows[::-1], columns=["ts", *COLUMNS])
+        df.index = pd.to_datetime(df.pop("ts"), format=TS_FORMAT)
+        df.index.name = None
+        return df
+
+    def _fetch_page(self, market: str, interval: str, count: int, to=None):
+        df = self.fetcher(market, interval=interval, count=count, to=to)
+        time.sleep(self.period)
+        return df
+
+    def sync(self, market: str, interval: str, count: int = 200) -> int:
+        """
+        Bring the series up to date and make sure at least ``count`` candles
+        are stored. Returns the number of candles written.
+        """
+        step = INTERVALS[interval]
+        last = self.last_timestamp(market, interval)
+        now = datetime.now(KST).replace(tzinfo=None)
+
+        if last is None:
+            missing = count
+        else:
+            missing = math.ceil((now - last) / step) + 1
+
+        written = 0
+        to = None
+        while missing > 0:
+            df = self._fetch_page(market, interval, min(self.page_size, missing), to)
+            if df is None or df.empty:
+                break
+            written += self.upsert(market, interval, df)
+            oldest = pd.to_datetime(df.index).min().to_pydatetime()
+            if last is not None and oldest <= last:
+                break
+            missing -= len(df)
+            # Upbit 의 to 는 UTC 기준, 해당 시각 이전 캔들을 반환
+            to = (oldest - timedelta(hours=9)).strftime(TS_FORMAT)
+
+        stored = self.count(market, interval)
+        if stored < count:
+            written += self.backfill(market, interval, count - stored)
+        return written
+
+    def backfill(self, market: str, interval: str, count: int) -> int:
+        """Extend the stored series ``count`` candles into the past, page by page."""
+        written = 0
+        while count > 0:
+            first = self.first_timestamp(market, interval)
+            to = None
+            if first is not None:
+                to = (first - timedelta(hours=9)).strftime(TS_FORMAT)
+            df = self._fetch_page(market, interval, min(self.page_size, count), to)
+            if df is None or df.empty:
+                logger.info("No older candles for %s %s", market, interval)
+                break
+            written += self.upsert(market, interval, df)
+            count -= len(df)
+        return written
+
+    def get_ohlcv(self, market: str, interval: str = "day", count: int = 200):
+        """Drop-in replacement for ``pyupbit.get_ohlcv`` served from disk."""
+        try:
+            self.sync(market, interval, count)
+        except Exception as e:
+            logger.error("Candle sync failed for %s %s: %s", market, interval, e)
+        df = self.load(market, interval, count)
+        if df.empty:
+            return None
+        return df
@@ -0,0 +1,209 @@
+import json
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 모델 응답 형식 (prompt.get_system_prompt 의 예시와 같다)
+DECISION_SCHEMA = {
+    "decision": ("BUY", "SELL", "HOLD"),
+    "percentage": (0, 100),
+    "reason": str,
+}
+
+_WHITESPACE = " \t\r\n"
+
+
+class DecisionValidationError(ValueError):
+    """Raised when a parsed response does not match ``DECISION_SCHEMA``."""
+
+
+def validate_decision(fields: Dict, require_reason: bool = True) -> Dict:
+    """
+    Normalize and check a decision: ``decision`` upper-cased and one of
+    BUY/SELL/HOLD, ``percentage`` an integer in 0..100 (0 for HOLD) and
+    ``reason`` a string.
+    """
+    decision = fields.get("decision")
+    if (
+        not isinstance(decision, str)
+        or decision.upper() not in DECISION_SCHEMA["decision"]
+    ):
+        raise DecisionValidationError(f"invalid decision: {decision!r}")
+    decision = decision.upper()
+
+    percentage = fields.get("percentage")
+    if isinstance(percentage, str) and percentage.strip().isdigit():
+        percentage = int(percentage)
+    if isinstance(percentage, bool) or not isinstance(percentage, (int, float)):
+        raise DecisionValidationError(f"invalid percentage: {percentage!r}")
+    low, high = DECISION_SCHEMA["percentage"]
+    if percentage != int(percentage) or not low <= percentage <= high:
+        raise DecisionValidationError(f"percentage out of range: {percentage!r}")
+    percentage = 0 if decision == "HOLD" else int(percentage)
+
+    result = {"decision": decision, "percentage": percentage}
+    if require_reason:
+        reason = fields.get("reason")
+        if not isinstance(reason, str):
+            raise DecisionValidationError(f"invalid reason: {reason!r}")
+        result["reason"] = reason
+    return result
+
+
+def extract_json_object(text: str) -> Optional[Dict]:
+    """First complete JSON object embedded in ``text`` (nested braces allowed)."""
+    if not text:
+        return None
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
+class StreamingDecisionParser:
+    """
+    Incremental parser for the decision JSON as it streams from the model.
+
+    ``feed`` consumes text chunks and tracks the top-level fields of the
+    first JSON object; each field is decoded as soon as its value is
+    complete. Once ``decision`` and ``percentage`` are both complete and
+    valid the trade signal is returned (and passed to ``on_signal``) once,
+    without waiting for the ``reason`` text. ``finish`` validates the whole
+    response and falls back to ``extract_json_object`` on the full text.
+    """
+
+    def __init__(self, on_signal: Optional[Callable[[Dict], None]] = None):
+        self.on_signal = on_signal
+        self.text = ""
+        self.fields: Dict = {}
+        self.signal: Optional[Dict] = None
+        self.complete = False
+        self.malformed = False
+        self._rejected = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # 최상위 객체에서 다음에 올 토큰: key, colon, value, comma
+        self._expect = None
+        self._key = None
+        self._start = None
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """Add a chunk; return the signal if this chunk completed it."""
+        if not chunk:
+            return None
+        self.text += chunk
+        had_signal = self.signal is not None
+        while self._pos < len(self.text) and not (self.complete or self.malformed):
+            self._step(self.text[self._pos], self._pos)
+            self._pos += 1
+        if self.signal is not None and not had_signal:
+            return self.signal
+        return None
+
+    def _step(self, c: str, i: int):
+        if self._expect is None:
+            if c == "{":
+                self._depth = 1
+                self._expect = "key"
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                if self._depth == 1 and self._expect == "key_string":
+                    self._key = json.loads(self.text[self._start : i + 1])
+                    self._expect = "colon"
+                elif self._depth == 1 and self._expect == "value_string":
+                    self._complete_value(self.text[self._start : i + 1])
+            return
+
+        if self._expect == "value_scalar" and (c in _WHITESPACE or c in ",}"):
+            self._complete_value(self.text[self._start : i])
+
+        if c == '"':
+            self._in_string = True
+            if self._depth == 1 and self._expect == "key":
+                self._start, self._expect = i, "key_string"
+            elif self._depth == 1 and self._expect == "value":
+                self._start, self._expect = i, "value_string"
+        elif c in "{[":
+            if self._depth == 1 and self._expect == "value":
+                self._start, self._expect = i, "value_nested"
+            self._depth += 1
+        elif c in "}]":
+            self._depth -= 1
+            if self._depth == 1 and self._expect == "value_nested":
+                self._complete_value(self.text[self._start : i + 1])
+            elif self._depth == 0:
+                self.complete = True
+        elif self._depth > 1 or c in _WHITESPACE:
+            pass
+        elif c == ":" and self._expect == "colon":
+            self._expect = "value"
+        elif c == "," and self._expect == "comma":
+            self._expect = "key"
+        elif self._expect == "value":
+            self._start, self._expect = i, "value_scalar"
+        elif self._expect != "value_scalar":
+            self.malformed = True
+
+    def _complete_value(self, raw: str):
+        self._expect = "comma"
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except json.JSONDecodeError:
+            self.malformed = True
+            return
+        if (
+            self.signal is None
+            and not self._rejected
+            and {"decision", "percentage"} <= self.fields.keys()
+        ):
+            try:
+                self.signal = validate_decision(self.fields, require_reason=False)
+            except DecisionValidationError as e:
+                self._rejected = True
+                logger.warning("Streamed decision rejected: %s", e)
+                return
+            if self.on_signal is not None:
+                self.on_signal(self.signal)
+
+    def finish(self) -> Optional[Dict]:
+        """
+        Validated decision for the whole response, or None if unusable. If
+        the signal was already handed out it is returned (with a None
+        reason) even when the rest of the response is broken, so the trade
+        that may have been executed still gets recorded.
+        """
+        fields = self.fields if self.complete and not self.malformed else None
+        if fields is None:
+            fields = extract_json_object(self.text)
+        try:
+            if fields is None:
+                raise DecisionValidationError("no JSON found in AI response")
+            result = validate_decision(fields)
+        except DecisionValidationError as e:
+            logger.error("Invalid AI response: %s", e)
+            if self.signal is not None:
+                return {**self.signal, "reason": None}
+            return None
+        if self.signal is not None and (
+            result["decision"],
+            result["percentage"],
+        ) != (self.signal["decision"], self.signal["percentage"]):
+            logger.error("Final response disagrees with the streamed signal")
+        return result
@@ -0,0 +1,553 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# add_indicators 가 만드는 컬럼 (순서 포함)
+INDICATOR_COLUMNS = [
+    "bb_bbm",
+    "bb_bbh",
+    "bb_bbl",
+    "rsi",
+    "macd",
+    "macd_signal",
+    "macd_diff",
+    "sma_20",
+    "ema_12",
+    "stoch_k",
+    "stoch_d",
+    "atr",
+    "obv",
+]
+
+
+class _RollingStats:
+    """Fixed-size window keeping mean and population variance in O(1)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float):
+        if len(self.values) < self.window:
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self._m2 += delta * (value - self.mean)
+            return
+        old = self.values.popleft()
+        self.values.append(value)
+        old_mean = self.mean
+        self.mean += (value - old) / self.window
+        self._m2 += (value - old) * (value - self.mean + old - old_mean)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(self._m2, 0.0) / len(self.values))
+
+
+class _Ewm:
+    """Recursive EWM matching ``Series.ewm(adjust=False, min_periods=...)``."""
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value: Optional[float] = None
+        self.count = 0
+
+    def push(self, value: float) -> float:
+        if value is None or math.isnan(value):
+            return self.current
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        self.count += 1
+        return self.current
+
+    @property
+    def current(self) -> float:
+        if self.count < self.min_periods:
+            return math.nan
+        return self.value
+
+
+class _RollingExtreme:
+    """Monotonic deque giving the rolling min or max in amortized O(1)."""
+
+    def __init__(self, window: int, mode: str):
+        self.window = window
+        self._better = (lambda a, b: a <= b) if mode == "min" else (lambda a, b: a >= b)
+        self._items = deque()
+        self._index = 0
+
+    def push(self, value: float) -> float:
+        while self._items and self._better(value, self._items[-1][1]):
+            self._items.pop()
+        self._items.append((self._index, value))
+        if self._items[0][0] <= self._index - self.window:
+            self._items.popleft()
+        self._index += 1
+        if self._index < self.window:
+            return math.nan
+        return self._items[0][1]
+
+
+class StreamingIndicators:
+    """
+    Stateful counterpart of ``trading.add_indicators``.
+
+    Each call to ``update`` consumes one closed candle and returns the same
+    indicator columns ``add_indicators`` would produce for that row, without
+    touching the earlier history.
+    """
+
+    def __init__(self):
+        # 볼린저 밴드 / SMA (20)
+        self._bb = _RollingStats(20)
+        # RSI (14) - Wilder smoothing
+        self._rsi_up = _Ewm(alpha=1 / 14, min_periods=14)
+        self._rsi_down = _Ewm(alpha=1 / 14, min_periods=14)
+        # MACD (12, 26, 9) / EMA (12)
+        self._ema_fast = _Ewm(alpha=2 / (12 + 1), min_periods=12)
+        self._ema_slow = _Ewm(alpha=2 / (26 + 1), min_periods=26)
+        self._macd_signal = _Ewm(alpha=2 / (9 + 1), min_periods=9)
+        # Stochastic (14, 3)
+        self._low_min = _RollingExtreme(14, "min")
+        self._high_max = _RollingExtreme(14, "max")
+        self._stoch_k = deque(maxlen=3)
+        # ATR (14)
+        self._atr_window = 14
+        self._tr_sum = 0.0
+        self._atr: Optional[float] = None
+        # OBV
+        self._obv = 0.0
+
+        self._prev_close: Optional[float] = None
+        self.count = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "StreamingIndicators":
+        """Warm up the engine from an OHLCV frame (e.g. ``pyupbit.get_ohlcv``)."""
+        engine = cls()
+        for row in df[["open", "high", "low", "close", "volume"]].itertuples(
+            index=False
+        ):
+            engine.update(*row)
+        return engine
+
+    def update(self, open, high, low, close, volume) -> Dict[str, float]:
+        prev_close = self._prev_close
+        row = {}
+
+        self._bb.push(close)
+        if self._bb.ready:
+            mavg, std = self._bb.mean, self._bb.std
+            row["bb_bbm"] = mavg
+            row["bb_bbh"] = mavg + 2 * std
+            row["bb_bbl"] = mavg - 2 * std
+            row["sma_20"] = mavg
+        else:
+            row["bb_bbm"] = row["bb_bbh"] = row["bb_bbl"] = row["sma_20"] = math.nan
+
+        diff = 0.0 if prev_close is None else close - prev_close
+        up = self._rsi_up.push(diff if diff > 0 else 0.0)
+        down = self._rsi_down.push(-diff if diff < 0 else 0.0)
+        if down == 0:
+            row["rsi"] = 100.0
+        else:
+            row["rsi"] = 100 - 100 / (1 + up / down)
+
+        fast = self._ema_fast.push(close)
+        slow = self._ema_slow.push(close)
+        macd = fast - slow
+        signal = self._macd_signal.push(macd)
+        row["macd"] = macd
+        row["macd_signal"] = signal
+        row["macd_diff"] = macd - signal
+        row["ema_12"] = fast
+
+        lowest = self._low_min.push(low)
+        highest = self._high_max.push(high)
+        stoch_k = math.nan
+        if not math.isnan(lowest):
+            span = highest - lowest
+            stoch_k = 100 * (close - lowest) / span if span else math.nan
+        self._stoch_k.append(stoch_k)
+        row["stoch_k"] = stoch_k
+        if len(self._stoch_k) == 3:
+            row["stoch_d"] = sum(self._stoch_k) / 3
+        else:
+            row["stoch_d"] = math.nan
+
+        if prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        n = self._atr_window
+        if self._atr is None:
+            self._tr_sum += true_range
+            if self.count == n - 1:
+                self._atr = self._tr_sum / n
+        else:
+            self._atr = (self._atr * (n - 1) + true_range) / float(n)
+        # ta 와 동일하게 warm-up 구간은 0
+        row["atr"] = 0.0 if self._atr is None else self._atr
+
+        if prev_close is not None and close < prev_close:
+            self._obv -= volume
+        else:
+            self._obv += volume
+        row["obv"] = self._obv
+
+        self._prev_close = close
+        self.count += 1
+        return row
+
+
+# --- 패널(시간 x 티커) 벡터 연산 ---------------------------------------------
+
+
+def _as_2d(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    return arr.reshape(-1, 1) if arr.ndim == 1 else arr
+
+
+def _first_valid(arr: np.ndarray) -> np.ndarray:
+    """Row index of the first non-NaN value in each column (len(arr) if none)."""
+    valid = ~np.isnan(arr)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(arr))
+
+
+def _rolling(arr: np.ndarray, window: int, func) -> np.ndarray:
+    """Rolling reduction along time; NaN until a full, NaN-free window exists."""
+    out = np.full(arr.shape, np.nan)
+    if len(arr) >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(arr, window, axis=0)
+        out[window - 1 :] = func(windows, axis=-1)
+    return out
+
+
+def _rolling_mean(arr: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(arr, window, np.mean)
+
+
+def _rolling_std(arr: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(arr, window, np.std)
+
+
+def _ewm(arr: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """``Series.ewm(alpha=..., adjust=False, min_periods=...)`` per column."""
+    # pandas 의 EWM 은 2차원 입력도 컬럼별로 C 루프에서 계산한다
+    return (
+        pd.DataFrame(arr)
+        .ewm(alpha=alpha, adjust=False, min_periods=min_periods)
+        .mean()
+        .to_numpy()
+    )
+
+
+def _shift(arr: np.ndarray, periods: int = 1) -> np.ndarray:
+    out = np.full(arr.shape, np.nan)
+    out[periods:] = arr[:-periods]
+    return out
+
+
+def _rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    diff = close - _shift(close)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    # 각 티커의 데이터 시작 이전 구간은 관측치가 아님
+    started = np.arange(len(close))[:, None] >= _first_valid(close)
+    up = np.where(started, up, np.nan)
+    down = np.where(started, down, np.nan)
+    emaup = _ewm(up, 1 / window, window)
+    emadn = _ewm(down, 1 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+
+
+def _wilder(arr: np.ndarray, window: int) -> np.ndarray:
+    """Wilder smoothing: mean of the first ``window`` values, then alpha = 1 / window."""
+    start = _first_valid(arr)
+    rows = np.arange(len(arr))[:, None]
+    seed_row = start + window - 1
+    window_sums = np.cumsum(np.nan_to_num(arr), axis=0)
+    window_sums[window:] -= window_sums[:-window].copy()
+    seeded = np.where(rows == seed_row, window_sums / window, np.nan)
+    seeded = np.where(rows > seed_row, arr, seeded)
+    return _ewm(seeded, 1 / window, 1)
+
+
+def _true_range(high, low, close) -> np.ndarray:
+    prev_close = _shift(close)
+    return np.fmax(
+        high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    )
+
+
+def _adx(high, low, close, window: int = 14) -> np.ndarray:
+    """Wilder's ADX; NaN until ``2 * window`` candles are available."""
+    up = high - _shift(high)
+    down = _shift(low) - low
+    missing = np.isnan(up) | np.isnan(down)
+    plus_dm = np.where(missing, np.nan, np.where((up > down) & (up > 0), up, 0.0))
+    minus_dm = np.where(missing, np.nan, np.where((down > up) & (down > 0), down, 0.0))
+    true_range = np.where(missing, np.nan, _true_range(high, low, close))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tr_smooth = _wilder(true_range, window)
+        plus_di = 100 * _wilder(plus_dm, window) / tr_smooth
+        minus_di = 100 * _wilder(minus_dm, window) / tr_smooth
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    # 움직임이 전혀 없는 구간은 추세 강도 0
+    dx = np.where(np.isnan(dx) & ~np.isnan(tr_smooth), 0.0, dx)
+    return _wilder(dx, window)
+
+
+def _atr(high, low, close, window: int = 14) -> np.ndarray:
+    # 첫 window 개 TR 평균으로 시작한 뒤 Wilder 평활 (alpha = 1 / window)
+    atr = _wilder(_true_range(high, low, close), window)
+    start = _first_valid(close)
+    rows = np.arange(len(close))[:, None]
+    # ta 와 동일하게 warm-up 구간은 0, 데이터 시작 전은 NaN
+    return np.where(
+        rows >= start + window - 1, atr, np.where(rows >= start, 0.0, np.nan)
+    )
+
+
+def _obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    signed = np.where(close < _shift(close), -volume, volume)
+    obv = np.nancumsum(signed, axis=0)
+    return np.where(np.isnan(signed), np.nan, obv)
+
+
+# --- 선언적 지표 파이프라인 ---------------------------------------------------
+
+
+def _stoch(close, lowest, highest):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 * (close - lowest) / (highest - lowest)
+
+
+# kind -> (입력 배열들, **params) 를 받는 커널
+KERNELS = {
+    "sma": lambda x, window: _rolling_mean(x, window),
+    "std": lambda x, window: _rolling_std(x, window),
+    "ema": lambda x, window: _ewm(x, 2 / (window + 1), window),
+    "rolling_min": lambda x, window: _rolling(x, window, np.min),
+    "rolling_max": lambda x, window: _rolling(x, window, np.max),
+    "band": lambda mid, dev, k: mid + k * dev,
+    "sub": lambda a, b: a - b,
+    "rsi": lambda close, window: _rsi(close, window),
+    "stoch": _stoch,
+    "atr": lambda high, low, close, window: _atr(high, low, close, window),
+    "obv": _obv,
+    "adx": lambda high, low, close, window: _adx(high, low, close, window),
+    "div": lambda a, b: np.divide(a, b, out=np.full(a.shape, np.nan), where=b != 0),
+    "bandwidth": lambda high, low, mid: (high - low) / mid,
+}
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """A named indicator: kernel ``kind`` applied to ``inputs`` with ``params``."""
+
+    name: str
+    kind: str
+    inputs: Tuple[str, ...]
+    params: Tuple[Tuple[str, float], ...] = ()
+
+
+def spec(name: str, kind: str, inputs, **params) -> IndicatorSpec:
+    return IndicatorSpec(name, kind, tuple(inputs), tuple(sorted(params.items())))
+
+
+# 이름으로 참조 가능한 지표와 중간 값. inputs 는 OHLCV 컬럼 또는 다른 spec 이름
+CATALOG = {
+    s.name: s
+    for s in [
+        # 볼린저 밴드 (20, 2) - 중간선은 sma_20 과 같은 노드
+        spec("bb_bbm", "sma", ["close"], window=20),
+        spec("bb_std", "std", ["close"], window=20),
+        spec("bb_bbh", "band", ["bb_bbm", "bb_std"], k=2),
+        spec("bb_bbl", "band", ["bb_bbm", "bb_std"], k=-2),
+        # RSI (14)
+        spec("rsi", "rsi", ["close"], window=14),
+        # MACD (12, 26, 9) - 빠른 EMA 는 ema_12 와 같은 노드
+        spec("ema_26", "ema", ["close"], window=26),
+        spec("macd", "sub", ["ema_12", "ema_26"]),
+        spec("macd_signal", "ema", ["macd"], window=9),
+        spec("macd_diff", "sub", ["macd", "macd_signal"]),
+        # 이동 평균
+        spec("sma_20", "sma", ["close"], window=20),
+        spec("ema_12", "ema", ["close"], window=12),
+        # Stochastic (14, 3)
+        spec("stoch_low", "rolling_min", ["low"], window=14),
+        spec("stoch_high", "rolling_max", ["high"], window=14),
+        spec("stoch_k", "stoch", ["close", "stoch_low", "stoch_high"]),
+        spec("stoch_d", "sma", ["stoch_k"], window=3),
+        # ATR (14) / OBV
+        spec("atr", "atr", ["high", "low", "close"], window=14),
+        spec("obv", "obv", ["close", "volume"]),
+        # 횡보장 판단용 (add_indicators 기본 출력에는 없음)
+        spec("bb_width", "bandwidth", ["bb_bbh", "bb_bbl", "bb_bbm"]),
+        spec("adx", "adx", ["high", "low", "close"], window=14),
+        spec("volume_sma_20", "sma", ["volume"], window=20),
+        spec("volume_ratio", "div", ["volume", "volume_sma_20"]),
+    ]
+}
+
+
+class IndicatorPipeline:
+    """
+    Indicator set compiled into a dependency graph.
+
+    Specs that resolve to the same computation (same kernel, parameters and
+    upstream nodes) collapse into one node, so shared intermediates such as
+    the 12-period EMA or the 20-period mean are computed once per run.
+    """
+
+    def __init__(self, columns, catalog: Optional[Dict[str, IndicatorSpec]] = None):
+        self.catalog = dict(CATALOG if catalog is None else catalog)
+        self.columns = []
+        for column in columns:
+            if isinstance(column, IndicatorSpec):
+                self.catalog[column.name] = column
+                column = column.name
+            self.columns.append(column)
+
+        self._keys: Dict[str, tuple] = {}
+        self.nodes: Dict[tuple, IndicatorSpec] = {}
+        for column in self.columns:
+            self._resolve(column, ())
+
+    def _resolve(self, name: str, path: tuple) -> tuple:
+        if name in OHLCV_COLUMNS:
+            return ("input", name)
+        if name in self._keys:
+            return self._keys[name]
+        if name in path:
+            raise ValueError(f"Cyclic indicator dependency: {' -> '.join(path)}")
+        if name not in self.catalog:
+            raise KeyError(f"Unknown indicator: {name}")
+
+        node = self.catalog[name]
+        inputs = tuple(self._resolve(i, path + (name,)) for i in node.inputs)
+        key = (node.kind, inputs, node.params)
+        # dict 삽입 순서가 곧 위상 정렬 순서
+        self.nodes.setdefault(key, node)
+        self._keys[name] = key
+        return key
+
+    def compute(self, data: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Evaluate the graph on OHLCV arrays (1-D series or time x ticker)."""
+        values = {
+            ("input", name): _as_2d(data[name])
+            for name in OHLCV_COLUMNS
+            if name in data
+        }
+        for key, node in self.nodes.items():
+            kind, inputs, params = key
+            values[key] = KERNELS[kind](*(values[i] for i in inputs), **dict(params))
+        return {column: values[self._keys[column]] for column in self.columns}
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the pipeline's columns to an OHLCV frame, like ``add_indicators``."""
+        data = {name: df[name].to_numpy(dtype=float) for name in OHLCV_COLUMNS}
+        for column, values in self.compute(data).items():
+            df[column] = values[:, 0]
+        return df
+
+
+DEFAULT_PIPELINE = IndicatorPipeline(INDICATOR_COLUMNS)
+
+# 모든 지표가 값을 갖기까지 필요한 앞쪽 캔들 수 (MACD signal 은 34번째 캔들부터)
+INDICATOR_WARMUP = 33
+
+# 일봉은 전체 지표
+DAILY_PIPELINE = DEFAULT_PIPELINE
+
+# 시간봉도 INDICATOR_WARMUP 개를 더 받아 계산하므로 MACD 까지 전체 지표
+HOURLY_PIPELINE = DEFAULT_PIPELINE
+
+
+def compute_indicator_panel(open, high, low, close, volume) -> Dict[str, np.ndarray]:
+    """
+    Compute every ``add_indicators`` column for a (time x ticker) panel.
+
+    Each argument is a 2-D array with one column per ticker; tickers with a
+    shorter history are padded with leading NaN rows. The result maps each
+    name in ``INDICATOR_COLUMNS`` to an array of the same shape.
+    """
+    return DEFAULT_PIPELINE.compute(
+        {"open": open, "high": high, "low": low, "close": close, "volume": volume}
+    )
+
+
+def frames_to_panel(frames: Dict[str, pd.DataFrame]):
+    """Align per-ticker OHLCV frames on a shared index -> (panel, tickers, index)."""
+    tickers = list(frames)
+    index = pd.Index([])
+    for df in frames.values():
+        index = index.union(df.index)
+    panel = {
+        column: np.column_stack(
+            [
+                frames[ticker][column].reindex(index).to_numpy(float)
+                for ticker in tickers
+            ]
+        )
+        for column in ["open", "high", "low", "close", "volume"]
+    }
+    return panel, tickers, index
+
+
+def add_indicators_panel(
+    panel: Dict[str, np.ndarray], tickers, index=None, long_format: bool = False
+):
+    """
+    Panel version of ``trading.add_indicators``.
+
+    Returns ``{ticker: DataFrame}`` with the OHLCV and indicator columns (rows
+    before a ticker's first candle dropped), or a single long-format frame
+    with ``ticker`` and ``timestamp`` columns when ``long_format`` is set.
+    """
+    ohlcv = {
+        column: _as_2d(panel[column])
+        for column in ["open", "high", "low", "close", "volume"]
+    }
+    indicators = compute_indicator_panel(**ohlcv)
+    columns = {**ohlcv, **indicators}
+    if index is None:
+        index = pd.RangeIndex(len(ohlcv["close"]))
+
+    if long_format:
+        n_time, n_tickers = ohlcv["close"].shape
+        long_df = pd.DataFrame(
+            {
+                "timestamp": np.repeat(np.asarray(index), n_tickers),
+                "ticker": np.tile(np.asarray(tickers, dtype=object), n_time),
+                **{name: values.ravel() for name, values in columns.items()},
+            }
+        )
+        return long_df[long_df["close"].notna()].reset_index(drop=True)
+
+    frames = {}
+    for i, ticker in enumerate(tickers):
+        df = pd.DataFrame(
+            {name: values[:, i] for name, values in columns.items()}, index=index
+        )
+        frames[ticker] = df[df["close"].notna()]
+    return frames
@@ -0,0 +1,176 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pyupbit
+
+logger = logging.getLogger(__name__)
+
+# 캐시된 값을 사용할 수 있는 최대 경과 시간 (초)
+DEFAULT_MAX_AGE = 5.0
+
+
+class MarketFeed:
+    """
+    In-memory latest ticker and orderbook per market, kept fresh by
+    background WebSocket subscriptions.
+
+    Readers get the cached value when it is younger than ``max_age`` seconds
+    and fall back to a REST call otherwise, so the feed can be used before it
+    is started or while it is reconnecting.
+    """
+
+    def __init__(
+        self,
+        markets: List[str],
+        max_age: float = DEFAULT_MAX_AGE,
+        source_factory=None,
+        rest=None,
+    ):
+        self.markets = list(markets)
+        self.max_age = max_age
+        # pyupbit.WebSocketManager 와 같은 (type, codes) 시그니처
+        self.source_factory = source_factory or pyupbit.WebSocketManager
+        # get_current_price / get_orderbook 를 제공하는 REST fallback
+        self.rest = rest or pyupbit
+        self._lock = threading.Lock()
+        self._tickers: Dict[str, tuple] = {}
+        self._orderbooks: Dict[str, tuple] = {}
+        self._sources = []
+        self._threads = []
+        self._listeners = []
+        self._running = False
+        self.stats = {"hits": 0, "fallbacks": 0, "messages": 0}
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        for stream in ("ticker", "orderbook"):
+            source = self.source_factory(stream, self.markets)
+            thread = threading.Thread(
+                target=self._pump, args=(source,), name=f"feed-{stream}", daemon=True
+            )
+            self._sources.append(source)
+            self._threads.append(thread)
+            thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        for source in self._sources:
+            try:
+                source.terminate()
+            except Exception as e:
+                logger.error("Error stopping feed source: %s", e)
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._sources.clear()
+        self._threads.clear()
+
+    def _pump(self, source):
+        while self._running:
+            try:
+                message = source.get()
+            except Exception as e:
+                if self._running:
+                    logger.error("WebSocket feed error: %s", e)
+                    time.sleep(1)
+                continue
+            if isinstance(message, dict):
+                self.on_message(message)
+            elif message == "ConnectionClosedError":
+                logger.warning("WebSocket connection closed, reconnecting")
+
+    def add_listener(self, callback):
+        """Call ``callback(message)`` for every message received from the feed."""
+        self._listeners.append(callback)
+
+    def on_message(self, message: Dict):
+        market = message.get("code")
+        received = time.monotonic()
+        with self._lock:
+            self.stats["messages"] += 1
+            if message.get("type") == "ticker":
+                self._tickers[market] = (message, received)
+            elif message.get("type") == "orderbook":
+                self._orderbooks[market] = (message, received)
+        for callback in self._listeners:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error("Feed listener error: %s", e)
+
+    def _fresh(self, cache: Dict, market: str, max_age: Optional[float]):
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            entry = cache.get(market)
+            if entry and time.monotonic() - entry[1] <= max_age:
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["fallbacks"] += 1
+        return None
+
+    def get_current_price(self, market: str = "KRW-BTC", max_age=None):
+        ticker = self._fresh(self._tickers, market, max_age)
+        if ticker is not None:
+            return ticker["trade_price"]
+        return self.rest.get_current_price(market)
+
+    def get_orderbook(self, market: str = "KRW-BTC", max_age=None):
+        message = self._fresh(self._orderbooks, market, max_age)
+        if message is not None:
+            # REST(pyupbit.get_orderbook) 응답과 같은 형태로 변환
+            return {
+                "market": market,
+                "timestamp": message.get("timestamp"),
+                "total_ask_size": message.get("total_ask_size"),
+                "total_bid_size": message.get("total_bid_size"),
+                "orderbook_units": message.get("orderbook_units", []),
+            }
+        return self.rest.get_orderbook(market)
+
+
+class ReplayFeedSource:
+    """
+    Local stand-in for ``pyupbit.WebSocketManager`` replaying recorded
+    messages (e.g. a JSON-lines capture), for tests and offline runs.
+    """
+
+    def __init__(self, type: str, codes: List[str], messages=None, interval=0.0):
+        self.type = type
+        self.codes = codes
+        self.interval = interval
+        self._messages = [
+            m
+            for m in (messages or [])
+            if m.get("type") == type and m.get("code") in codes
+        ]
+        self._position = 0
+        self._stopped = threading.Event()
+
+    @classmethod
+    def factory(cls, messages, interval=0.0):
+        """Return a ``(type, codes)`` factory usable as ``MarketFeed.source_factory``."""
+        return lambda type, codes: cls(type, codes, messages, interval)
+
+    @staticmethod
+    def load(path: str) -> List[Dict]:
+        with open(path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def get(self):
+        if self._position >= len(self._messages):
+            # 재생이 끝나면 실제 소켓처럼 다음 메시지를 기다린다
+            self._stopped.wait()
+            return None
+        if self.interval:
+            self._stopped.wait(self.interval)
+        message = self._messages[self._position]
+        self._position += 1
+        return message
+
+    def terminate(self):
+        self._stopped.set()
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger(__name__)
+
+MODES = ("readwrite", "replay", "off")
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def cache_key(model: str, messages: List[Dict], **params) -> str:
+    """sha256 of the canonical JSON of (model, messages, extra parameters)."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _describe(response: ChatCompletion, info: Dict) -> ChatCompletion:
+    info["model"] = response.model
+    info["usage"] = response.usage.model_dump() if response.usage else None
+    return response
+
+
+class LLMCache:
+    """
+    Content-addressed SQLite cache of chat completion responses.
+
+    Modes:
+      - ``readwrite``: serve hits, call the API on a miss and store the result
+      - ``replay``: serve hits only; a miss raises ``CacheMiss`` so offline
+        runs never reach the network
+      - ``off``: always call the API, store nothing
+
+    Entries older than ``ttl`` seconds are ignored (``None`` keeps them
+    forever). When the stored responses exceed ``max_bytes`` the least
+    recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = "llm_cache.db",
+        mode: str = "readwrite",
+        ttl: Optional[float] = 24 * 60 * 60,
+        max_bytes: int = 50 * 1024 * 1024,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._initialized = False
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        if not self._initialized:
+            self._init_db(conn)
+            self._initialized = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, conn):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache
+                (key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER DEFAULT 0)
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed "
+                "ON llm_cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored response JSON for ``key``, or None when missing or expired."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE llm_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+        return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                (key, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, model, response, len(response), now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        excess = total[0] - self.max_bytes
+        if excess <= 0:
+            return
+        # 오래 사용되지 않은 항목부터 초과분만큼 삭제
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY accessed_at"
+        ):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        self.stats["evictions"] += len(victims)
+
+    def create(
+        self,
+        create: Callable,
+        model: str,
+        messages: List[Dict],
+        info: Optional[Dict] = None,
+        **params,
+    ) -> ChatCompletion:
+        """
+        Cached stand-in for ``client.chat.completions.create``: pass the
+        bound ``create`` method plus its keyword arguments. ``info``, when
+        given, receives ``cache_hit``, ``model`` and ``usage`` of the call.
+        """
+        info = {} if info is None else info
+        info["cache_hit"] = False
+        if self.mode == "off":
+            return _describe(create(model=model, messages=messages, **params), info)
+
+        key = cache_key(model, messages, **params)
+        cached = self.get(key)
+        if cached is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            logger.info("LLM cache hit for %s (%s)", model, key[:12])
+            info["cache_hit"] = True
+            return _describe(ChatCompletion.model_validate_json(cached), info)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        if self.mode == "replay":
+            raise CacheMiss(f"No recorded {model} response for {key[:12]}")
+
+        response = create(model=model, messages=messages, **params)
+        self.put(key, model, response.model_dump_json())
+        return _describe(response, info)
+
+    def stream(
+        self,
+        create: Callable,
+        model: str,
+        messages: List[Dict],
+        info: Optional[Dict] = None,
+        **params,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of ``create`` yielding the response text in chunks.
+        The key is the same as for the non-streaming call, so a hit yields
+        the recorded response in one chunk; a streamed miss is stored as a
+        regular ``ChatCompletion`` once the stream has finished. ``info`` is
+        filled as for ``create`` once the stream is exhausted, including
+        ``latency``: the seconds until the last chunk arrived, not counting
+        the time the consumer spent on the chunks.
+        """
+        info = {} if info is None else info
+        info["cache_hit"] = False
+        start = time.monotonic()
+        key = cache_key(model, messages, **params)
+        if self.mode != "off":
+            cached = self.get(key)
+            if cached is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                logger.info("LLM cache hit for %s (%s)", model, key[:12])
+                info["cache_hit"] = True
+                response = _describe(ChatCompletion.model_validate_json(cached), info)
+                info["latency"] = time.monotonic() - start
+                yield response.choices[0].message.content or ""
+                return
+            with self._lock:
+                self.stats["misses"] += 1
+            if self.mode == "replay":
+                raise CacheMiss(f"No recorded {model} response for {key[:12]}")
+
+        parts = []
+        paused = 0.0
+        last = None
+        usage = None
+        finish_reason = None
+        for chunk in create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **params,
+        ):
+            last = chunk
+            if chunk.usage is not None:
+                usage = chunk.usage.model_dump()
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            text = chunk.choices[0].delta.content
+            if text:
+                parts.append(text)
+                yielded = time.monotonic()
+                yield text
+                paused += time.monotonic() - yielded
+
+        # 소비자가 조각을 처리한 시간은 빼고, 클라이언트가 잰 값이 있으면 그것을 쓴다
+        info.setdefault("latency", time.monotonic() - start - paused)
+        if last is None:
+            return
+        info["model"] = last.model
+        info["usage"] = usage
+        if self.mode == "off":
+            return
+        # 스트림 조각을 일반 응답 형태로 모아 저장한다
+        response = ChatCompletion.model_validate(
+            {
+                "id": last.id,
+                "object": "chat.completion",
+                "created": last.created,
+                "model": last.model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": finish_reason or "stop",
+                        "message": {"role": "assistant", "content": "".join(parts)},
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+        self.put(key, model, response.model_dump_json())
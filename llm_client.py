@@ -0,0 +1,357 @@
+import asyncio
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import openai
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger(__name__)
+
+# 다시 시도해도 되는 오류 (일시적인 네트워크/서버 문제)
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# 모델별로 보관할 최근 응답 시간 수
+LATENCY_WINDOW = 200
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when a call does not finish before its deadline."""
+
+
+class LLMClient:
+    """
+    One shared ``AsyncOpenAI`` client for every LLM call.
+
+    Each call gets an overall ``deadline`` (seconds) that covers retries;
+    retryable errors are retried with full-jitter exponential backoff. With
+    ``hedge_model`` set, a call to the primary model that has not answered
+    after its observed p95 latency is duplicated to the hedge model and the
+    first successful answer wins. Streamed calls are hedged the same way on
+    the p95 time to the first chunk, and then follow whichever stream
+    produced it. The async loop runs on a background thread so synchronous
+    code can call ``create``/``stream`` directly.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        deadline: float = 180,
+        max_retries: int = 2,
+        backoff: float = 1.0,
+        hedge_model: Optional[str] = None,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        client: Optional[AsyncOpenAI] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = client
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge_model = hedge_model
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies: Dict[str, deque] = {}
+        # 스트리밍 호출의 첫 조각까지 걸린 시간
+        self.first_chunk_latencies: Dict[str, deque] = {}
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+        }
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="llm-client", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # API 키 없이도 import 할 수 있도록 처음 사용할 때 만든다
+        if self._client is None:
+            # 재시도와 시간 제한은 이 클래스에서 직접 관리한다
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                timeout=self.deadline,
+            )
+        return self._client
+
+    # ------------------------------------------------------------------
+    # 응답 시간 기록
+    # ------------------------------------------------------------------
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def record_latency(self, model: str, seconds: float, first_chunk: bool = False):
+        latencies = self.first_chunk_latencies if first_chunk else self.latencies
+        with self._lock:
+            latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def hedge_delay(self, model: str, first_chunk: bool = False) -> Optional[float]:
+        """
+        Observed ``hedge_quantile`` latency of ``model`` (time to the first
+        chunk with ``first_chunk``), once enough samples exist.
+        """
+        latencies = self.first_chunk_latencies if first_chunk else self.latencies
+        with self._lock:
+            samples = list(latencies.get(model, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return float(np.quantile(samples, self.hedge_quantile))
+
+    # ------------------------------------------------------------------
+    # 비동기 호출
+    # ------------------------------------------------------------------
+
+    async def _attempts(
+        self,
+        model: str,
+        messages: List[Dict],
+        expires: float,
+        info: Optional[Dict] = None,
+        **params,
+    ):
+        """Call ``model`` until success, a non-retryable error or the deadline."""
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError(f"{model} call exceeded its deadline")
+            start = time.monotonic()
+            try:
+                response = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model, messages=messages, **params
+                    ),
+                    remaining,
+                )
+                if not params.get("stream"):
+                    self.record_latency(model, time.monotonic() - start)
+                return response
+            except asyncio.TimeoutError:
+                raise LLMTimeoutError(f"{model} call exceeded its deadline")
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._count("retries")
+                if info is not None:
+                    info["retries"] = info.get("retries", 0) + 1
+                # full jitter: 0 ~ backoff * 2^n 사이에서 무작위로 대기
+                delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                logger.warning(
+                    "%s call failed (%s), retry %d in %.2fs", model, e, attempt, delay
+                )
+                await asyncio.sleep(min(delay, max(expires - time.monotonic(), 0)))
+
+    async def acreate(
+        self,
+        model: str,
+        messages: List[Dict],
+        deadline: Optional[float] = None,
+        hedge: bool = True,
+        info: Optional[Dict] = None,
+        **params,
+    ) -> ChatCompletion:
+        """
+        ``chat.completions.create`` bounded by ``deadline``, with optional
+        hedging. ``info``, when given, receives ``retries`` and ``hedged``.
+        """
+        self._count("calls")
+        info = {} if info is None else info
+        info.update(retries=0, hedged=False)
+        expires = time.monotonic() + (deadline or self.deadline)
+        try:
+            delay = self._hedge_delay(model, hedge)
+            if delay is None:
+                return await self._attempts(model, messages, expires, info, **params)
+            return await self._hedged(
+                lambda name: self._attempts(name, messages, expires, info, **params),
+                model,
+                delay,
+                info,
+            )
+        except LLMTimeoutError:
+            self._count("timeouts")
+            raise
+
+    def _hedge_delay(
+        self, model: str, hedge: bool, first_chunk: bool = False
+    ) -> Optional[float]:
+        if not hedge or not self.hedge_model or self.hedge_model == model:
+            return None
+        return self.hedge_delay(model, first_chunk)
+
+    async def _hedged(
+        self, call: Callable[[str], Awaitable], model: str, delay: float, info: Dict
+    ):
+        """
+        ``call(model)``, raced against ``call(hedge_model)`` if it has not
+        finished after ``delay`` seconds; the first success wins.
+        """
+        primary = asyncio.ensure_future(call(model))
+        pending = {primary}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._count("hedged")
+            info["hedged"] = True
+            logger.info(
+                "%s has not answered after %.1fs, hedging to %s",
+                model,
+                delay,
+                self.hedge_model,
+            )
+            backup = asyncio.ensure_future(call(self.hedge_model))
+            pending.add(backup)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _open_stream(
+        self, model: str, messages: List[Dict], expires: float, info: Dict, **params
+    ):
+        """Start a streamed call and wait for its first chunk."""
+        # 첫 조각을 받기 전까지만 재시도한다
+        start = time.monotonic()
+        stream = await self._attempts(
+            model, messages, expires, info, stream=True, **params
+        )
+        chunks = stream.__aiter__()
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = None
+        self.record_latency(model, time.monotonic() - start, first_chunk=True)
+        return model, start, first, chunks
+
+    async def _astream(
+        self,
+        model: str,
+        messages: List[Dict],
+        expires: float,
+        out: queue.Queue,
+        info: Dict,
+        hedge: bool = True,
+        **params,
+    ):
+        def call(name):
+            return self._open_stream(name, messages, expires, info, **params)
+
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout_at(
+                asyncio.get_running_loop().time() + (expires - time.monotonic())
+            ):
+                delay = self._hedge_delay(model, hedge, first_chunk=True)
+                if delay is None:
+                    opened = await call(model)
+                else:
+                    opened = await self._hedged(call, model, delay, info)
+                # 첫 조각을 먼저 보낸 스트림만 끝까지 읽는다
+                model, start, first, chunks = opened
+                if first is not None:
+                    out.put(first)
+                    async for chunk in chunks:
+                        out.put(chunk)
+            self.record_latency(model, time.monotonic() - start)
+            # 소비자와 무관하게 마지막 조각을 받은 시각까지의 시간
+            info["latency"] = time.monotonic() - started
+            out.put(None)
+        except TimeoutError:
+            self._count("timeouts")
+            out.put(LLMTimeoutError(f"{model} stream exceeded its deadline"))
+        except Exception as e:
+            out.put(e)
+
+    # ------------------------------------------------------------------
+    # 동기 호출
+    # ------------------------------------------------------------------
+
+    def create(
+        self,
+        model: str,
+        messages: List[Dict],
+        deadline: Optional[float] = None,
+        stream: bool = False,
+        **params,
+    ):
+        """
+        Blocking ``acreate``; usable wherever ``client.chat.completions.create``
+        is expected. With ``stream=True`` an iterator of chunks is returned.
+        ``info`` and ``hedge`` are passed through as keyword arguments.
+        """
+        if stream:
+            return self.stream(model, messages, deadline, **params)
+        future = asyncio.run_coroutine_threadsafe(
+            self.acreate(model, messages, deadline, **params), self._loop
+        )
+        return future.result()
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict],
+        deadline: Optional[float] = None,
+        info: Optional[Dict] = None,
+        hedge: bool = True,
+        **params,
+    ) -> Iterator:
+        """
+        Blocking iterator over the chunks of a streamed call, hedged on the
+        time to the first chunk.
+        """
+        self._count("calls")
+        info = {} if info is None else info
+        info.update(retries=0, hedged=False)
+        expires = time.monotonic() + (deadline or self.deadline)
+        out: queue.Queue = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._astream(model, messages, expires, out, info, hedge, **params),
+            self._loop,
+        )
+        try:
+            while True:
+                item = out.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
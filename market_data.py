@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 소스별 타임아웃 (초)
+DEFAULT_TIMEOUTS = {
+    "balances": 5,
+    "orderbook": 5,
+    "df_daily": 15,
+    "df_hourly": 15,
+    "fear_greed_index": 10,
+    "news_headlines": 30,
+}
+
+# 시간 초과된 작업이 다음 실행을 막지 않도록 모듈 단위로 공유
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-data")
+
+
+@dataclass
+class MarketSnapshot:
+    """Everything ``ai_trading`` needs for one decision, gathered at once."""
+
+    balances: Optional[List[Dict]] = None
+    orderbook: Optional[Dict] = None
+    df_daily: Optional[pd.DataFrame] = None
+    df_hourly: Optional[pd.DataFrame] = None
+    fear_greed_index: Optional[Dict] = None
+    news_headlines: Optional[str] = None
+    errors: Dict[str, str] = field(default_factory=dict)
+    latencies: Dict[str, float] = field(default_factory=dict)
+
+    def missing(self, *names: str) -> List[str]:
+        return [name for name in names if getattr(self, name) is None]
+
+    def update_from(self, other: "MarketSnapshot", names):
+        """Copy shared fields (and their errors/latencies) from another snapshot."""
+        for name in names:
+            setattr(self, name, getattr(other, name))
+            if name in other.errors:
+                self.errors[name] = other.errors[name]
+            if name in other.latencies:
+                self.latencies[name] = other.latencies[name]
+
+
+class _Task:
+    """One submitted source and the time a worker started running it."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.started_at = 0.0
+
+    def run(self, func: Callable):
+        self.started_at = time.monotonic()
+        self.started.set()
+        result = func()
+        return result, time.monotonic() - self.started_at
+
+
+def gather_market_snapshot(
+    sources: Dict[str, Callable],
+    timeouts: Optional[Dict[str, float]] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> MarketSnapshot:
+    """
+    Run every source concurrently and collect the results into a snapshot.
+
+    ``sources`` maps a ``MarketSnapshot`` field name to a zero-argument
+    callable. Each source gets its own deadline measured from when it
+    starts running, so waiting for a free worker (several markets gather
+    at once on the shared pool) doesn't eat into it; a source still queued
+    after its timeout is given up as well. A source that fails or misses
+    its deadline is left as None and recorded in ``snapshot.errors``.
+    """
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    executor = executor or _executor
+    snapshot = MarketSnapshot()
+
+    start = time.monotonic()
+    tasks = {}
+    for name, func in sources.items():
+        task = _Task()
+        tasks[name] = (task, executor.submit(task.run, func))
+
+    for name, (task, future) in tasks.items():
+        timeout = timeouts.get(name, 30)
+        try:
+            if not task.started.wait(max(start + timeout - time.monotonic(), 0)):
+                raise FutureTimeoutError
+            # 시작한 시각부터 타임아웃을 잰다 (대기열에서 기다린 시간은 제외)
+            deadline = task.started_at + timeout
+            result, elapsed = future.result(timeout=max(deadline - time.monotonic(), 0))
+            setattr(snapshot, name, result)
+            snapshot.latencies[name] = elapsed
+        except FutureTimeoutError:
+            future.cancel()
+            snapshot.errors[name] = f"timed out after {timeout}s"
+            logger.error("Market data source %s timed out", name)
+        except Exception as e:
+            snapshot.errors[name] = str(e)
+            logger.error("Market data source %s failed: %s", name, e)
+
+    logger.info(
+        "Gathered market snapshot in %.2fs (%s)",
+        time.monotonic() - start,
+        ", ".join(f"{k}={v:.2f}s" for k, v in snapshot.latencies.items()),
+    )
+    return snapshot
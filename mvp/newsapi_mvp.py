@@ -2,10 +2,11 @@
 import os
 from datetime import datetime, timedelta
 
-import pandas as pd
 import requests
 from dotenv import load_dotenv
 
+from article_store import ArticleStore
+
 load_dotenv()
 
 today = datetime.now()
@@ -53,26 +54,13 @@ def get_news_summary():
         [f"- {article['title']}: {article['description']}" for article in articles]
     )
 
-    read_df = pd.DataFrame(articles)
-    if read_df.empty:
+    if not articles:
         return
 
-    if not os.path.exists("articles.csv"):
-        df_expanded = pd.json_normalize(read_df["source"])
-        df = read_df.assign(
-            id=df_expanded["id"], name=df_expanded["name"], search_date=today
-        ).drop(columns=["source"])
-    else:
-        df = pd.read_csv("articles.csv")
-        df_expanded = pd.json_normalize(read_df["source"])
-        read_df = read_df.assign(
-            id=df_expanded["id"], name=df_expanded["name"], search_date=today
-        ).drop(columns=["source"])
-        df = pd.concat([df, read_df])
-
-    df.to_csv("articles.csv", index=False)
+    # CSV 전체를 다시 쓰지 않고 URL 기준으로 추가/갱신
+    stored = ArticleStore().upsert(articles, provider="newsapi", fetched_at=today)
     save_timestamp()
-    print(df[["title", "description", "publishedAt"]])
+    print(f"Stored {stored} articles")
     return news_summary
 
 
@@ -0,0 +1,192 @@
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+# MinHash 용 메르센 소수 (a * h 가 uint64 안에서 넘치지 않는 크기)
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\W_]+", " ", (text or "").lower()).strip()
+
+
+def article_text(article: Dict) -> str:
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of character shingles. Each added text is compared
+    only against texts sharing at least one LSH band bucket, so adding to an
+    index of tens of thousands of articles stays cheap; candidates are
+    confirmed with the estimated Jaccard similarity (``threshold``).
+
+    ``bands * rows`` hash functions are used; with the defaults two texts
+    become candidates from a similarity of roughly ``(1/bands)**(1/rows)``
+    (about 0.42), below the confirmation threshold.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        bands: int = 32,
+        rows: int = 4,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        num_perm = bands * rows
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self._powers = np.uint64(257) ** np.arange(shingle_size, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [
+            defaultdict(list) for _ in range(bands)
+        ]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._parent: Dict[Hashable, Hashable] = {}
+        self._sequence: Dict[Hashable, int] = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def signature(self, text: str) -> np.ndarray:
+        data = np.frombuffer(_normalize(text).encode(), dtype=np.uint8)
+        if len(data) < self.shingle_size:
+            data = np.pad(data, (0, self.shingle_size - len(data)))
+        # 바이트 k-gram 을 다항식 해시로 변환 후 중복 제거
+        windows = sliding_window_view(data, self.shingle_size).astype(np.uint64)
+        shingles = np.unique(windows @ self._powers) % _PRIME
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+    def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(a == b))
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+    def find(self, key: Hashable) -> Hashable:
+        """Cluster representative (the first key added to the cluster)."""
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # 경로 압축
+        while self._parent[key] != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def query(self, text: str) -> List[Hashable]:
+        """Representatives of the clusters ``text`` is a near-duplicate of."""
+        signature = self.signature(text)
+        return self._matches(signature, self._band_keys(signature))
+
+    def _matches(self, signature: np.ndarray, band_keys: List[bytes]) -> List[Hashable]:
+        candidates = {
+            key
+            for bucket, band_key in zip(self._buckets, band_keys)
+            for key in bucket.get(band_key, ())
+        }
+        # 클러스터마다 한 건만 확인되면 충분 (큰 신디케이션 클러스터 전체 비교 방지)
+        roots = set()
+        for key in candidates:
+            root = self.find(key)
+            if root in roots:
+                continue
+            if self.similarity(signature, self._signatures[key]) >= self.threshold:
+                roots.add(root)
+        return sorted(roots, key=self._sequence.get)
+
+    def add(self, key: Hashable, text: str) -> Hashable:
+        """Index ``text`` under ``key`` and return its cluster representative."""
+        if key in self._signatures:
+            return self.find(key)
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        roots = self._matches(signature, band_keys)
+
+        self._signatures[key] = signature
+        self._parent[key] = key
+        self._sequence[key] = len(self._sequence)
+        # 먼저 들어온 대표 쪽으로 병합
+        representative = roots[0] if roots else key
+        for root in roots[1:] + [key]:
+            self._parent[root] = representative
+
+        # 버킷에는 클러스터당 한 건만 두어 같은 기사의 사본이 쌓여도 후보 수가 늘지 않게 한다
+        for bucket, band_key in zip(self._buckets, band_keys):
+            entries = bucket[band_key]
+            if all(self.find(entry) != representative for entry in entries):
+                entries.append(key)
+        return representative
+
+
+def _key(article: Dict) -> Hashable:
+    return article.get("url") or article_text(article)
+
+
+def index_articles(index: NearDuplicateIndex, articles: Iterable[Dict]) -> int:
+    """Add already stored ``articles`` (oldest first) to ``index``."""
+    count = 0
+    for article in articles:
+        index.add(_key(article), article_text(article))
+        count += 1
+    return count
+
+
+def dedupe_articles(
+    articles: List[Dict], index: Optional[NearDuplicateIndex] = None
+) -> List[Dict]:
+    """
+    Collapse syndicated copies of the same story. Keeps the first article of
+    each cluster, annotated with ``source_count`` and the ``sources`` that
+    carried it. Pass a long-lived ``index`` to also cluster against articles
+    seen in earlier calls; only clusters with a member in ``articles`` are
+    returned, and those whose representative came from an earlier call get
+    its key in ``duplicate_of``.
+    """
+    if index is None:
+        index = NearDuplicateIndex()
+    clusters: Dict[Hashable, List[Dict]] = {}
+    for article in articles or []:
+        root = index.add(_key(article), article_text(article))
+        clusters.setdefault(root, []).append(article)
+    # 뒤에 들어온 기사가 두 클러스터를 합쳤을 수 있으므로 대표를 다시 찾는다
+    merged: Dict[Hashable, List[Dict]] = {}
+    for root, members in clusters.items():
+        merged.setdefault(index.find(root), []).extend(members)
+
+    deduped = []
+    for root, members in merged.items():
+        sources = list(
+            dict.fromkeys(m.get("source") for m in members if m.get("source"))
+        )
+        # 대표가 이번에 다시 왔으면 대표를, 이전 호출에서만 봤으면 첫 사본을 남긴다
+        representative = next((m for m in members if _key(m) == root), None)
+        deduped.append(
+            {
+                **(representative or members[0]),
+                "source_count": len(sources) or len(members),
+                "sources": sources,
+                "duplicate_of": None if representative else root,
+            }
+        )
+    if len(deduped) < len(articles or []):
+        logger.info(
+            "Collapsed %d articles into %d stories", len(articles), len(deduped)
+        )
+    return deduped
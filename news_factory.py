@@ -1,33 +1,82 @@
 import logging
 import os
-from typing import Dict, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 
 from newsapi import NewsApiClient
+from newsapi.newsapi_exception import NewsAPIException
 from serpapi import GoogleSearch
 
+from article_store import TS_FORMAT, ArticleStore, article_store, parse_published
+from news_dedup import NearDuplicateIndex, dedupe_articles, index_articles
+from news_watermarks import NewsWatermarks, news_watermarks
+from provider_health import ProviderHealth, QuotaExceededError, provider_health
+
 logger = logging.getLogger(__name__)
 
+# 할당량 소진을 뜻하는 NewsAPI 오류 코드
+NEWSAPI_QUOTA_CODES = ("rateLimited", "apiKeyExhausted")
+
+# fanout: 모든 공급자 동시 조회 후 병합, first: 가장 먼저 온 응답, failover: 순차
+NEWS_FETCH_MODE = os.getenv("NEWS_FETCH_MODE", "fanout")
+# 모든 공급자가 공유하는 마감 시간 (초)
+NEWS_FETCH_DEADLINE = float(os.getenv("NEWS_FETCH_DEADLINE", "20"))
+# 워터마크까지 내려가며 가져올 최대 페이지 수 (공급자별)
+NEWS_MAX_PAGES = int(os.getenv("NEWS_MAX_PAGES", "5"))
+# 이전 실행에서 저장한 기사 중 신디케이션 사본을 찾을 범위 (시간)
+NEWS_DEDUP_HOURS = float(os.getenv("NEWS_DEDUP_HOURS", "72"))
+# 중복 판정 인덱스를 저장소에서 다시 만드는 주기 (시간, 기간이 지난 기사를 비운다)
+NEWS_DEDUP_REBUILD_HOURS = float(os.getenv("NEWS_DEDUP_REBUILD_HOURS", "6"))
+
 
 class NewsAPIClient:
     """Client for NewsAPI using the official Python SDK."""
 
-    def __init__(self):
+    name = "newsapi"
+
+    def __init__(self, page_size: int = 100, max_pages: int = NEWS_MAX_PAGES):
         self.client = NewsApiClient(api_key=os.getenv("NEWS_API_KEY"))
-        self.quota_exceeded = False
+        self.page_size = page_size
+        self.max_pages = max_pages
 
-    def request_top_headlines(self, params: Dict) -> List[Dict]:
-        """Fetch top headlines from NewsAPI and standardize response."""
+    def request_top_headlines(
+        self, params: Dict, on_request: Optional[Callable[[], bool]] = None
+    ) -> List[Dict]:
+        """
+        Fetch articles published since ``params["from"]`` from NewsAPI, page
+        by page until the results run out, and standardize them.
+        ``on_request`` is called before every page and stops paging when it
+        returns False.
+        """
         from_date = params.pop("from", None)
         to_date = params.pop("to", None)
-        try:
-            response = self.client.get_everything(
-                q=params.get("q"),
-                from_param=from_date,
-                to=to_date,
-                language=params.get("language", "en"),
-                sort_by=params.get("sortBy", "popularity"),
-            )
-            return [
+        articles = []
+        for page in range(1, self.max_pages + 1):
+            if on_request is not None and not on_request():
+                break
+            try:
+                response = self.client.get_everything(
+                    q=params.get("q"),
+                    from_param=from_date,
+                    to=to_date,
+                    language=params.get("language", "en"),
+                    sort_by=params.get("sortBy", "publishedAt"),
+                    page=page,
+                    page_size=self.page_size,
+                )
+            except NewsAPIException as e:
+                if e.get_code() in NEWSAPI_QUOTA_CODES:
+                    raise QuotaExceededError(e.get_message()) from e
+                # 무료 플랜은 앞쪽 100건까지만 조회 가능
+                if articles and e.get_code() == "maximumResultsReached":
+                    break
+                raise
+            batch = response.get("articles", [])
+            articles += [
                 {
                     "title": article["title"],
                     "description": article["description"],
@@ -35,35 +84,60 @@ class NewsAPIClient:
                     "publishedAt": article["publishedAt"],
                     "source": article["source"]["name"],
                 }
-                for article in response.get("articles", [])
+                for article in batch
             ]
-        except Exception as e:
-            self.quota_exceeded = True
-            logger.error("NewsAPI error: %s", e)
-            return
+            if len(batch) < self.page_size or len(articles) >= response.get(
+                "totalResults", 0
+            ):
+                break
+        return articles
 
 
 class SerpAPIClient:
     """Client for SerpAPI using the official Python SDK."""
 
-    def __init__(self):
+    name = "serpapi"
+
+    def __init__(self, page_size: int = 10, max_pages: int = NEWS_MAX_PAGES):
         self.api_key = os.getenv("SERP_API_KEY")
-        self.quota_exceeded = False
+        self.page_size = page_size
+        self.max_pages = max_pages
 
-    def request_top_headlines(self, params: Dict) -> List[Dict]:
-        """Fetch top headlines from SerpAPI and standardize response."""
+    def request_top_headlines(
+        self, params: Dict, on_request: Optional[Callable[[], bool]] = None
+    ) -> List[Dict]:
+        """
+        Fetch news results from SerpAPI newest first, page by page until a
+        page reaches back to ``params["from"]``, and standardize them.
+        ``on_request`` is called before every page and stops paging when it
+        returns False.
+        """
+        fetched_at = datetime.now(timezone.utc)
+        since = parse_published(params.get("from"), fetched_at)
         search_params = {
             "engine": "google",
             "q": params.get("q"),
             "tbm": "nws",  # news search type for SerpAPI
             "serp_api_key": self.api_key,
             "hl": params.get("language", "en"),
-            "tbs": "qdr:w",
+            "tbs": "qdr:w,sbd:1",  # 최근 1주, 날짜순
+            "num": self.page_size,
         }
-        try:
-            search = GoogleSearch(search_params)
+        articles = []
+        for page in range(self.max_pages):
+            if on_request is not None and not on_request():
+                break
+            search = GoogleSearch({**search_params, "start": page * self.page_size})
             response = search.get_dict()
-            return [
+            error = response.get("error")
+            if error:
+                if "run out of searches" in error:
+                    raise QuotaExceededError(error)
+                # 마지막 페이지 다음은 결과 없음 오류로 온다
+                if articles and "hasn't returned any results" in error:
+                    break
+                raise RuntimeError(f"SerpAPI error: {error}")
+            batch = [
                 {
                     "title": result["title"],
                     "description": result.get("snippet"),
@@ -73,43 +147,281 @@ class SerpAPIClient:
                 }
                 for result in response.get("news_results", [])
             ]
-        except Exception as e:
-            self.quota_exceeded = True
-            logging.error("SerpAPI error: %s", e)
-            return
+            articles += batch
+            published = [parse_published(a["publishedAt"], fetched_at) for a in batch]
+            oldest = min((p for p in published if p), default=None)
+            if len(batch) < self.page_size or (since and oldest and oldest <= since):
+                break
+        return articles
+
+
+class ProviderStats:
+    """
+    Latency and failure history per provider, shared by every factory so it
+    survives ``fetch_and_save_news`` creating a new factory on each call.
+    Both are exponentially weighted, so a provider that recovers moves back
+    up the order.
+    """
+
+    def __init__(self, alpha: float = 0.3, failure_penalty: float = 30.0):
+        self.alpha = alpha
+        # 실패 1회를 몇 초의 지연으로 볼지
+        self.failure_penalty = failure_penalty
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def record(self, name: str, latency: float, ok: bool):
+        with self._lock:
+            stats = self._stats.setdefault(
+                name,
+                {"calls": 0, "failures": 0, "latency": latency, "failure_rate": 0.0},
+            )
+            stats["calls"] += 1
+            stats["failures"] += 0 if ok else 1
+            stats["latency"] += self.alpha * (latency - stats["latency"])
+            stats["failure_rate"] += self.alpha * (
+                (0 if ok else 1) - stats["failure_rate"]
+            )
+
+    def score(self, name: str) -> float:
+        """Expected cost in seconds; providers without history score 0."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                return 0.0
+            return stats["latency"] + stats["failure_rate"] * self.failure_penalty
+
+    def rank(self, clients: List) -> List:
+        # 안정 정렬이라 기록이 없으면 원래 순서 유지
+        return sorted(clients, key=lambda client: self.score(client.name))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+provider_stats = ProviderStats()
+
+# 마감을 넘긴 요청이 다음 호출을 막지 않도록 모듈 단위로 공유
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="news")
+
+
+_story_index: Optional[NearDuplicateIndex] = None
+_story_index_seeded_at = 0.0
+_story_index_lock = threading.Lock()
+
+
+def story_index(
+    store: Optional[ArticleStore] = None,
+    hours: float = NEWS_DEDUP_HOURS,
+    rebuild_every: float = NEWS_DEDUP_REBUILD_HOURS * 3600,
+    clock: Callable = time.time,
+) -> NearDuplicateIndex:
+    """
+    Process-wide near-duplicate index over the stories stored in the last
+    ``hours`` hours, so copies arriving in a later run are still recognized.
+    It is rebuilt from the store every ``rebuild_every`` seconds, which
+    drops stories that have aged out of the window and bounds its size.
+    """
+    global _story_index, _story_index_seeded_at
+    with _story_index_lock:
+        now = clock()
+        if _story_index is None or now - _story_index_seeded_at >= rebuild_every:
+            index = NearDuplicateIndex()
+            stored = (store or article_store).recent(
+                hours=hours, now=datetime.fromtimestamp(now, timezone.utc)
+            )
+            # 먼저 게시된 기사가 대표가 되도록 오래된 순으로 넣는다
+            count = index_articles(index, stored.iloc[::-1].to_dict("records"))
+            logger.info("Seeded the news dedup index with %d stored stories", count)
+            _story_index, _story_index_seeded_at = index, now
+        return _story_index
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime(TS_FORMAT)
+
+
+def merge_articles(results: List[List[Dict]]) -> List[Dict]:
+    """Concatenate provider results, keeping the first article per URL."""
+    merged = {}
+    for articles in results:
+        for article in articles or []:
+            merged.setdefault(article.get("url") or id(article), article)
+    return list(merged.values())
 
 
 class NewsApiFactory:
-    """Factory for creating the appropriate API client based on quota availability."""
+    """
+    Fetches headlines from the configured providers.
+
+    ``mode`` is one of:
+
+    - ``"fanout"``: query every available provider at once and merge what
+      arrives before ``deadline``, deduplicated by URL.
+    - ``"first"``: query every provider at once and return the first
+      non-empty response.
+    - ``"failover"``: query providers one at a time until one answers.
+
+    Providers are tried (and merged) in the order of ``ProviderStats``, so
+    slow or failing providers move down automatically. Providers that are
+    out of quota or whose circuit is open in ``ProviderHealth`` are skipped
+    without a request.
 
-    def __init__(self):
-        self.clients = [NewsAPIClient(), SerpAPIClient()]
-        self.current_client_index = 0
+    Each provider is asked only for articles newer than its own
+    ``NewsWatermarks`` entry for the query. The newest ``publishedAt`` of
+    every result that made it into the returned list is kept in
+    ``pending_watermarks``; the caller advances them with
+    ``commit_watermarks`` once the articles are stored, so a late or
+    unsaved response is fetched again next time.
+    """
 
-    def _switch_to_next_available_client(self):
-        """Switch to the next available client with quota remaining."""
-        for _ in range(len(self.clients)):
-            self.current_client_index = (self.current_client_index + 1) % len(
-                self.clients
+    def __init__(
+        self,
+        mode: str = NEWS_FETCH_MODE,
+        deadline: float = NEWS_FETCH_DEADLINE,
+        clients: Optional[List] = None,
+        stats: Optional[ProviderStats] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+        health: Optional[ProviderHealth] = None,
+        watermarks: Optional[NewsWatermarks] = None,
+        index: Optional[NearDuplicateIndex] = None,
+    ):
+        if mode not in ("fanout", "first", "failover"):
+            raise ValueError(f"Unknown news fetch mode: {mode}")
+        self.mode = mode
+        self.deadline = deadline
+        self.clients = (
+            clients if clients is not None else [NewsAPIClient(), SerpAPIClient()]
+        )
+        self.stats = stats or provider_stats
+        self.executor = executor or _executor
+        self.health = health or provider_health
+        self.watermarks = watermarks or news_watermarks
+        self.pending_watermarks: Dict[Tuple[str, str], str] = {}
+        # None 이면 프로세스 전체에서 공유하는 story_index() 를 쓴다
+        self.index = index
+
+    def available_clients(self) -> List:
+        clients = [c for c in self.clients if self.health.available(c.name)]
+        if not clients:
+            raise Exception(
+                "All API quotas are exhausted or providers are unhealthy. "
+                "Please try again later."
             )
-            if not self.clients[self.current_client_index].quota_exceeded:
-                return
-        raise Exception("All API quotas are exhausted. Please try again later.")
+        return self.stats.rank(clients)
+
+    def _call(self, client, params: Dict) -> Optional[Tuple[List[Dict], str]]:
+        """
+        The provider's new articles and their candidate watermark (empty if
+        none are dated), or None if the request failed.
+        """
+        query = params.get("q") or ""
+        since = self.watermarks.since(client.name, query)
+        start = time.monotonic()
+        try:
+            # 클라이언트가 params 를 수정하므로 각자 복사본을 쓴다
+            # 페이지마다 할당량에 세고, 한도에 닿으면 그 자리에서 멈춘다
+            response = client.request_top_headlines(
+                {"from": since.rstrip("Z"), **params},
+                on_request=lambda: self.health.record_request(client.name),
+            )
+        except QuotaExceededError as e:
+            self.health.record_failure(client.name, str(e), quota_exhausted=True)
+            response = None
+        except Exception as e:
+            logger.error("Error with %s: %s", client.name, e)
+            self.health.record_failure(client.name, str(e))
+            response = None
+        else:
+            self.health.record_success(client.name)
+            response = self._after_watermark(client.name, query, since, response or [])
+        self.stats.record(client.name, time.monotonic() - start, response is not None)
+        return response
+
+    def _after_watermark(
+        self, provider: str, query: str, since: str, articles: List[Dict]
+    ) -> Tuple[List[Dict], str]:
+        fetched_at = datetime.now(timezone.utc)
+        fresh = []
+        for article in articles:
+            article.setdefault("provider", provider)
+            published = parse_published(article.get("publishedAt"), fetched_at)
+            # 게시 시각을 알 수 없는 기사는 버리지 않는다
+            if published is None or published >= since:
+                fresh.append(article)
+        newest = max(
+            (parse_published(a.get("publishedAt"), fetched_at) or "" for a in fresh),
+            default="",
+        )
+        logger.info(
+            "%s returned %d new articles for %r since %s",
+            provider,
+            len(fresh),
+            query,
+            since,
+        )
+        return fresh, min(newest, _utc_now()) if newest else ""
 
     def request_top_headlines(self, params: Dict) -> List[Dict]:
         """
-        Fetch top headlines using the current client.
-        If quota is exceeded, switch to the next available client.
+        Fetch headlines according to ``mode``. Syndicated copies of the same
+        story are collapsed into one article with ``source_count``/``sources``;
+        copies of a story from an earlier fetch are marked ``duplicate_of``.
+        An empty list means the providers answered but had nothing new.
         """
-        for _ in range(len(self.clients)):
-            current_client = self.clients[self.current_client_index]
-            try:
-                response = current_client.request_top_headlines(params)
-                if response:
-                    return response
-            except Exception as e:
-                logging.error("Error with %s: %s", current_client.__class__.__name__, e)
-            # Switch to the next client if the current one fails
-            self._switch_to_next_available_client()
-
-        raise Exception("Unable to fetch news from any available clients.")
+        clients = self.available_clients()
+        if self.mode == "failover":
+            results = self._failover(clients, params)
+        else:
+            results = self._concurrent(clients, params)
+        if not results:
+            raise Exception("Unable to fetch news from any available clients.")
+
+        query = params.get("q") or ""
+        self.pending_watermarks = {
+            (name, query): watermark
+            for name, (_, watermark) in results.items()
+            if watermark
+        }
+        index = self.index if self.index is not None else story_index()
+        with _story_index_lock:
+            return dedupe_articles(
+                merge_articles([a for a, _ in results.values()]), index
+            )
+
+    def commit_watermarks(self):
+        """Advance the watermarks of the last fetch, once its articles are stored."""
+        for (provider, query), watermark in self.pending_watermarks.items():
+            self.watermarks.advance(provider, query, watermark)
+        self.pending_watermarks = {}
+
+    def _failover(self, clients: List, params: Dict) -> Dict[str, Tuple]:
+        results = {}
+        for client in clients:
+            response = self._call(client, params)
+            if response is None:
+                continue
+            results[client.name] = response
+            if response[0]:
+                break
+        return results
+
+    def _concurrent(self, clients: List, params: Dict) -> Dict[str, Tuple]:
+        futures = {self.executor.submit(self._call, c, params): c for c in clients}
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                response = future.result()
+                if response is None:
+                    continue
+                results[futures[future].name] = response
+                if response[0] and self.mode == "first":
+                    break
+        except FutureTimeoutError:
+            late = [c.name for f, c in futures.items() if not f.done()]
+            logger.warning(
+                "News providers missed the %ss deadline: %s", self.deadline, late
+            )
+        # 병합 우선순위는 공급자 순위를 따른다 (늦게 온 응답은 버리고 워터마크도 그대로)
+        return {c.name: results[c.name] for c in clients if c.name in results}
@@ -1,73 +1,63 @@
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
 import pandas as pd
 from dotenv import load_dotenv
 
+from article_store import article_store
 from news_factory import (
     NewsApiFactory,  # Assume we have implemented NewsApiFactory as provided
 )
+from news_scoring import (
+    format_headlines,
+    news_sentiment,
+    score_articles,
+    top_headlines,
+)
 
 # Load environment variables
 load_dotenv()
 
-# Define timestamp file path and current date
-timestamp_file = "timestamp.txt"
-today = datetime.now()
-today_str = today.isoformat(timespec="seconds")
-
-
-def get_last_timestamp():
-    """Retrieve the last timestamp from the file or set default to current time."""
-    if os.path.exists(timestamp_file):
-        with open(timestamp_file, "r") as f:
-            timestamp_str = f.read().strip()
-            last_date = datetime.fromisoformat(timestamp_str)
-            from_data = (last_date - timedelta(days=1)).isoformat(timespec="seconds")
-            return from_data
-    return today_str
-
-
-def save_timestamp():
-    """Save the current timestamp to the timestamp file."""
-    with open(timestamp_file, "w") as f:
-        f.write(today_str)
-
-
-def fetch_and_save_news():
+# 검색어 (공급자/검색어마다 워터마크를 따로 둔다)
+NEWS_QUERY = os.getenv("NEWS_QUERY", "bitcoin")
+# 프롬프트에 넣을 헤드라인 수
+NEWS_TOP_K = int(os.getenv("NEWS_TOP_K", "10"))
+# 프롬프트 헤드라인을 고를 기간 (시간)
+NEWS_WINDOW_HOURS = float(os.getenv("NEWS_WINDOW_HOURS", "48"))
+
+
+def fetch_and_save_news(top_k: int = NEWS_TOP_K, query: str = NEWS_QUERY):
+    """
+    Fetch the articles published since the last run (per provider
+    watermark), score them locally and upsert them into the article store.
+    Returns the ``top_k`` most Bitcoin-relevant stored headlines of the
+    last ``NEWS_WINDOW_HOURS`` with their sentiment/relevance scores and
+    the aggregate sentiment.
+    """
     factory = NewsApiFactory()
-    """Fetch news using the NewsApiFactory and save it to a CSV file."""
-    # Prepare parameters for API request
+    # 시작 시각은 공급자별 워터마크로 정하고, 끝 시각은 호출 시점 기준
     params = {
-        "q": "bitcoin",
-        "from": get_last_timestamp(),
-        "to": today_str,
-        "sortBy": "popularity",
+        "q": query,
+        "to": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "sortBy": "publishedAt",
         "language": "en",
     }
 
     # Fetch news using factory
     news_data = factory.request_top_headlines(params)
 
-    # Save articles to CSV
-    news_summary = "\n".join(
-        [f"{idx}. {article['title']}" for idx, article in enumerate(news_data)]
-    )
-    read_df = pd.DataFrame(news_data)
+    # 잡음 제거 후 점수 계산, 점수와 함께 저장 (백테스트용)
+    article_store.upsert(score_articles(pd.DataFrame(news_data)).to_dict("records"))
+    # 저장에 성공한 뒤에만 워터마크를 옮긴다
+    factory.commit_watermarks()
 
-    read_df.to_csv("articles.csv", index=False)
-    save_timestamp()
-    return news_summary
+    recent = article_store.recent(hours=NEWS_WINDOW_HOURS)
+    return format_headlines(top_headlines(recent, top_k), news_sentiment(recent))
 
 
 if __name__ == "__main__":
     # Load environment variables
     load_dotenv()
 
-    # Initialize the factory with API keys
-    newsapi_key = os.getenv("NEWS_API_KEY")
-    serpapi_key = os.getenv("SERP_API_KEY")
-    factory = NewsApiFactory(newsapi_key=newsapi_key, serpapi_key=serpapi_key)
-
     # Fetch and print news summary
-    print(fetch_and_save_news(factory))
+    print(fetch_and_save_news())
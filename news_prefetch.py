@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from scheduler import EventScheduler
+
+logger = logging.getLogger(__name__)
+
+# 추가 갱신 주기 (분, 0 이면 실행 시각 전에만 갱신). 갱신마다 모든 공급자를
+# 페이지 단위로 호출하므로 무료 할당량(SerpAPI 월 100회)을 고려해 정한다
+NEWS_PREFETCH_MINUTES = float(os.getenv("NEWS_PREFETCH_MINUTES", "0"))
+# 정해진 실행 시각보다 몇 분 먼저 갱신할지
+NEWS_PREFETCH_LEAD_MINUTES = float(os.getenv("NEWS_PREFETCH_LEAD_MINUTES", "5"))
+# 이보다 오래된 캐시는 쓰지 않고 동기적으로 다시 가져온다 (분, 정기 실행 간격 6시간)
+NEWS_CACHE_MAX_AGE_MINUTES = float(os.getenv("NEWS_CACHE_MAX_AGE_MINUTES", "360"))
+
+
+@dataclass(frozen=True)
+class CachedHeadlines:
+    """One prefetched headline block; ``version`` changes with its text."""
+
+    version: int
+    headlines: str
+    fetched_at: float
+
+    def age(self, now: float) -> float:
+        return now - self.fetched_at
+
+
+def minutes_before(at: str, minutes: float) -> str:
+    """The local ``HH:MM`` that is ``minutes`` before ``at``, wrapping midnight."""
+    hour, minute = (int(x) for x in at.split(":"))
+    total = (hour * 60 + minute - int(minutes)) % (24 * 60)
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+class NewsPrefetcher:
+    """
+    Keeps a warm headline cache so trading runs don't wait on the news
+    providers.
+
+    ``start`` refreshes the cache in the background ``lead_minutes`` before
+    each of the trading run times, and also every ``interval`` seconds if
+    one is set (off by default: every refresh pages through all providers
+    and counts against their quotas). ``headlines`` returns the cached block at once while it is younger than
+    ``max_age``; a stale or empty cache is refreshed synchronously, and if
+    that fails the stale block is served rather than nothing. Concurrent
+    refreshes are collapsed into one provider fetch.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], str],
+        interval: Optional[float] = NEWS_PREFETCH_MINUTES * 60 or None,
+        max_age: float = NEWS_CACHE_MAX_AGE_MINUTES * 60,
+        clock: Callable = time.time,
+    ):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_age = max_age
+        self.clock = clock
+        self._cache: Optional[CachedHeadlines] = None
+        self._refresh_lock = threading.Lock()
+        self._scheduler: Optional[EventScheduler] = None
+        self.metrics = {"refreshes": 0, "failures": 0, "hits": 0, "misses": 0}
+
+    def get(self, max_age: Optional[float] = None) -> Optional[CachedHeadlines]:
+        """The cached block if it is younger than ``max_age``, else None."""
+        cached = self._cache
+        max_age = self.max_age if max_age is None else max_age
+        if cached is None or cached.age(self.clock()) > max_age:
+            return None
+        return cached
+
+    def _refresh(self) -> CachedHeadlines:
+        start = time.monotonic()
+        try:
+            headlines = self.fetch()
+        except Exception:
+            self.metrics["failures"] += 1
+            raise
+        previous = self._cache
+        version = 1 if previous is None else previous.version
+        if previous is not None and headlines != previous.headlines:
+            version += 1
+        self._cache = CachedHeadlines(version, headlines, self.clock())
+        self.metrics["refreshes"] += 1
+        logger.info(
+            "News cache refreshed to v%d in %.2fs", version, time.monotonic() - start
+        )
+        return self._cache
+
+    def refresh(self) -> CachedHeadlines:
+        """Fetch now and replace the cache."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def headlines(self, max_age: Optional[float] = None) -> str:
+        cached = self.get(max_age)
+        if cached is None:
+            with self._refresh_lock:
+                # 기다리는 동안 다른 스레드가 갱신했을 수 있다
+                cached = self.get(max_age) or self._fallback()
+        else:
+            self.metrics["hits"] += 1
+        logger.info(
+            "Using news cache v%d (%.0fs old)",
+            cached.version,
+            cached.age(self.clock()),
+        )
+        return cached.headlines
+
+    def _fallback(self) -> CachedHeadlines:
+        self.metrics["misses"] += 1
+        logger.warning("News cache is stale, fetching synchronously")
+        try:
+            return self._refresh()
+        except Exception as e:
+            if self._cache is None:
+                raise
+            logger.error("News refresh failed, serving stale cache: %s", e)
+            return self._cache
+
+    def start(
+        self,
+        daily_at: Iterable[str] = (),
+        lead_minutes: float = NEWS_PREFETCH_LEAD_MINUTES,
+    ):
+        """Warm the cache now and keep refreshing it in the background."""
+        self._scheduler = EventScheduler(self.refresh, clock=self.clock, name="news")
+        if self.interval:
+            self._scheduler.every(minutes=self.interval / 60)
+        times = [minutes_before(at, lead_minutes) for at in daily_at]
+        if times:
+            self._scheduler.every_day_at(*times)
+        self._scheduler.trigger("warm-up")
+        self._scheduler.start()
+        return self
+
+    def stop(self):
+        if self._scheduler is not None:
+            self._scheduler.stop()
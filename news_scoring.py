@@ -0,0 +1,192 @@
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 비트코인 관련도 질의어 가중치
+RELEVANCE_TERMS = {
+    "bitcoin": 3.0,
+    "bitcoins": 3.0,
+    "btc": 3.0,
+    "halving": 2.0,
+    "satoshi": 1.5,
+    "crypto": 1.5,
+    "cryptocurrency": 1.5,
+    "cryptocurrencies": 1.5,
+    "etf": 1.0,
+    "etfs": 1.0,
+    "blockchain": 1.0,
+    "mining": 1.0,
+    "miners": 1.0,
+    "coinbase": 1.0,
+    "binance": 1.0,
+    "sec": 0.5,
+    "fed": 0.5,
+}
+
+# 시장 심리 사전 (단어 -> 가중치)
+_POSITIVE_WORDS = """
+surge surges surged soar soars soared rally rallies rallied jump jumps jumped
+gain gains climb climbs rebound rebounds recover recovers bull bullish record
+milestone breakout inflow inflows approve approves approved approval adoption
+adopt adopts rise rises rising high highs boost optimism optimistic upgrade
+accumulate accumulating
+"""
+_NEGATIVE_WORDS = """
+crash crashes crashed plunge plunges plunged drop drops dropped fall falls fell
+slump slumps tumble tumbles sink sinks decline declines bear bearish selloff
+outflow outflows liquidation liquidations loss losses low lows fear fears risk
+warning warns ban bans banned crackdown lawsuit sues sued
+"""
+# 사건/사고는 더 강한 부정 신호
+_INCIDENT_WORDS = """
+hack hacks hacked hacker exploit fraud scam scams manipulation arrest arrested
+bankrupt bankruptcy collapse collapses stolen theft
+"""
+SENTIMENT_LEXICON = {
+    **dict.fromkeys(_POSITIVE_WORDS.split(), 1.0),
+    **dict.fromkeys(_NEGATIVE_WORDS.split(), -1.0),
+    **dict.fromkeys(_INCIDENT_WORDS.split(), -1.5),
+}
+
+_TOKEN_PATTERN = r"[a-z0-9$]+"
+
+
+def clean_articles(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop ``[Removed]`` placeholders, rows without a title and repeated titles."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["title", "description"])
+    df = df.copy()
+    if "description" not in df.columns:
+        df["description"] = None
+    title = df["title"].fillna("").astype(str).str.strip()
+    junk = (title == "") | (title == "[Removed]")
+    if "url" in df.columns:
+        junk |= df["url"].fillna("").str.contains("removed.com", regex=False)
+    df = df[~junk]
+    return df.loc[~title[~junk].str.lower().duplicated()].reset_index(drop=True)
+
+
+def _term_counts(df: pd.DataFrame, title_weight: float):
+    """Weighted (document x term) count matrix over title and description."""
+    tokens = pd.concat(
+        [
+            df["title"].fillna("").astype(str).str.lower().str.findall(_TOKEN_PATTERN),
+            df["description"]
+            .fillna("")
+            .astype(str)
+            .str.lower()
+            .str.findall(_TOKEN_PATTERN),
+        ],
+        keys=[title_weight, 1.0],
+    ).explode()
+    tokens = tokens.dropna()
+    weights = tokens.index.get_level_values(0).to_numpy(dtype=float)
+    docs = tokens.index.get_level_values(1).to_numpy()
+    term_ids, vocab = pd.factorize(tokens.to_numpy())
+
+    counts = np.bincount(
+        docs * len(vocab) + term_ids,
+        weights=weights,
+        minlength=len(df) * len(vocab),
+    ).reshape(len(df), len(vocab))
+    return counts, pd.Index(vocab)
+
+
+def _vocab_weights(vocab: pd.Index, weights: Dict[str, float]) -> np.ndarray:
+    return vocab.map(lambda term: weights.get(term, 0.0)).to_numpy(dtype=float)
+
+
+def score_articles(df: pd.DataFrame, title_weight: float = 2.0) -> pd.DataFrame:
+    """
+    Add ``relevance`` (0..1) and ``sentiment`` (-1..1) columns.
+
+    Relevance is the cosine similarity between the article's TF-IDF vector
+    and the weighted ``RELEVANCE_TERMS`` query; sentiment is the balance of
+    ``SENTIMENT_LEXICON`` hits. Both use title and description tokens, the
+    title counted ``title_weight`` times. The whole batch is scored with a
+    few matrix operations, without any per-article Python loop.
+    """
+    df = clean_articles(df)
+    if df.empty:
+        return df.assign(relevance=[], sentiment=[])
+    counts, vocab = _term_counts(df, title_weight)
+
+    # TF-IDF (smooth idf) 후 문서별 L2 정규화
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(df)) / (1 + document_frequency)) + 1
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+    query = _vocab_weights(vocab, RELEVANCE_TERMS) * idf
+    query_norm = np.linalg.norm(query)
+    relevance = tfidf @ (query / query_norm) if query_norm else np.zeros(len(df))
+
+    lexicon = _vocab_weights(vocab, SENTIMENT_LEXICON)
+    positive = counts @ np.clip(lexicon, 0, None)
+    negative = counts @ np.clip(-lexicon, 0, None)
+    sentiment = (positive - negative) / (positive + negative + 1)
+
+    return df.assign(relevance=relevance, sentiment=sentiment)
+
+
+def top_headlines(
+    scored: pd.DataFrame, k: int = 10, min_relevance: float = 0.05
+) -> pd.DataFrame:
+    """The ``k`` most relevant articles above ``min_relevance``."""
+    relevant = scored[scored["relevance"] >= min_relevance]
+    return relevant.sort_values("relevance", ascending=False, kind="stable").head(k)
+
+
+def news_sentiment(
+    scored: pd.DataFrame, min_relevance: float = 0.05
+) -> Optional[float]:
+    """Relevance-weighted mean sentiment, usable as a numeric feature."""
+    relevant = scored[scored["relevance"] >= min_relevance]
+    if relevant.empty:
+        return None
+    return float(np.average(relevant["sentiment"], weights=relevant["relevance"]))
+
+
+def sentiment_series(
+    scored: pd.DataFrame,
+    freq: str = "D",
+    min_relevance: float = 0.05,
+    tz: str = "Asia/Seoul",
+) -> pd.Series:
+    """
+    ``news_sentiment`` per ``freq`` bucket of ``publishedAt``, converted to
+    ``tz`` and made naive like the pyupbit candle index, for joining onto
+    backtest frames (e.g. ``reindex(df.index, method="ffill")``).
+    """
+    relevant = scored[scored["relevance"] >= min_relevance]
+    published = pd.to_datetime(relevant["publishedAt"], utc=True, errors="coerce")
+    bucket = published.dt.tz_convert(tz).dt.tz_localize(None).dt.floor(freq)
+    weights = relevant["relevance"].groupby(bucket).sum()
+    weighted = (relevant["sentiment"] * relevant["relevance"]).groupby(bucket).sum()
+    return (weighted / weights).rename("news_sentiment")
+
+
+def sentiment_line(sentiment: float) -> str:
+    """The aggregate sentiment line heading the prompt's news section."""
+    return f"Aggregate news sentiment: {sentiment:+.2f} (-1 bearish, +1 bullish)"
+
+
+def format_headlines(top: pd.DataFrame, sentiment: Optional[float] = None) -> str:
+    """Numbered headline list with scores for the prompt."""
+    lines = []
+    if sentiment is not None:
+        lines.append(sentiment_line(sentiment))
+    for i, row in enumerate(top.itertuples(index=False), start=1):
+        scores = f"sentiment {row.sentiment:+.2f}, relevance {row.relevance:.2f}"
+        # news_dedup 으로 합쳐진 기사는 보도한 매체 수도 표시
+        # (CSV 에서 옮긴 기사 등 값이 없으면 1개로 본다)
+        source_count = getattr(row, "source_count", None)
+        if pd.notna(source_count) and source_count > 1:
+            scores += f", {int(source_count)} sources"
+        lines.append(f"{i}. [{scores}] {row.title}")
+    return "\n".join(lines)
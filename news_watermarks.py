@@ -0,0 +1,88 @@
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from article_store import TS_FORMAT
+
+logger = logging.getLogger(__name__)
+
+
+class NewsWatermarks:
+    """
+    Newest ``publishedAt`` seen per (provider, query), stored in SQLite so
+    each fetch only asks a provider for what it has not returned yet.
+    Without a watermark the fetch starts ``lookback_hours`` back. Values
+    are UTC ``TS_FORMAT`` strings and only ever move forward.
+    """
+
+    def __init__(
+        self,
+        path: str = "news.db",
+        lookback_hours: float = 24,
+        clock: Callable = time.time,
+    ):
+        self.path = path
+        self.lookback_hours = lookback_hours
+        self.clock = clock
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        if not self._initialized:
+            self._init_db(conn)
+            self._initialized = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, conn):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS news_watermarks
+                (provider TEXT NOT NULL,
+                query TEXT NOT NULL,
+                watermark TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (provider, query))
+                """)
+
+    def _now(self) -> datetime:
+        return datetime.fromtimestamp(self.clock(), timezone.utc)
+
+    def get(self, provider: str, query: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT watermark FROM news_watermarks WHERE provider = ? AND query = ?",
+                (provider, query),
+            ).fetchone()
+        return row[0] if row else None
+
+    def since(self, provider: str, query: str) -> str:
+        """Where the next fetch for (provider, query) should start."""
+        watermark = self.get(provider, query)
+        if watermark is not None:
+            return watermark
+        return (self._now() - timedelta(hours=self.lookback_hours)).strftime(TS_FORMAT)
+
+    def advance(self, provider: str, query: str, watermark: str):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO news_watermarks (provider, query, watermark, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(provider, query) DO UPDATE SET
+                    watermark = MAX(watermark, excluded.watermark),
+                    updated_at = excluded.updated_at
+                """,
+                (provider, query, watermark, self._now().strftime(TS_FORMAT)),
+            )
+        logger.debug("News watermark %s/%s -> %s", provider, query, watermark)
+
+
+news_watermarks = NewsWatermarks()
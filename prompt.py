@@ -1,8 +1,22 @@
 import json
+import logging
+import os
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from indicators import OHLCV_COLUMNS
+from news_scoring import news_sentiment, sentiment_line
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
 a: datetime = datetime.now()
 
 b: pd.DataFrame
@@ -40,35 +54,275 @@ Your percentage should reflect the strength of your conviction in the decision b
 """
 
 
-def get_user_prompt(
-    df_daily: pd.DataFrame,
-    df_hourly: pd.DataFrame,
-    filtered_balances,
-    orderbook,
-    news_headlines,
-    fear_greed_index,
-):
+# 열 종류별 유효숫자 / 소수 자릿수
+PRICE_SIGNIFICANT_DIGITS = 6
+VOLUME_SIGNIFICANT_DIGITS = 4
+COLUMN_DECIMALS = {"rsi": 1, "stoch_k": 1, "stoch_d": 1}
+VOLUME_COLUMNS = ("volume", "value", "obv")
+
+# 지표 계산 초기 구간을 판단할 때 제외할 열 (워밍업 중에도 값이 있음)
+_ALWAYS_DEFINED = set(OHLCV_COLUMNS) | {"value", "atr", "obv"}
+
+DEFAULT_ORDERBOOK_LEVELS = 5
+
+
+# tiktoken 인코더 (처음 쓸 때 한 번만 불러오고, 실패하면 None 으로 남긴다)
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except (OSError, ValueError) as e:
+                # 인코딩 파일을 내려받지 못한 경우 등
+                logger.warning(
+                    "tiktoken encoding unavailable, estimating ~4 chars/token: %s", e
+                )
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of ``text``; uses tiktoken when installed, else ~4 chars/token."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        # 뉴스 본문 등에 특수 토큰 문자열이 있어도 일반 텍스트로 센다
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // 4)
+
+
+def _decimals(column: str, values: pd.Series) -> int:
+    if column in COLUMN_DECIMALS:
+        return COLUMN_DECIMALS[column]
+    digits = (
+        VOLUME_SIGNIFICANT_DIGITS
+        if column in VOLUME_COLUMNS
+        else PRICE_SIGNIFICANT_DIGITS
+    )
+    largest = values.abs().max()
+    if not largest or not np.isfinite(largest):
+        return 0
+    return max(0, digits - 1 - int(np.floor(np.log10(largest))))
+
+
+def trim_warmup(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop leading rows where every windowed indicator is still NaN."""
+    indicators = [c for c in df.columns if c not in _ALWAYS_DEFINED]
+    if not indicators:
+        return df
+    ready = df[indicators].notna().any(axis=1).to_numpy()
+    if not ready.any():
+        return df
+    return df.iloc[int(ready.argmax()) :]
+
+
+def encode_frame(
+    df: pd.DataFrame, max_rows: Optional[int] = None, decimals: Optional[Dict] = None
+) -> str:
+    """
+    Columnar CSV of an indicator frame: warm-up rows and all-NaN columns
+    dropped, every column rounded to its own precision, NaN left empty.
+    ``max_rows`` keeps only the most recent rows.
+    """
+    if df is None or df.empty or max_rows == 0:
+        return ""
+    df = trim_warmup(df).dropna(axis=1, how="all")
+    if max_rows is not None:
+        df = df.iloc[-max_rows:]
+
+    out = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        values = pd.to_numeric(df[column], errors="coerce")
+        places = (decimals or {}).get(column, _decimals(column, values))
+        values = values.round(places)
+        out[column] = values.astype("Int64") if places == 0 else values
+
+    index = out.index
+    if isinstance(index, pd.DatetimeIndex):
+        daily = (index == index.normalize()).all()
+        out.index = index.strftime("%Y-%m-%d" if daily else "%Y-%m-%d %H:%M")
+    return out.to_csv(index_label="t", lineterminator="\n").strip()
+
+
+def summarize_orderbook(orderbook, levels: int = DEFAULT_ORDERBOOK_LEVELS) -> str:
+    """Best bid/ask, spread, depth imbalance and the top ``levels`` price levels."""
+    if not orderbook:
+        return json.dumps(orderbook)
+    units = orderbook.get("orderbook_units") or []
+    if not units:
+        return json.dumps(orderbook)
+
+    best_ask, best_bid = units[0]["ask_price"], units[0]["bid_price"]
+    ask_size = float(orderbook.get("total_ask_size") or 0)
+    bid_size = float(orderbook.get("total_bid_size") or 0)
+    depth = ask_size + bid_size
+    lines = [
+        f"best_bid={best_bid:.10g} best_ask={best_ask:.10g} "
+        f"spread={best_ask - best_bid:g} "
+        f"spread_bps={(best_ask - best_bid) / best_ask * 1e4:.2f}",
+        f"total_bid_size={bid_size:.4g} total_ask_size={ask_size:.4g} "
+        f"imbalance={(bid_size - ask_size) / depth if depth else 0:+.3f}",
+    ]
+    if levels > 0:
+        lines.append("bid_price,bid_size,ask_price,ask_size")
+        for unit in units[:levels]:
+            lines.append(
+                f"{unit['bid_price']:.10g},{unit['bid_size']:.4g},"
+                f"{unit['ask_price']:.10g},{unit['ask_size']:.4g}"
+            )
+    return "\n".join(lines)
+
+
+def _render(sections: Dict[str, str]) -> str:
     return f"""
 Current investment status: 
-{json.dumps(filtered_balances)}
+{sections["balances"]}
 
 Orderbook: 
-{json.dumps(orderbook)}
+{sections["orderbook"]}
 
-Daily OHLCV with indicators (30 days): 
-{df_daily.to_json()}
+Daily OHLCV with indicators (CSV, oldest first): 
+{sections["daily"]}
 
-Hourly OHLCV with indicators (24 hours): 
-{df_hourly.to_json()}
+Hourly OHLCV with indicators (CSV, oldest first): 
+{sections["hourly"]}
 
 Recent news headlines: 
-{json.dumps(news_headlines)}
+{sections["news"]}
 
 Fear and Greed Index: 
-{json.dumps(fear_greed_index)}
+{sections["fear_greed"]}
 """
 
 
+def build_user_prompt(
+    df_daily: pd.DataFrame,
+    df_hourly: pd.DataFrame,
+    filtered_balances,
+    orderbook,
+    news_headlines,
+    fear_greed_index,
+    token_budget: Optional[int] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Compact user prompt plus the estimated token count of each section.
+
+    When the prompt exceeds ``token_budget`` the largest shrinkable section
+    is cut first: the oldest candles of the daily/hourly tables, then the
+    orderbook levels. Balances, news and the fear and greed index are kept.
+    """
+    limits = {
+        "daily": None if df_daily is None else len(df_daily),
+        "hourly": None if df_hourly is None else len(df_hourly),
+        "orderbook": DEFAULT_ORDERBOOK_LEVELS,
+    }
+    fixed = {
+        "balances": json.dumps(filtered_balances),
+        "news": json.dumps(news_headlines),
+        "fear_greed": json.dumps(fear_greed_index),
+    }
+
+    while True:
+        sections = {
+            **fixed,
+            "orderbook": summarize_orderbook(orderbook, limits["orderbook"]),
+            "daily": encode_frame(df_daily, limits["daily"]),
+            "hourly": encode_frame(df_hourly, limits["hourly"]),
+        }
+        text = _render(sections)
+        tokens = {name: estimate_tokens(value) for name, value in sections.items()}
+        tokens["total"] = estimate_tokens(text)
+        if token_budget is None or tokens["total"] <= token_budget:
+            break
+
+        # 줄일 수 있는 구간 중 가장 큰 것부터 약 20%씩 줄인다
+        shrinkable = [name for name in ("daily", "hourly", "orderbook") if limits[name]]
+        if not shrinkable:
+            logger.warning(
+                "Prompt needs %d tokens, over the budget of %d",
+                tokens["total"],
+                token_budget,
+            )
+            break
+        largest = max(shrinkable, key=lambda name: tokens[name])
+        if largest == "orderbook":
+            limits[largest] -= 1
+        else:
+            rows = len(trim_warmup(df_daily if largest == "daily" else df_hourly))
+            limits[largest] = min(limits[largest], rows)
+            limits[largest] -= max(1, limits[largest] // 5)
+
+    return text, tokens
+
+
+# 코인 이름과 함께 검색할 시장 이슈 키워드
+NEWS_SEARCH_TERMS = os.getenv(
+    "NEWS_SEARCH_TERMS", "etf sec halving fed regulation hack liquidation whale"
+).split()
+COIN_NAMES = {
+    "BTC": ["bitcoin", "btc"],
+    "ETH": ["ethereum", "eth"],
+    "XRP": ["xrp", "ripple"],
+}
+
+
+def retrieve_headlines(
+    store, market: str, k: int = 10, hours: float = 48, terms=None
+) -> Optional[str]:
+    """
+    Top-``k`` headlines of the last ``hours`` hours from an ``ArticleStore``,
+    ranked by BM25 over the coin's names and ``NEWS_SEARCH_TERMS`` and
+    headed by the aggregate sentiment of the window, like the fetched
+    block. None when nothing matches, so the caller can fall back to
+    fetched headlines.
+    """
+    coin = market.split("-")[-1]
+    terms = terms or [*COIN_NAMES.get(coin, [coin.lower()]), *NEWS_SEARCH_TERMS]
+    hits = store.search(terms, hours=hours, limit=k)
+    if hits.empty:
+        return None
+
+    lines = []
+    sentiment = news_sentiment(store.recent(hours=hours))
+    if sentiment is not None:
+        lines.append(sentiment_line(sentiment))
+    for i, row in enumerate(hits.itertuples(index=False), start=1):
+        meta = [
+            row.publishedAt[:16].replace("T", " ")
+            if pd.notna(row.publishedAt)
+            else None,
+            row.source if pd.notna(row.source) else None,
+            f"sentiment {row.sentiment:+.2f}" if pd.notna(row.sentiment) else None,
+        ]
+        lines.append(f"{i}. [{', '.join(m for m in meta if m)}] {row.title}")
+    return "\n".join(lines)
+
+
+def get_user_prompt(
+    df_daily: pd.DataFrame,
+    df_hourly: pd.DataFrame,
+    filtered_balances,
+    orderbook,
+    news_headlines,
+    fear_greed_index,
+    token_budget: Optional[int] = None,
+):
+    text, _ = build_user_prompt(
+        df_daily,
+        df_hourly,
+        filtered_balances,
+        orderbook,
+        news_headlines,
+        fear_greed_index,
+        token_budget,
+    )
+    return text
+
+
 example = """
 example response 1
 {
@@ -0,0 +1,257 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """Raised by a news client when the provider reports its quota is used up."""
+
+
+@dataclass
+class QuotaLimits:
+    """Requests allowed per UTC day / calendar month (None = unlimited)."""
+
+    daily: Optional[int] = None
+    monthly: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, provider: str, default: "QuotaLimits") -> "QuotaLimits":
+        """Override defaults from e.g. ``NEWSAPI_DAILY_LIMIT=500``."""
+        values = {}
+        for period in ("daily", "monthly"):
+            raw = os.getenv(f"{provider.upper()}_{period.upper()}_LIMIT")
+            values[period] = int(raw) if raw else getattr(default, period)
+        return cls(**values)
+
+
+# 무료 플랜 기준: NewsAPI 하루 100회, SerpAPI 한 달 100회
+DEFAULT_LIMITS = {
+    "newsapi": QuotaLimits(daily=100),
+    "serpapi": QuotaLimits(monthly=100),
+}
+
+
+def _period_keys(now: float):
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    return moment.strftime("%Y-%m-%d"), moment.strftime("%Y-%m")
+
+
+def next_reset(now: float, period: str) -> float:
+    """Start of the next UTC day or month after ``now``."""
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "daily":
+        return (start + timedelta(days=1)).timestamp()
+    start = start.replace(day=1)
+    return (start + timedelta(days=32)).replace(day=1).timestamp()
+
+
+class ProviderHealth:
+    """
+    Persistent quota counters and circuit breaker per news provider.
+
+    Every HTTP request, including each page of a paged fetch, is counted
+    with ``record_request`` per UTC day and calendar month. A provider that
+    reached a limit, or reported its quota as exhausted, is skipped until
+    the next reset. ``failure_threshold`` consecutive errors open the
+    circuit for ``cooldown`` seconds; after that a single call is let
+    through (half-open) and either closes the circuit or reopens it with
+    twice the cooldown, up to ``max_cooldown``.
+
+    State lives in SQLite so it carries over between runs and factories.
+    """
+
+    def __init__(
+        self,
+        path: str = "news.db",
+        limits: Optional[Dict[str, QuotaLimits]] = None,
+        failure_threshold: int = 3,
+        cooldown: float = 300,
+        max_cooldown: float = 3600,
+        clock: Callable = time.time,
+    ):
+        self.path = path
+        self.limits = limits
+        if limits is None:
+            self.limits = {
+                name: QuotaLimits.from_env(name, default)
+                for name, default in DEFAULT_LIMITS.items()
+            }
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            self._init_db(conn)
+            self._initialized = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, conn):
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS provider_health
+                (provider TEXT PRIMARY KEY,
+                day TEXT,
+                day_count INTEGER NOT NULL DEFAULT 0,
+                month TEXT,
+                month_count INTEGER NOT NULL DEFAULT 0,
+                exhausted_until REAL NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                open_until REAL,
+                cooldown REAL,
+                last_error TEXT,
+                updated_at REAL)
+                """)
+
+    def _load(self, conn, provider: str, now: float) -> Dict:
+        row = conn.execute(
+            "SELECT * FROM provider_health WHERE provider = ?", (provider,)
+        ).fetchone()
+        state = dict(row) if row else {"provider": provider}
+        state.setdefault("exhausted_until", 0)
+        state.setdefault("failures", 0)
+        state.setdefault("open_until", None)
+        state.setdefault("cooldown", None)
+        state.setdefault("last_error", None)
+        # 기간이 바뀌면 카운터 초기화
+        day, month = _period_keys(now)
+        if state.get("day") != day:
+            state["day"], state["day_count"] = day, 0
+        if state.get("month") != month:
+            state["month"], state["month_count"] = month, 0
+        return state
+
+    def _save(self, conn, state: Dict, now: float):
+        state["updated_at"] = now
+        columns = ", ".join(state)
+        placeholders = ", ".join("?" for _ in state)
+        conn.execute(
+            f"INSERT OR REPLACE INTO provider_health ({columns}) VALUES ({placeholders})",
+            list(state.values()),
+        )
+
+    def _quota_reason(self, state: Dict, now: float) -> Optional[str]:
+        if state["exhausted_until"] > now:
+            return "quota exhausted"
+        limits = self.limits.get(state["provider"]) or QuotaLimits()
+        if limits.daily is not None and state["day_count"] >= limits.daily:
+            return "daily limit reached"
+        if limits.monthly is not None and state["month_count"] >= limits.monthly:
+            return "monthly limit reached"
+        return None
+
+    def _blocked_reason(self, state: Dict, now: float) -> Optional[str]:
+        reason = self._quota_reason(state, now)
+        if reason:
+            return reason
+        if state["open_until"] is not None and state["open_until"] > now:
+            return "circuit open"
+        return None
+
+    def available(self, provider: str) -> bool:
+        """Whether ``provider`` may be called now (read-only)."""
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            reason = self._blocked_reason(self._load(conn, provider, now), now)
+        if reason:
+            logger.info("Skipping news provider %s: %s", provider, reason)
+        return reason is None
+
+    def record_request(self, provider: str) -> bool:
+        """
+        Count one request against ``provider``'s quota. Returns False, without
+        counting, once a limit is reached so a paged fetch stops there.
+        """
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            state = self._load(conn, provider, now)
+            reason = self._quota_reason(state, now)
+            if reason is None:
+                state["day_count"] += 1
+                state["month_count"] += 1
+                self._save(conn, state, now)
+        if reason:
+            logger.warning("Not calling news provider %s: %s", provider, reason)
+        return reason is None
+
+    def record_success(self, provider: str):
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            state = self._load(conn, provider, now)
+            state["failures"] = 0
+            state["open_until"] = None
+            state["cooldown"] = None
+            self._save(conn, state, now)
+
+    def record_failure(
+        self, provider: str, error: str = "", quota_exhausted: bool = False
+    ):
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            state = self._load(conn, provider, now)
+            state["last_error"] = error[:500]
+            if quota_exhausted:
+                state["exhausted_until"] = self._quota_reset(provider, now)
+                logger.warning(
+                    "News provider %s quota exhausted until %s",
+                    provider,
+                    datetime.fromtimestamp(state["exhausted_until"]).isoformat(),
+                )
+            else:
+                # half-open 상태(쿨다운이 끝난 뒤의 시험 호출)에서 실패하면 바로 다시 연다
+                half_open = state["open_until"] is not None
+                state["failures"] += 1
+                if half_open or state["failures"] >= self.failure_threshold:
+                    cooldown = state["cooldown"] or self.cooldown
+                    state["open_until"] = now + cooldown
+                    state["cooldown"] = min(cooldown * 2, self.max_cooldown)
+                    logger.warning(
+                        "News provider %s circuit opened for %.0fs", provider, cooldown
+                    )
+            self._save(conn, state, now)
+
+    def _quota_reset(self, provider: str, now: float) -> float:
+        limits = self.limits.get(provider) or QuotaLimits()
+        if limits.daily is not None:
+            return next_reset(now, "daily")
+        if limits.monthly is not None:
+            return next_reset(now, "monthly")
+        return now + self.max_cooldown
+
+    def status(self, provider: str) -> Dict:
+        """Current counters plus the state (closed, open, half_open, exhausted)."""
+        now = self.clock()
+        with self._lock, self._connect() as conn:
+            state = self._load(conn, provider, now)
+        reason = self._blocked_reason(state, now)
+        if reason == "circuit open":
+            state["state"] = "open"
+        elif reason:
+            state["state"] = "exhausted"
+        elif state["open_until"] is not None:
+            state["state"] = "half_open"
+        else:
+            state["state"] = "closed"
+        return state
+
+
+provider_health = ProviderHealth()
@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import OHLCV_COLUMNS, IndicatorPipeline
+
+logger = logging.getLogger(__name__)
+
+# 판단에 쓰는 값 (OHLCV 에서 다시 계산하므로 add_indicators 출력 구성과 무관)
+REGIME_PIPELINE = IndicatorPipeline(["bb_width", "adx", "atr", "volume_ratio"])
+
+
+@dataclass
+class RegimeThresholds:
+    """
+    A market is ranging when every metric is below its limit: Bollinger
+    bandwidth ``(upper - lower) / middle``, ADX, ATR as a fraction of the
+    close, and volume relative to its 20-candle mean. ``trend_adx`` only
+    labels the non-ranging case.
+    """
+
+    max_bandwidth: float = 0.08
+    max_adx: float = 20.0
+    max_atr_pct: float = 0.03
+    max_volume_ratio: float = 1.2
+    trend_adx: float = 25.0
+
+    @classmethod
+    def from_env(cls, prefix: str = "REGIME_") -> "RegimeThresholds":
+        """Override defaults from e.g. ``REGIME_MAX_ADX=18``."""
+        values = {}
+        for f in fields(cls):
+            raw = os.getenv(prefix + f.name.upper())
+            if raw:
+                values[f.name] = float(raw)
+        return cls(**values)
+
+
+@dataclass
+class Regime:
+    label: str
+    metrics: Dict[str, float] = field(default_factory=dict)
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def ranging(self) -> bool:
+        return self.label == "ranging"
+
+    def describe(self) -> str:
+        metrics = ", ".join(f"{k}={v:.4g}" for k, v in self.metrics.items())
+        return f"{self.label} ({metrics})"
+
+
+class RegimeFilter:
+    """
+    Classifies the latest candle of an OHLCV frame as ranging, trending,
+    neutral or unknown (not enough history), so ``ai_trading`` can hold
+    without calling the LLM when the market is clearly range-bound.
+
+    With ``completed_only`` the last row is treated as the candle still in
+    progress and ignored, since its partial volume would look like a quiet
+    market.
+    """
+
+    def __init__(
+        self,
+        thresholds: Optional[RegimeThresholds] = None,
+        enabled: bool = True,
+        completed_only: bool = True,
+    ):
+        self.thresholds = thresholds or RegimeThresholds()
+        self.enabled = enabled
+        self.completed_only = completed_only
+        self._lock = threading.Lock()
+        self.stats = {"checked": 0, "skipped": 0}
+
+    def classify(self, df: pd.DataFrame) -> Regime:
+        if self.completed_only:
+            df = df.iloc[:-1]
+        if df.empty:
+            return Regime("unknown")
+        data = {name: df[name].to_numpy(dtype=float) for name in OHLCV_COLUMNS}
+        values = REGIME_PIPELINE.compute(data)
+        close = df["close"].iloc[-1]
+        metrics = {
+            "bandwidth": float(values["bb_width"][-1, 0]),
+            "adx": float(values["adx"][-1, 0]),
+            "atr_pct": float(values["atr"][-1, 0] / close) if close else np.nan,
+            "volume_ratio": float(values["volume_ratio"][-1, 0]),
+        }
+        if any(np.isnan(v) for v in metrics.values()):
+            return Regime("unknown", metrics)
+
+        t = self.thresholds
+        limits = {
+            "bandwidth": t.max_bandwidth,
+            "adx": t.max_adx,
+            "atr_pct": t.max_atr_pct,
+            "volume_ratio": t.max_volume_ratio,
+        }
+        reasons = [f"{name} {metrics[name]:.4g} < {limits[name]}" for name in limits]
+        if all(metrics[name] < limit for name, limit in limits.items()):
+            return Regime("ranging", metrics, reasons)
+        if metrics["adx"] >= t.trend_adx:
+            return Regime("trending", metrics)
+        return Regime("neutral", metrics)
+
+    def should_skip(self, df: pd.DataFrame) -> Optional[Regime]:
+        """The ranging ``Regime`` if the LLM call can be skipped, else None."""
+        if not self.enabled or df is None or df.empty:
+            return None
+        regime = self.classify(df)
+        with self._lock:
+            self.stats["checked"] += 1
+            if regime.ranging:
+                self.stats["skipped"] += 1
+        logger.info("Market regime: %s", regime.describe())
+        return regime if regime.ranging else None
@@ -0,0 +1,236 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventScheduler:
+    """
+    Runs ``job`` at scheduled deadlines and on demand.
+
+    The loop sleeps until the nearest deadline instead of polling, and wakes
+    early when ``trigger`` is called (e.g. from a market event). Runs never
+    overlap: while a run is in progress at most one follow-up run is queued
+    and any further requests are counted as skipped.
+    """
+
+    def __init__(
+        self, job: Callable, clock: Callable = time.time, name: str = "trading"
+    ):
+        self.job = job
+        self.clock = clock
+        self.name = name
+        self._deadlines = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pending: Optional[str] = None
+        self._pending_since: Optional[float] = None
+        self._running = False
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.metrics = {
+            "runs": 0,
+            "failures": 0,
+            "skipped": 0,
+            "triggered": 0,
+            "last_reason": None,
+            "last_latency": None,
+            "max_latency": 0.0,
+            "last_queue_delay": None,
+            "max_queue_delay": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # 일정 등록
+    # ------------------------------------------------------------------
+
+    def _push(self, when: float, reschedule: Callable[[float], float], label: str):
+        heapq.heappush(self._deadlines, (when, next(self._seq), reschedule, label))
+
+    def every_day_at(self, *times: str):
+        """Run daily at each local ``HH:MM``."""
+        for at in times:
+            hour, minute = (int(x) for x in at.split(":"))
+
+            def next_run(after: float, hour=hour, minute=minute) -> float:
+                now = datetime.fromtimestamp(after)
+                run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if run <= now:
+                    run += timedelta(days=1)
+                return run.timestamp()
+
+            with self._cond:
+                self._push(next_run(self.clock()), next_run, f"daily {at}")
+                self._cond.notify()
+        return self
+
+    def every(self, minutes: float):
+        """Run every ``minutes`` minutes (sub-hourly cadences included)."""
+        interval = minutes * 60
+
+        def next_run(after: float) -> float:
+            return after + interval
+
+        with self._cond:
+            self._push(next_run(self.clock()), next_run, f"every {minutes}m")
+            self._cond.notify()
+        return self
+
+    def trigger(self, reason: str = "manual"):
+        """Request an extra run as soon as possible."""
+        with self._cond:
+            self.metrics["triggered"] += 1
+            self._request(reason)
+            self._cond.notify()
+
+    def _request(self, reason: str):
+        if self._pending is not None:
+            self.metrics["skipped"] += 1
+            logger.warning("Run already queued, skipping %s", reason)
+            return
+        self._pending = reason
+        self._pending_since = self.clock()
+
+    def next_deadline(self) -> Optional[float]:
+        with self._cond:
+            return self._deadlines[0][0] if self._deadlines else None
+
+    # ------------------------------------------------------------------
+    # 실행 루프
+    # ------------------------------------------------------------------
+
+    def _wait_for_work(self) -> Optional[str]:
+        with self._cond:
+            while not self._stopped:
+                now = self.clock()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    when, _, reschedule, label = heapq.heappop(self._deadlines)
+                    self._push(reschedule(max(when, now)), reschedule, label)
+                    self._request(label)
+                    # 마감 시각 기준으로 대기 시간을 잰다
+                    self._pending_since = min(self._pending_since, when)
+                if self._pending is not None:
+                    reason = self._pending
+                    delay = now - self._pending_since
+                    self.metrics["last_queue_delay"] = delay
+                    self.metrics["max_queue_delay"] = max(
+                        self.metrics["max_queue_delay"], delay
+                    )
+                    self._pending = self._pending_since = None
+                    self._running = True
+                    return reason
+                timeout = None
+                if self._deadlines:
+                    timeout = max(self._deadlines[0][0] - now, 0)
+                self._cond.wait(timeout)
+        return None
+
+    def _execute(self, reason: str):
+        start = time.monotonic()
+        try:
+            logger.info("Starting %s run (%s)", self.name, reason)
+            self.job()
+        except Exception as e:
+            self.metrics["failures"] += 1
+            logger.error(f"An error occurred: {e}")
+        finally:
+            latency = time.monotonic() - start
+            with self._cond:
+                self._running = False
+                self.metrics["runs"] += 1
+                self.metrics["last_reason"] = reason
+                self.metrics["last_latency"] = latency
+                self.metrics["max_latency"] = max(self.metrics["max_latency"], latency)
+            logger.info("%s scheduler metrics: %s", self.name, self.metrics)
+
+    def run_forever(self):
+        while True:
+            reason = self._wait_for_work()
+            if reason is None:
+                return
+            self._execute(reason)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.run_forever, name=f"{self.name}-scheduler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+class PriceMoveTrigger:
+    """
+    ``MarketFeed`` listener that requests an extra run when the price moves
+    more than ``threshold`` (fraction) or ``atr_multiple`` x ATR away from the
+    price seen at the previous trigger.
+    """
+
+    def __init__(
+        self,
+        scheduler: EventScheduler,
+        market: str = "KRW-BTC",
+        threshold: float = 0.03,
+        atr_multiple: Optional[float] = None,
+        atr: Optional[Callable[[], float]] = None,
+        cooldown: float = 15 * 60,
+        atr_ttl: float = 5 * 60,
+    ):
+        self.scheduler = scheduler
+        self.market = market
+        self.threshold = threshold
+        self.atr_multiple = atr_multiple
+        self.atr = atr
+        self.cooldown = cooldown
+        self.atr_ttl = atr_ttl
+        self._atr_cache = (float("-inf"), None)
+        self.reference: Optional[float] = None
+        self._last_fired = float("-inf")
+
+    def _current_atr(self) -> Optional[float]:
+        # 틱마다 ATR 을 다시 계산하지 않도록 잠시 캐시
+        fetched_at, value = self._atr_cache
+        if time.monotonic() - fetched_at > self.atr_ttl:
+            try:
+                value = self.atr()
+            except Exception as e:
+                # 실패도 atr_ttl 동안 캐시해 틱마다 다시 조회하지 않는다
+                logger.warning("ATR lookup failed for %s: %s", self.market, e)
+                value = None
+            self._atr_cache = (time.monotonic(), value)
+        return value
+
+    def __call__(self, message: Dict):
+        if message.get("type") != "ticker" or message.get("code") != self.market:
+            return
+        price = message["trade_price"]
+        if self.reference is None:
+            self.reference = price
+            return
+
+        move = abs(price - self.reference)
+        reason = None
+        if self.threshold and move >= self.threshold * self.reference:
+            reason = f"price move {move / self.reference:.2%}"
+        elif self.atr_multiple and self.atr is not None:
+            atr = self._current_atr()
+            if atr and move >= self.atr_multiple * atr:
+                reason = f"price move {move / atr:.1f} ATR"
+
+        now = time.monotonic()
+        if reason and now - self._last_fired >= self.cooldown:
+            self._last_fired = now
+            self.reference = price
+            logger.info("Market event on %s: %s", self.market, reason)
+            self.scheduler.trigger(reason)
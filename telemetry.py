@@ -0,0 +1,178 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from sqlite3.dbapi2 import Connection
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력). reasoning 토큰은 출력으로 과금된다
+MODEL_PRICES = {
+    "o1-preview": (15.0, 60.0),
+    "o1-mini": (3.0, 12.0),
+    "o1": (15.0, 60.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+# build_user_prompt 구간 -> 기록할 컬럼
+SECTION_COLUMNS = {
+    "ohlcv_tokens": ("daily", "hourly"),
+    "news_tokens": ("news",),
+    "orderbook_tokens": ("orderbook",),
+}
+
+
+def init_telemetry(conn: Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_calls
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        market TEXT,
+        purpose TEXT,
+        model TEXT,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        reasoning_tokens INTEGER,
+        latency REAL,
+        retries INTEGER,
+        cache_hit INTEGER,
+        hedged INTEGER,
+        cost_usd REAL,
+        ohlcv_tokens INTEGER,
+        news_tokens INTEGER,
+        orderbook_tokens INTEGER,
+        sections TEXT,
+        error TEXT)
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_llm_calls_timestamp ON llm_calls (timestamp)"
+    )
+    conn.commit()
+
+
+def _price(model: str):
+    # 날짜가 붙은 스냅샷 이름(o1-preview-2024-09-12)도 같은 가격
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            return MODEL_PRICES[name]
+    return None
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price = _price(model)
+    if price is None:
+        return 0.0
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def record_llm_call(
+    conn: Connection,
+    purpose: str,
+    model: str,
+    latency: float,
+    usage: Optional[Dict] = None,
+    retries: int = 0,
+    cache_hit: bool = False,
+    hedged: bool = False,
+    market: Optional[str] = None,
+    sections: Optional[Dict[str, int]] = None,
+    error: Optional[str] = None,
+):
+    """
+    Store one LLM call. ``usage`` is ``response.usage.model_dump()``;
+    ``sections`` the per-section token estimate from ``build_user_prompt``.
+    Cache hits are recorded with their original token counts but no cost.
+    """
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    completion_tokens = usage.get("completion_tokens") or 0
+    details = usage.get("completion_tokens_details") or {}
+    reasoning_tokens = details.get("reasoning_tokens") or 0
+    cost = 0.0 if cache_hit else call_cost(model, prompt_tokens, completion_tokens)
+
+    sections = sections or {}
+    section_values = {
+        column: sum(sections.get(name, 0) for name in names) if sections else None
+        for column, names in SECTION_COLUMNS.items()
+    }
+    conn.execute(
+        """
+        INSERT INTO llm_calls
+        (timestamp, market, purpose, model, prompt_tokens, completion_tokens,
+        reasoning_tokens, latency, retries, cache_hit, hedged, cost_usd,
+        ohlcv_tokens, news_tokens, orderbook_tokens, sections, error)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (
+            datetime.now().isoformat(),
+            market,
+            purpose,
+            model,
+            prompt_tokens,
+            completion_tokens,
+            reasoning_tokens,
+            latency,
+            retries,
+            int(cache_hit),
+            int(hedged),
+            cost,
+            section_values["ohlcv_tokens"],
+            section_values["news_tokens"],
+            section_values["orderbook_tokens"],
+            json.dumps(sections) if sections else None,
+            error,
+        ),
+    )
+    conn.commit()
+
+
+def latency_percentiles(
+    conn: Connection,
+    days: int = 7,
+    purpose: Optional[str] = None,
+    model: Optional[str] = None,
+    include_cache_hits: bool = False,
+) -> Dict[str, float]:
+    """p50/p95 latency (seconds) of successful calls in the last ``days`` days."""
+    query = "SELECT latency FROM llm_calls WHERE timestamp > ? AND error IS NULL"
+    params = [(datetime.now() - timedelta(days=days)).isoformat()]
+    if purpose is not None:
+        query += " AND purpose = ?"
+        params.append(purpose)
+    if model is not None:
+        query += " AND model = ?"
+        params.append(model)
+    if not include_cache_hits:
+        query += " AND cache_hit = 0"
+
+    latencies = np.array([row[0] for row in conn.execute(query, params)], dtype=float)
+    if len(latencies) == 0:
+        return {"count": 0, "p50": None, "p95": None}
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {"count": len(latencies), "p50": float(p50), "p95": float(p95)}
+
+
+def daily_spend(conn: Connection, days: int = 30) -> pd.DataFrame:
+    """Calls, tokens and cost per day and model over the last ``days`` days."""
+    since = (datetime.now() - timedelta(days=days)).isoformat()
+    return pd.read_sql_query(
+        """
+        SELECT substr(timestamp, 1, 10) AS date,
+               model,
+               COUNT(*) AS calls,
+               SUM(cache_hit) AS cache_hits,
+               SUM(prompt_tokens) AS prompt_tokens,
+               SUM(completion_tokens) AS completion_tokens,
+               SUM(reasoning_tokens) AS reasoning_tokens,
+               SUM(cost_usd) AS cost_usd
+        FROM llm_calls
+        WHERE timestamp > ?
+        GROUP BY date, model
+        ORDER BY date, model
+        """,
+        conn,
+        params=(since,),
+    )
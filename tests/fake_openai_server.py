@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+DEFAULT_CONTENT = '{"decision": "hold", "percentage": 0, "reason": "fake"}'
+
+
+class FakeOpenAIServer:
+    """
+    Local stand-in for the OpenAI chat completions endpoint.
+
+    ``delays`` sets the response time per model, ``failures`` the status
+    codes returned (in order) before a model starts answering normally.
+    Streaming requests are answered with server-sent events.
+    """
+
+    def __init__(
+        self,
+        delays: Optional[Dict[str, float]] = None,
+        failures: Optional[Dict[str, List[int]]] = None,
+        content: str = DEFAULT_CONTENT,
+    ):
+        self.delays = dict(delays or {})
+        self.failures = {
+            model: list(codes) for model, codes in (failures or {}).items()
+        }
+        self.content = content
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                model = request["model"]
+                with fake._lock:
+                    fake.requests.append(request)
+                    codes = fake.failures.get(model) or []
+                    status = codes.pop(0) if codes else 200
+                time.sleep(fake.delays.get(model, 0))
+
+                if status != 200:
+                    error = {
+                        "error": {"message": "fake failure", "type": "server_error"}
+                    }
+                    self._send(status, json.dumps(error).encode())
+                elif request.get("stream"):
+                    self._send(200, fake._events(model), "text/event-stream")
+                else:
+                    self._send(200, json.dumps(fake._completion(model)).encode())
+
+        return Handler
+
+    def _completion(self, model: str) -> Dict:
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": self.content},
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+
+    def _events(self, model: str) -> bytes:
+        base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0}
+        events = [
+            {
+                **base,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": {"content": self.content[i : i + 8]}}
+                ],
+            }
+            for i in range(0, len(self.content), 8)
+        ]
+        events.append(
+            {
+                **base,
+                "model": model,
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 5,
+                    "total_tokens": 15,
+                },
+            }
+        )
+        lines = [f"data: {json.dumps(event)}\n\n" for event in events]
+        return ("".join(lines) + "data: [DONE]\n\n").encode()
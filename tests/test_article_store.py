@@ -0,0 +1,213 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from article_store import ArticleStore, match_expression, parse_published
+
+NOW = datetime(2024, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(str(tmp_path / "news.db"), batch_size=2)
+
+
+def _article(url, published, title=None, description="desc", **extra):
+    return {
+        "title": title or f"Bitcoin story {url}",
+        "description": description,
+        "url": url,
+        "publishedAt": published,
+        "source": "CoinDesk",
+        **extra,
+    }
+
+
+def test_parse_published():
+    assert parse_published("2024-10-17T19:35:08Z", NOW) == "2024-10-17T19:35:08Z"
+    assert parse_published("2024-10-17T21:35:08+02:00", NOW) == "2024-10-17T19:35:08Z"
+    assert parse_published("3 hours ago", NOW) == "2024-10-18T09:00:00Z"
+    assert parse_published("not a date", NOW) is None
+    assert parse_published(None, NOW) is None
+
+
+def test_upsert_by_url(store):
+    stored = store.upsert(
+        [
+            _article("u1", "2024-10-18T10:00:00Z"),
+            _article("u2", "2024-10-18T08:00:00Z"),
+            _article("u3", "1 hour ago"),
+            {"title": "[Removed]", "url": "https://removed.com"},
+        ],
+        provider="newsapi",
+        fetched_at=NOW,
+    )
+    assert stored == 3
+
+    # 같은 URL 은 새 값으로 갱신되지만 처음 받은 공급자는 유지
+    store.upsert(
+        [_article("u1", "2024-10-18T10:00:00Z", title="Updated", provider="serpapi")],
+        fetched_at=NOW,
+    )
+    assert store.count() == 3
+    row = store.recent(hours=24, now=NOW).set_index("url").loc["u1"]
+    assert row["title"] == "Updated"
+    assert row["provider"] == "newsapi"
+
+
+def test_upsert_normalizes_records(store):
+    raw = _article("u1", "2024-10-18T10:00:00Z", author=float("nan"))
+    raw["source"] = {"id": "coindesk", "name": "CoinDesk"}
+    scored = pd.DataFrame(
+        [_article("u2", "2024-10-18T11:00:00Z", sources=["A", "B"], sentiment=0.5)]
+    )
+    store.upsert([raw] + scored.to_dict("records"), fetched_at=NOW)
+
+    df = store.recent(now=NOW).set_index("url")
+    assert df.loc["u1", ["source", "source_id"]].tolist() == ["CoinDesk", "coindesk"]
+    assert df.loc["u1", "author"] is None
+    assert df.loc["u2", "sentiment"] == 0.5
+
+
+def test_recent_is_an_index_range_scan(store):
+    store.upsert(
+        [
+            _article("old", "2024-10-10T00:00:00Z"),
+            _article("a", "2024-10-18T01:00:00Z"),
+            _article("b", "2024-10-18T11:00:00Z"),
+            _article("future", "2024-10-19T00:00:00Z"),
+        ],
+        fetched_at=NOW,
+    )
+    assert list(store.recent(hours=24, now=NOW)["url"]) == ["b", "a"]
+    assert list(store.recent(hours=24, limit=1, now=NOW)["url"]) == ["b"]
+    assert len(store.between(datetime(2024, 10, 1, tzinfo=timezone.utc))) == 4
+
+    with sqlite3.connect(store.path) as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT url FROM articles "
+            "WHERE published_at >= ? ORDER BY published_at DESC",
+            ("2024-10-17T12:00:00Z",),
+        ).fetchall()
+    assert "idx_articles_published_at" in str(plan)
+
+
+def test_import_csv(store, tmp_path):
+    path = tmp_path / "articles.csv"
+    pd.DataFrame(
+        [
+            {
+                "author": "a",
+                "title": "Bitcoin at $68K",
+                "description": "d",
+                "url": "u1",
+                "publishedAt": "2024-10-17T19:35:08Z",
+                "id": None,
+                "name": "Biztoc.com",
+                "search_date": "2024-10-18 09:00:00",
+            },
+            {"title": "[Removed]", "url": "https://removed.com"},
+        ]
+    ).to_csv(path, index=False)
+
+    assert store.import_csv(str(path)) == 1
+    assert store.between(datetime(2024, 10, 17, tzinfo=timezone.utc))[
+        "source"
+    ].tolist() == ["Biztoc.com"]
+
+
+def test_match_expression_quotes_terms():
+    assert match_expression("ETF  sec etf") == '"ETF" OR "sec" OR "etf"'
+    assert match_expression(['say "hi"', " "]) == '"say ""hi"""'
+    assert match_expression([]) == ""
+
+
+def test_search_ranks_with_bm25_in_time_window(store):
+    store.upsert(
+        [
+            _article("etf", "2024-10-18T10:00:00Z", "SEC approves bitcoin ETF options"),
+            _article("plain", "2024-10-18T09:00:00Z", "Bitcoin trades sideways"),
+            _article("old", "2024-09-01T00:00:00Z", "SEC delays bitcoin ETF decision"),
+            _article("halving", "2024-10-18T08:00:00Z", "Miners prepare for halvings"),
+        ],
+        fetched_at=NOW,
+    )
+    # 기간 밖의 기사는 제외, 어간 추출로 halvings 도 검색
+    hits = store.search(["ETF", "SEC", "halving"], hours=24, now=NOW)
+    assert set(hits["url"]) == {"etf", "halving"}
+    assert hits["rank"].is_monotonic_increasing
+
+    # 제목에 들어간 검색어가 설명보다 높은 점수
+    store.upsert(
+        [
+            _article(
+                "title", "2024-10-18T07:00:00Z", "Grayscale files", description="x"
+            ),
+            _article("desc", "2024-10-18T07:00:00Z", "Filing news", description="y"),
+        ],
+        fetched_at=NOW,
+    )
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("UPDATE articles SET title = 'Grayscale news' WHERE url = 'title'")
+        conn.execute("UPDATE articles SET description = 'Grayscale' WHERE url = 'desc'")
+    hits = store.search("grayscale", hours=24, now=NOW)
+    assert list(hits["url"]) == ["title", "desc"]
+
+    assert len(store.search("etf", now=NOW)) == 2
+    assert list(store.search("etf", end=datetime(2024, 10, 1))["url"]) == ["old"]
+    assert store.search("", hours=24).empty
+    # FTS 문법 문자는 검색어로만 취급된다
+    injected = store.search('bitcoin" OR "*', hours=24, now=NOW)
+    assert set(injected["url"]) == {"etf", "plain"}
+
+
+def test_search_index_follows_upserts(store):
+    store.upsert([_article("u1", "2024-10-18T10:00:00Z", "Bitcoin ETF inflows")])
+    store.upsert([_article("u1", "2024-10-18T10:00:00Z", "Bitcoin miners sell")])
+    assert store.search("etf").empty
+    assert list(store.search("miners")["url"]) == ["u1"]
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("DELETE FROM articles")
+    assert store.search("miners").empty
+
+
+def test_duplicates_are_left_out_of_queries(store):
+    store.upsert(
+        [
+            _article("u1", "2024-10-18T08:00:00Z", "Bitcoin ETF inflows hit a record"),
+            _article(
+                "u2",
+                "2024-10-18T11:00:00Z",
+                "BITCOIN ETF INFLOWS HIT A RECORD",
+                duplicate_of="u1",
+            ),
+        ],
+        fetched_at=NOW,
+    )
+    assert list(store.recent(now=NOW)["url"]) == ["u1"]
+    assert list(store.search("etf", now=NOW)["url"]) == ["u1"]
+    assert list(store.recent(now=NOW, include_duplicates=True)["url"]) == ["u2", "u1"]
+    assert len(store.search("etf", now=NOW, include_duplicates=True)) == 2
+
+
+def test_existing_archive_is_indexed(tmp_path):
+    path = str(tmp_path / "news.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT "
+            "NOT NULL, title TEXT, description TEXT, content TEXT, author TEXT, "
+            "source TEXT, source_id TEXT, provider TEXT, source_count INTEGER, "
+            "sentiment REAL, relevance REAL, published_at TEXT, fetched_at TEXT "
+            "NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO articles (url, title, fetched_at) "
+            "VALUES ('u1', 'SEC sues exchange', 'x')"
+        )
+    assert list(ArticleStore(path).search("sec")["url"]) == ["u1"]
+    # 중복 표시 열은 기존 아카이브에 추가된다
+    with sqlite3.connect(path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+    assert "duplicate_of" in columns
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (
+    FEE_FACTOR,
+    ReplayDecisions,
+    evaluate_performance,
+    rule_decision,
+    run_backtest,
+)
+
+
+def make_ohlcv(close, freq="h"):
+    close = np.asarray(close, dtype=float)
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": np.full(len(close), 10.0),
+        },
+        index=pd.date_range("2024-01-01", periods=len(close), freq=freq),
+    )
+
+
+def test_replayed_decisions_follow_excute_trade_rules():
+    df = make_ohlcv(np.linspace(100, 200, 101))
+    decisions = ReplayDecisions(
+        {
+            df.index[40]: {"decision": "buy", "percentage": 50},
+            df.index[60]: {"decision": "BUY", "percentage": 1},  # 5000원 미만
+            df.index[80]: {"decision": "SELL", "percentage": 100},
+        }
+    )
+
+    result = run_backtest(df, decisions, vectorized=False, initial_krw=1_000_000)
+
+    assert list(result.trades["decision"]) == ["BUY", "SELL"]
+    buy_price, sell_price = df["close"].iloc[40], df["close"].iloc[80]
+    coin = 500_000 * FEE_FACTOR / buy_price
+    expected_krw = 500_000 + coin * sell_price * FEE_FACTOR
+    assert result.equity["equity"].iloc[-1] == pytest.approx(expected_krw)
+    # 보유 구간 동안에만 코인을 들고 있다
+    assert (result.equity["coin"].iloc[40:80] > 0).all()
+    assert (result.equity["coin"].iloc[:40] == 0).all()
+
+
+def test_vectorized_backtest_over_years_of_hourly_candles():
+    rng = np.random.default_rng(7)
+    close = 90_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, 3 * 365 * 24)))
+    df = make_ohlcv(close)
+
+    start = time.monotonic()
+    result = run_backtest(df, rule_decision)
+    stats = evaluate_performance(result)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 5
+    assert stats["trades"] > 0
+    assert stats["max_drawdown_pct"] <= 0
+    assert set(stats) == {
+        "total_return_pct",
+        "buy_and_hold_pct",
+        "max_drawdown_pct",
+        "sharpe",
+        "trades",
+        "exposure_pct",
+    }
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from candle_store import KST, CandleStore
+
+
+class FakeUpbit:
+    """pyupbit.get_ohlcv 흉내를 내는 테스트용 fetcher"""
+
+    def __init__(self, end: datetime, total: int):
+        index = pd.date_range(end=end, periods=total, freq="h")
+        self.df = pd.DataFrame(
+            {
+                "open": range(total),
+                "high": range(total),
+                "low": range(total),
+                "close": range(total),
+                "volume": [1.0] * total,
+                "value": [1.0] * total,
+            },
+            index=index,
+            dtype=float,
+        )
+        self.calls = []
+
+    def __call__(self, ticker, interval, count, to=None):
+        self.calls.append((count, to))
+        df = self.df
+        if to is not None:
+            # to 는 UTC, 인덱스는 KST
+            df = df[df.index < pd.to_datetime(to) + timedelta(hours=9)]
+        return df.iloc[-count:]
+
+
+@pytest.fixture
+def now_kst():
+    return datetime.now(KST).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+
+
+def test_sync_fetches_only_missing_candles(tmp_path, now_kst):
+    fake = FakeUpbit(now_kst, 500)
+    store = CandleStore(str(tmp_path / "candles.db"), fetcher=fake, period=0)
+
+    df = store.get_ohlcv("KRW-BTC", "minute60", count=24)
+    assert len(df) == 24
+    assert df.index[-1] == now_kst
+
+    # 두 번째 동기화는 마지막 캔들 주변만 다시 요청
+    fake.calls.clear()
+    store.get_ohlcv("KRW-BTC", "minute60", count=24)
+    assert len(fake.calls) == 1
+    assert fake.calls[0][0] <= 3
+
+
+def test_backfill_pages_through_history(tmp_path, now_kst):
+    fake = FakeUpbit(now_kst, 450)
+    store = CandleStore(
+        str(tmp_path / "candles.db"), fetcher=fake, page_size=200, period=0
+    )
+
+    store.sync("KRW-BTC", "minute60", count=24)
+    written = store.backfill("KRW-BTC", "minute60", 1000)
+
+    assert written == 450 - 24
+    assert store.count("KRW-BTC", "minute60") == 450
+    loaded = store.load("KRW-BTC", "minute60")
+    pd.testing.assert_frame_equal(loaded, fake.df, check_freq=False)
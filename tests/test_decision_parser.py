@@ -0,0 +1,90 @@
+import pytest
+
+from decision_parser import (
+    DecisionValidationError,
+    StreamingDecisionParser,
+    extract_json_object,
+    validate_decision,
+)
+
+RESPONSE = (
+    "Here is my analysis:\n```json\n"
+    '{\n  "decision": "buy",\n  "percentage": 40,\n'
+    '  "meta": {"levels": [1, {"note": "}"}]},\n'
+    '  "reason": "Volume \\"spike\\" above the {upper} band"\n}\n```'
+)
+
+
+def feed_in_chunks(text, size):
+    parser = StreamingDecisionParser()
+    signal_at = None
+    for i in range(0, len(text), size):
+        if parser.feed(text[i : i + size]) is not None:
+            signal_at = i + size
+    return parser, signal_at
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 16, len(RESPONSE)])
+def test_signal_fires_before_reason_completes(size):
+    parser, signal_at = feed_in_chunks(RESPONSE, size)
+
+    assert parser.signal == {"decision": "BUY", "percentage": 40}
+    # 신호는 reason 값이 끝나기 전에 나온다 (전체를 한 번에 받은 경우 제외)
+    if size < len(RESPONSE):
+        assert signal_at <= RESPONSE.index('"reason"') + size
+    assert parser.finish() == {
+        "decision": "BUY",
+        "percentage": 40,
+        "reason": 'Volume "spike" above the {upper} band',
+    }
+
+
+def test_on_signal_called_once():
+    signals = []
+    parser = StreamingDecisionParser(on_signal=signals.append)
+    for chunk in ['{"decision": "sell", ', '"percentage": 25', ', "reason": "Drop"}']:
+        parser.feed(chunk)
+    assert signals == [{"decision": "SELL", "percentage": 25}]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "No JSON data here.",
+        '{"decision": "maybe", "percentage": 10, "reason": "?"}',
+        '{"decision": "buy", "percentage": 150, "reason": "all in"}',
+        '{"percentage": 10, "reason": "no decision"}',
+    ],
+)
+def test_invalid_responses_fall_back_to_none(text):
+    parser = StreamingDecisionParser()
+    parser.feed(text)
+    assert parser.signal is None
+    assert parser.finish() is None
+
+
+def test_truncated_response_keeps_streamed_signal():
+    parser = StreamingDecisionParser()
+    parser.feed('{"decision": "hold", "percentage": 0, "reason": "Sideways mar')
+    assert parser.finish() == {"decision": "HOLD", "percentage": 0, "reason": None}
+
+
+def test_validate_decision_normalizes():
+    assert validate_decision({"decision": "Hold", "percentage": 30, "reason": ""}) == {
+        "decision": "HOLD",
+        "percentage": 0,
+        "reason": "",
+    }
+    result = validate_decision({"decision": "buy", "percentage": "20", "reason": "x"})
+    assert result["percentage"] == 20
+    with pytest.raises(DecisionValidationError):
+        validate_decision({"decision": "buy", "percentage": 12.5, "reason": "x"})
+
+
+def test_extract_json_object_handles_nested_braces():
+    assert extract_json_object('text {"a": {"b": 1}, "c": "}"} tail') == {
+        "a": {"b": 1},
+        "c": "}",
+    }
+    assert extract_json_object('{broken {"decision": "sell"}') == {"decision": "sell"}
+    assert extract_json_object('{"decision": "buy"') is None
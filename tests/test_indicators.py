@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+from indicators import (
+    DEFAULT_PIPELINE,
+    HOURLY_PIPELINE,
+    INDICATOR_COLUMNS,
+    INDICATOR_WARMUP,
+    IndicatorPipeline,
+    StreamingIndicators,
+    add_indicators_panel,
+    frames_to_panel,
+)
+from trading import add_indicators
+
+
+def ta_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """ta 라이브러리로 계산한 기준값"""
+    df = df.copy()
+    bb = ta.volatility.BollingerBands(close=df["close"], window=20, window_dev=2)
+    df["bb_bbm"] = bb.bollinger_mavg()
+    df["bb_bbh"] = bb.bollinger_hband()
+    df["bb_bbl"] = bb.bollinger_lband()
+    df["rsi"] = ta.momentum.RSIIndicator(close=df["close"], window=14).rsi()
+    macd = ta.trend.MACD(
+        close=df["close"], window_slow=26, window_fast=12, window_sign=9
+    )
+    df["macd"] = macd.macd()
+    df["macd_signal"] = macd.macd_signal()
+    df["macd_diff"] = macd.macd_diff()
+    df["sma_20"] = ta.trend.SMAIndicator(close=df["close"], window=20).sma_indicator()
+    df["ema_12"] = ta.trend.EMAIndicator(close=df["close"], window=12).ema_indicator()
+    stoch = ta.momentum.StochasticOscillator(
+        high=df["high"], low=df["low"], close=df["close"], window=14, smooth_window=3
+    )
+    df["stoch_k"] = stoch.stoch()
+    df["stoch_d"] = stoch.stoch_signal()
+    df["atr"] = ta.volatility.AverageTrueRange(
+        high=df["high"], low=df["low"], close=df["close"], window=14
+    ).average_true_range()
+    df["obv"] = ta.volume.OnBalanceVolumeIndicator(
+        close=df["close"], volume=df["volume"]
+    ).on_balance_volume()
+    return df
+
+
+@pytest.fixture
+def ohlcv_df():
+    # 랜덤 워크 기반 테스트용 OHLCV 데이터
+    rng = np.random.default_rng(42)
+    close = 90_000_000 + np.cumsum(rng.normal(0, 500_000, 200))
+    open_ = close + rng.normal(0, 200_000, 200)
+    high = np.maximum(open_, close) + rng.uniform(0, 300_000, 200)
+    low = np.minimum(open_, close) - rng.uniform(0, 300_000, 200)
+    volume = rng.uniform(10, 100, 200)
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume}
+    )
+
+
+def test_streaming_matches_add_indicators(ohlcv_df):
+    expected = ta_indicators(ohlcv_df)
+
+    engine = StreamingIndicators()
+    rows = [
+        engine.update(*candle)
+        for candle in ohlcv_df[["open", "high", "low", "close", "volume"]].itertuples(
+            index=False
+        )
+    ]
+    streamed = pd.DataFrame(rows, index=ohlcv_df.index)
+
+    for column in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            streamed[column].to_numpy(),
+            expected[column].to_numpy(dtype=float),
+            rtol=1e-9,
+            atol=1e-6,
+            equal_nan=True,
+            err_msg=f"{column} 값이 ta 결과와 다릅니다.",
+        )
+
+
+def test_from_frame_then_update(ohlcv_df):
+    expected = ta_indicators(ohlcv_df)
+
+    # 앞부분으로 warm-up 후 마지막 캔들만 push
+    engine = StreamingIndicators.from_frame(ohlcv_df.iloc[:-1])
+    last = ohlcv_df.iloc[-1]
+    row = engine.update(
+        last["open"], last["high"], last["low"], last["close"], last["volume"]
+    )
+
+    for column in INDICATOR_COLUMNS:
+        assert row[column] == pytest.approx(expected[column].iloc[-1], rel=1e-9)
+
+
+def test_panel_matches_add_indicators(ohlcv_df):
+    # 두 번째 티커는 데이터가 50개 늦게 시작
+    late = ohlcv_df.iloc[50:] * 1.5
+    frames = {"KRW-BTC": ohlcv_df, "KRW-ETH": late}
+    panel, tickers, index = frames_to_panel(frames)
+
+    result = add_indicators_panel(panel, tickers, index)
+
+    for ticker, source in frames.items():
+        expected = ta_indicators(source)
+        assert len(result[ticker]) == len(source)
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(
+                result[ticker][column].to_numpy(),
+                expected[column].to_numpy(dtype=float),
+                rtol=1e-9,
+                atol=1e-6,
+                equal_nan=True,
+                err_msg=f"{ticker} {column} 값이 ta 결과와 다릅니다.",
+            )
+
+
+def test_panel_long_format(ohlcv_df):
+    frames = {"KRW-BTC": ohlcv_df, "KRW-ETH": ohlcv_df.iloc[50:]}
+    panel, tickers, index = frames_to_panel(frames)
+
+    long_df = add_indicators_panel(panel, tickers, index, long_format=True)
+
+    assert len(long_df) == len(ohlcv_df) + len(ohlcv_df) - 50
+    assert set(long_df["ticker"]) == {"KRW-BTC", "KRW-ETH"}
+    assert {"timestamp", *INDICATOR_COLUMNS} <= set(long_df.columns)
+
+
+def test_add_indicators_matches_ta(ohlcv_df):
+    result = add_indicators(ohlcv_df.copy())
+    expected = ta_indicators(ohlcv_df)
+
+    pd.testing.assert_frame_equal(
+        result[INDICATOR_COLUMNS], expected[INDICATOR_COLUMNS], rtol=1e-9
+    )
+
+
+def test_pipeline_shares_intermediates():
+    # bb_bbm/sma_20 와 macd 의 빠른 EMA/ema_12 는 같은 노드
+    kinds = [key[0] for key in DEFAULT_PIPELINE.nodes]
+    assert kinds.count("sma") == 2  # 20일 평균, stoch_d
+    assert kinds.count("ema") == 3  # ema_12, ema_26, macd_signal
+    # 13개 컬럼 + 중간값 4개(bb_std, ema_26, stoch_low, stoch_high) - sma_20 중복 1개
+    assert len(DEFAULT_PIPELINE.nodes) == 16
+
+
+def test_hourly_pipeline_fills_macd_after_warmup(ohlcv_df):
+    candles = ohlcv_df.iloc[-(24 + INDICATOR_WARMUP) :].copy()
+    result = add_indicators(candles, HOURLY_PIPELINE).iloc[-24:]
+
+    # warm-up 캔들을 더 받으면 마지막 24개 시간봉은 MACD 까지 모두 계산된다
+    assert result[["macd", "macd_signal", "macd_diff"]].notna().all().all()
+    assert {"bb_bbm", "rsi", "stoch_k", "atr", "obv"} <= set(result.columns)
+
+
+def test_regime_indicators_match_ta(ohlcv_df):
+    result = IndicatorPipeline(["adx", "bb_width", "volume_ratio"]).apply(
+        ohlcv_df.copy()
+    )
+    adx = ta.trend.ADXIndicator(
+        ohlcv_df["high"], ohlcv_df["low"], ohlcv_df["close"], 14
+    ).adx()
+    bands = ta.volatility.BollingerBands(ohlcv_df["close"], 20, 2)
+
+    # ta 는 warm-up 구간을 0 으로 채우므로 값이 있는 구간만 비교
+    assert result["adx"].first_valid_index() == 27
+    np.testing.assert_allclose(result["adx"].iloc[27:], adx.iloc[27:], rtol=1e-9)
+    np.testing.assert_allclose(
+        result["bb_width"].iloc[19:],
+        (bands.bollinger_wband() / 100).iloc[19:],
+        rtol=1e-9,
+    )
+    volume_mean = ohlcv_df["volume"].rolling(20).mean()
+    np.testing.assert_allclose(
+        result["volume_ratio"].iloc[19:],
+        (ohlcv_df["volume"] / volume_mean).iloc[19:],
+        rtol=1e-9,
+    )
@@ -0,0 +1,56 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from live_feed import MarketFeed, ReplayFeedSource
+
+MESSAGES = [
+    {"type": "ticker", "code": "KRW-BTC", "trade_price": 90000000.0},
+    {"type": "ticker", "code": "KRW-ETH", "trade_price": 3500000.0},
+    {
+        "type": "orderbook",
+        "code": "KRW-BTC",
+        "timestamp": 1700000000000,
+        "total_ask_size": 1.5,
+        "total_bid_size": 2.5,
+        "orderbook_units": [
+            {"ask_price": 90010000.0, "bid_price": 90000000.0, "ask_size": 0.1}
+        ],
+    },
+    {"type": "ticker", "code": "KRW-BTC", "trade_price": 91000000.0},
+]
+
+
+@pytest.fixture
+def feed():
+    rest = MagicMock()
+    rest.get_current_price.return_value = 1.0
+    feed = MarketFeed(
+        ["KRW-BTC"], source_factory=ReplayFeedSource.factory(MESSAGES), rest=rest
+    )
+    feed.start()
+    # 재생 메시지가 모두 반영될 때까지 대기
+    deadline = time.monotonic() + 2
+    while feed.stats["messages"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield feed
+    feed.stop()
+
+
+def test_reads_latest_values_from_cache(feed):
+    assert feed.get_current_price("KRW-BTC") == 91000000.0
+    orderbook = feed.get_orderbook("KRW-BTC")
+    assert orderbook["market"] == "KRW-BTC"
+    assert orderbook["total_bid_size"] == 2.5
+    assert len(orderbook["orderbook_units"]) == 1
+    feed.rest.get_current_price.assert_not_called()
+
+
+def test_stale_or_missing_entries_fall_back_to_rest(feed):
+    # 구독하지 않은 마켓
+    assert feed.get_current_price("KRW-ETH") == 1.0
+    # 허용 시간보다 오래된 값
+    time.sleep(0.05)
+    assert feed.get_current_price("KRW-BTC", max_age=0.01) == 1.0
+    assert feed.rest.get_current_price.call_count == 2
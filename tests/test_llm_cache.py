@@ -0,0 +1,163 @@
+import time
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from llm_cache import CacheMiss, LLMCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "Should I buy bitcoin?"}]
+
+
+class FakeCreate:
+    """``client.chat.completions.create`` 대역: 호출 횟수를 센다"""
+
+    def __init__(self, content='{"decision": "hold"}'):
+        self.content = content
+        self.calls = 0
+
+    def __call__(self, model, messages, **params):
+        self.calls += 1
+        return ChatCompletion.model_validate(
+            {
+                "id": f"chatcmpl-{self.calls}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": self.content},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 5,
+                    "total_tokens": 15,
+                },
+            }
+        )
+
+
+def test_cache_key_is_canonical():
+    a = cache_key("o1-preview", [{"role": "user", "content": "hi"}])
+    b = cache_key("o1-preview", [{"content": "hi", "role": "user"}])
+    assert a == b
+    assert a != cache_key("gpt-4o", [{"role": "user", "content": "hi"}])
+    assert a != cache_key("o1-preview", [{"role": "user", "content": "hi!"}])
+
+
+def test_second_call_is_served_from_cache(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.db"))
+    create = FakeCreate()
+
+    first = cache.create(create, model="o1-preview", messages=MESSAGES)
+    second = cache.create(create, model="o1-preview", messages=MESSAGES)
+
+    assert create.calls == 1
+    assert second.choices[0].message.content == first.choices[0].message.content
+    assert second.usage.total_tokens == 15
+    assert cache.stats == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_replay_mode_never_calls_the_api(tmp_path):
+    path = str(tmp_path / "llm.db")
+    LLMCache(path).create(FakeCreate(), model="o1-preview", messages=MESSAGES)
+
+    replay = LLMCache(path, mode="replay")
+    create = FakeCreate()
+    assert replay.create(create, model="o1-preview", messages=MESSAGES).id
+    with pytest.raises(CacheMiss):
+        replay.create(create, model="o1-preview", messages=MESSAGES + MESSAGES)
+    assert create.calls == 0
+
+
+def test_off_mode_and_ttl(tmp_path):
+    create = FakeCreate()
+    off = LLMCache(str(tmp_path / "off.db"), mode="off")
+    off.create(create, model="o1-preview", messages=MESSAGES)
+    off.create(create, model="o1-preview", messages=MESSAGES)
+    assert create.calls == 2
+
+    # 만료된 항목은 다시 요청한다
+    cache = LLMCache(str(tmp_path / "ttl.db"), ttl=0.01)
+    cache.create(create, model="o1-preview", messages=MESSAGES)
+    time.sleep(0.05)
+    cache.create(create, model="o1-preview", messages=MESSAGES)
+    assert create.calls == 4
+
+    with pytest.raises(ValueError):
+        LLMCache(mode="record")
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    create = FakeCreate("x" * 100)
+    size = len(create(model="m", messages=MESSAGES).model_dump_json())
+    cache = LLMCache(str(tmp_path / "llm.db"), max_bytes=size * 2)
+
+    def ask(text):
+        return cache.create(
+            create, model="m", messages=[{"role": "user", "content": text}]
+        )
+
+    ask("a")
+    ask("b")
+    ask("a")  # a 를 최근에 사용
+    ask("c")  # b 가 밀려난다
+
+    assert cache.stats["evictions"] == 1
+    calls = create.calls
+    ask("a")
+    assert create.calls == calls
+    ask("b")
+    assert create.calls == calls + 1
+
+
+def fake_stream(model, messages, stream, stream_options, **params):
+    """스트리밍 응답 대역: 글자 단위 조각과 마지막 usage 조각"""
+    base = {"id": "chatcmpl-s", "object": "chat.completion.chunk", "created": 0}
+    for text in ['{"decision": ', '"buy", ', '"percentage": 10}']:
+        yield ChatCompletionChunk.model_validate(
+            {
+                **base,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text}}],
+            }
+        )
+    yield ChatCompletionChunk.model_validate(
+        {
+            **base,
+            "model": model,
+            "choices": [],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+        }
+    )
+
+
+def test_streamed_response_is_recorded_for_replay(tmp_path):
+    path = str(tmp_path / "llm.db")
+    chunks = list(LLMCache(path).stream(fake_stream, "o1-preview", MESSAGES))
+    assert len(chunks) == 3
+
+    # 같은 요청의 일반 호출과 재생 모드 스트림 모두 기록을 사용한다
+    replay = LLMCache(path, mode="replay")
+    response = replay.create(FakeCreate(), model="o1-preview", messages=MESSAGES)
+    assert response.choices[0].message.content == "".join(chunks)
+    assert response.usage.total_tokens == 10
+    assert list(replay.stream(fake_stream, "o1-preview", MESSAGES)) == ["".join(chunks)]
+    with pytest.raises(CacheMiss):
+        list(replay.stream(fake_stream, "o1-preview", MESSAGES * 2))
+
+
+def test_stream_latency_excludes_consumer_time(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.db"))
+    info = {}
+    for _ in cache.stream(fake_stream, "o1-preview", MESSAGES, info=info):
+        time.sleep(0.1)
+    # 소비자가 조각을 처리한 0.3초는 LLM 지연에 넣지 않는다
+    assert info["latency"] < 0.1
+
+    info = {}
+    list(cache.stream(fake_stream, "o1-preview", MESSAGES, info=info))
+    assert info["cache_hit"] is True
+    assert info["latency"] < 0.1
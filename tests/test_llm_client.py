@@ -0,0 +1,139 @@
+import time
+
+import openai
+import pytest
+
+from llm_cache import LLMCache
+from llm_client import LLMClient, LLMTimeoutError
+from tests.fake_openai_server import DEFAULT_CONTENT, FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "Should I buy bitcoin?"}]
+
+
+def make_client(server, **kwargs):
+    return LLMClient(api_key="test", base_url=server.base_url, backoff=0.01, **kwargs)
+
+
+def test_create_returns_completion():
+    with FakeOpenAIServer() as server:
+        client = make_client(server)
+        response = client.create(model="o1-preview", messages=MESSAGES)
+
+    assert response.choices[0].message.content == DEFAULT_CONTENT
+    assert len(client.latencies["o1-preview"]) == 1
+
+
+def test_retries_transient_errors():
+    with FakeOpenAIServer(failures={"o1-preview": [500, 429]}) as server:
+        client = make_client(server, max_retries=2)
+        response = client.create(model="o1-preview", messages=MESSAGES)
+
+    assert response.choices[0].message.content == DEFAULT_CONTENT
+    assert client.stats["retries"] == 2
+    assert len(server.requests) == 3
+
+
+def test_gives_up_after_max_retries_and_on_client_errors():
+    with FakeOpenAIServer(failures={"o1-preview": [500] * 5, "bad": [400]}) as server:
+        client = make_client(server, max_retries=1)
+        with pytest.raises(openai.InternalServerError):
+            client.create(model="o1-preview", messages=MESSAGES)
+        # 400 은 다시 시도하지 않는다
+        with pytest.raises(openai.BadRequestError):
+            client.create(model="bad", messages=MESSAGES)
+
+    assert len(server.requests) == 3
+
+
+def test_deadline_bounds_the_call():
+    with FakeOpenAIServer(delays={"o1-preview": 2}) as server:
+        client = make_client(server)
+        start = time.monotonic()
+        with pytest.raises(LLMTimeoutError):
+            client.create(model="o1-preview", messages=MESSAGES, deadline=0.3)
+
+    assert time.monotonic() - start < 1
+    assert client.stats["timeouts"] == 1
+
+
+def test_hedges_to_fallback_after_p95_latency():
+    with FakeOpenAIServer(delays={"o1-preview": 1.5, "gpt-4o-mini": 0}) as server:
+        client = make_client(server, hedge_model="gpt-4o-mini", hedge_min_samples=5)
+        # 아직 표본이 부족하면 헤징하지 않는다
+        assert client.hedge_delay("o1-preview") is None
+        for _ in range(5):
+            client.record_latency("o1-preview", 0.1)
+
+        start = time.monotonic()
+        response = client.create(model="o1-preview", messages=MESSAGES)
+
+    assert response.model == "gpt-4o-mini"
+    assert time.monotonic() - start < 1
+    assert client.stats["hedged"] == client.stats["hedge_wins"] == 1
+    assert [r["model"] for r in server.requests] == ["o1-preview", "gpt-4o-mini"]
+
+
+def test_stream_through_cache(tmp_path):
+    with FakeOpenAIServer() as server:
+        client = make_client(server)
+        cache = LLMCache(str(tmp_path / "llm.db"))
+        chunks = list(cache.stream(client.create, "o1-preview", MESSAGES))
+        # 두 번째는 캐시에서 읽는다
+        cached = list(cache.stream(client.create, "o1-preview", MESSAGES))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == DEFAULT_CONTENT == "".join(cached)
+    assert len(server.requests) == 1
+    assert server.requests[0]["stream"] is True
+
+
+def test_stream_hedges_on_time_to_first_chunk():
+    with FakeOpenAIServer(delays={"o1-preview": 1.5, "gpt-4o-mini": 0}) as server:
+        client = make_client(server, hedge_model="gpt-4o-mini", hedge_min_samples=5)
+        # 스트리밍은 전체 시간이 아니라 첫 조각까지의 시간으로 판단한다
+        for _ in range(5):
+            client.record_latency("o1-preview", 10)
+        assert client.hedge_delay("o1-preview", first_chunk=True) is None
+        for _ in range(5):
+            client.record_latency("o1-preview", 0.1, first_chunk=True)
+
+        info = {}
+        start = time.monotonic()
+        chunks = list(client.stream("o1-preview", MESSAGES, info=info))
+
+    assert time.monotonic() - start < 1
+    assert {chunk.model for chunk in chunks} == {"gpt-4o-mini"}
+    assert "".join(c.choices[0].delta.content for c in chunks if c.choices) == (
+        DEFAULT_CONTENT
+    )
+    assert info["hedged"] is True
+    assert client.stats["hedged"] == client.stats["hedge_wins"] == 1
+    assert len(client.first_chunk_latencies["gpt-4o-mini"]) == 1
+
+
+def test_stream_without_hedge_samples_uses_primary():
+    with FakeOpenAIServer() as server:
+        client = make_client(server, hedge_model="gpt-4o-mini")
+        chunks = list(client.stream("o1-preview", MESSAGES))
+
+    assert {chunk.model for chunk in chunks} == {"o1-preview"}
+    assert [r["model"] for r in server.requests] == ["o1-preview"]
+    assert len(client.first_chunk_latencies["o1-preview"]) == 1
+    assert len(client.latencies["o1-preview"]) == 1
+
+
+def test_stream_latency_excludes_consumer_time(tmp_path):
+    with FakeOpenAIServer() as server:
+        client = make_client(server)
+        cache = LLMCache(str(tmp_path / "llm.db"))
+        info = {}
+        chunks = 0
+        start = time.monotonic()
+        for _ in cache.stream(client.create, "o1-preview", MESSAGES, info=info):
+            # 조각마다 주문 등 느린 처리를 한다
+            time.sleep(0.1)
+            chunks += 1
+
+    assert chunks > 1
+    assert time.monotonic() - start >= 0.1 * chunks
+    assert info["latency"] < 0.1
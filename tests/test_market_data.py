@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from market_data import gather_market_snapshot
+
+
+def _slow(value, delay):
+    def source():
+        time.sleep(delay)
+        return value
+
+    return source
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def test_sources_run_concurrently():
+    start = time.monotonic()
+    snapshot = gather_market_snapshot(
+        {
+            "balances": _slow([{"currency": "KRW"}], 0.3),
+            "orderbook": _slow({"market": "KRW-BTC"}, 0.3),
+            "fear_greed_index": _slow({"value": "50"}, 0.3),
+        }
+    )
+    elapsed = time.monotonic() - start
+
+    # 합(0.9초)이 아니라 가장 느린 소스(0.3초) 수준이어야 함
+    assert elapsed < 0.6
+    assert snapshot.balances == [{"currency": "KRW"}]
+    assert snapshot.orderbook == {"market": "KRW-BTC"}
+    assert snapshot.errors == {}
+
+
+def test_timeouts_and_failures_are_recorded():
+    snapshot = gather_market_snapshot(
+        {
+            "orderbook": _slow({"market": "KRW-BTC"}, 1.0),
+            "news_headlines": _fail,
+            "fear_greed_index": _slow({"value": "50"}, 0),
+        },
+        timeouts={"orderbook": 0.1},
+    )
+
+    assert snapshot.orderbook is None
+    assert "timed out" in snapshot.errors["orderbook"]
+    assert snapshot.errors["news_headlines"] == "boom"
+    assert snapshot.fear_greed_index == {"value": "50"}
+    assert snapshot.missing("orderbook", "fear_greed_index") == ["orderbook"]
+
+
+def test_deadline_starts_when_the_source_runs():
+    # 마켓 4개 x 소스 3개 = 12개가 워커 8개를 나눠 쓴다
+    executor = ThreadPoolExecutor(max_workers=8)
+    sources = {
+        "balances": _slow([{"currency": "KRW"}], 0.2),
+        "orderbook": _slow({"market": "KRW-BTC"}, 0.2),
+        "fear_greed_index": _slow({"value": "50"}, 0.2),
+    }
+    timeouts = dict.fromkeys(sources, 0.3)
+    with ThreadPoolExecutor(max_workers=4) as markets:
+        snapshots = list(
+            markets.map(
+                lambda _: gather_market_snapshot(sources, timeouts, executor),
+                range(4),
+            )
+        )
+    executor.shutdown()
+
+    # 대기열에서 기다린 시간은 타임아웃에 넣지 않는다
+    assert [s.errors for s in snapshots] == [{}] * 4
+    assert all(s.missing(*sources) == [] for s in snapshots)
+
+
+def test_source_stuck_in_the_queue_times_out():
+    executor = ThreadPoolExecutor(max_workers=1)
+    snapshot = gather_market_snapshot(
+        {"orderbook": _slow({"market": "KRW-BTC"}, 0.5), "balances": _slow([], 0)},
+        timeouts={"orderbook": 0.1, "balances": 0.1},
+        executor=executor,
+    )
+    executor.shutdown()
+
+    assert "timed out" in snapshot.errors["orderbook"]
+    assert "timed out" in snapshot.errors["balances"]
@@ -8,15 +8,26 @@ import numpy as np
 import pandas as pd
 import pytest
 
+import prompt
+from decision_parser import StreamingDecisionParser
+
 # init_db 함수를 테스트하기 위해 실제 함수가 포함된 모듈을 import
 from trading import (
     add_indicators,
     calculate_performance,
+    executed_decision,
+    get_daily_ohlcv,
+    get_hourly_ohlcv,
+    get_latest_reflection,
     get_recent_trades,
     get_reflection_from_db,
+    hourly_atr,
     init_db,
     log_trade,
     parser_ai_response,
+    refresh_reflection,
+    schedule_reflection,
+    stream_decision,
 )
 
 # 로거 설정
@@ -225,6 +236,7 @@ def test_db_creation(db_connection: Connection):
         "btc_avg_buy_price",
         "btc_krw_price",
         "reflection",
+        "market",
     }
     assert columns == expected_columns, "테이블의 컬럼이 예상과 다릅니다."
 
@@ -350,6 +362,31 @@ def test_get_recent_trades(db_connection, populate_trades):
     ), f"Expected {expected_count} trades, but got {len(recent_trades_df)}"
 
 
+def test_get_recent_trades_by_market(db_connection, populate_trades):
+    # 다른 마켓의 거래 추가
+    log_trade(
+        conn=db_connection,
+        decision="buy",
+        percentage=20,
+        reason="Altcoin breakout",
+        btc_balance=3.0,
+        krw_balance=500000,
+        btc_avg_buy_price=3500000,
+        btc_krw_price=3600000,
+        reflection="Momentum",
+        market="KRW-ETH",
+    )
+
+    eth_trades = get_recent_trades(db_connection, days=2, market="KRW-ETH")
+    btc_trades = get_recent_trades(db_connection, days=2, market="KRW-BTC")
+
+    assert len(eth_trades) == 1
+    assert eth_trades.iloc[0]["reason"] == "Altcoin breakout"
+    # market 을 지정하지 않고 기록한 거래는 KRW-BTC
+    assert len(btc_trades) == 3
+    assert len(get_recent_trades(db_connection, days=2)) == 4
+
+
 def test_add_indicators(sample_df):
     df_with_indicators = add_indicators(sample_df)
 
@@ -462,6 +499,22 @@ def test_parser_ai_response(response_json_text, expected):
     assert result == expected, f"Expected {expected}, but got {result}"
 
 
+@pytest.mark.parametrize(
+    "response_json_text, expected",
+    [
+        # reason 안에 중괄호가 있는 경우
+        (
+            '{"decision": "buy", "percentage": 10, "reason": "Broke {resistance}"}',
+            {"decision": "BUY", "percentage": 10, "reason": "Broke {resistance}"},
+        ),
+        # decision 이 없는 경우
+        ('{"percentage": 10, "reason": "No decision"}', None),
+    ],
+)
+def test_parser_ai_response_edge_cases(response_json_text, expected):
+    assert parser_ai_response(response_json_text) == expected
+
+
 @pytest.mark.parametrize(
     "trades_df, expected_performance",
     [
@@ -544,3 +597,113 @@ def test_get_reflection_from_db(db_connection: Connection, reflections, expected
         assert result is None, f"Expected None, but got {result}"
     else:
         assert result == (expected,), f"Expected ('{expected}',) but got {result}"
+
+
+@patch("trading.get_reflection", return_value="Keep position sizes small")
+def test_refresh_reflection_only_when_trades_change(
+    mock_get_reflection, db_connection, populate_trades
+):
+    # 거래 기록이 그대로면 회고를 다시 만들지 않는다
+    assert refresh_reflection(db_connection, {}) == "Keep position sizes small"
+    assert refresh_reflection(db_connection, {}) == "Keep position sizes small"
+    assert mock_get_reflection.call_count == 1
+
+    log_trade(db_connection, "buy", 10, "Dip", 0.6, 900000, 0, 0, "Positive")
+    mock_get_reflection.return_value = "Momentum is fading"
+    assert refresh_reflection(db_connection, {}) == "Momentum is fading"
+    assert mock_get_reflection.call_count == 2
+
+    assert get_latest_reflection(db_connection)[0] == "Momentum is fading"
+    assert get_latest_reflection(db_connection, "KRW-ETH") is None
+
+
+@patch("trading.get_reflection", return_value="Generated in background")
+def test_schedule_reflection_runs_in_background(
+    mock_get_reflection, db_connection, populate_trades
+):
+    future = schedule_reflection({}, "KRW-BTC")
+    assert future.result(timeout=5) == "Generated in background"
+    assert get_latest_reflection(db_connection, "KRW-BTC")[0] == (
+        "Generated in background"
+    )
+
+
+def _candles(count, freq):
+    index = pd.date_range("2024-01-01", periods=count, freq=freq)
+    close = 90_000_000 + np.cumsum(np.sin(np.arange(count)) * 100_000)
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": np.full(count, 10.0),
+            "value": close * 10,
+        },
+        index=index,
+    )
+
+
+@patch("trading.candle_store")
+def test_ohlcv_keeps_full_span_after_warmup(mock_candle_store):
+    mock_candle_store.get_ohlcv.side_effect = lambda market, interval, count: _candles(
+        count, "D" if interval == "day" else "h"
+    )
+    daily = get_daily_ohlcv(count=30)
+    hourly = get_hourly_ohlcv(count=24)
+
+    # warm-up 용 캔들을 더 받아 지표를 계산하므로 프롬프트의 기간은 그대로
+    assert len(prompt.encode_frame(daily).splitlines()) - 1 == 30
+    assert len(prompt.encode_frame(hourly).splitlines()) - 1 == 24
+    assert daily["macd_signal"].notna().all()
+    assert hourly["macd_signal"].notna().all()
+    assert hourly["rsi"].notna().all()
+
+
+def _broken_stream(*chunks):
+    def stream(*args, **kwargs):
+        yield from chunks
+        raise TimeoutError("LLM deadline exceeded")
+
+    return stream
+
+
+@patch("trading.excute_trade")
+def test_stream_failure_after_order_is_still_logged(mock_excute_trade):
+    parser = StreamingDecisionParser()
+    chunks = ['{"decision": "buy", "percentage": 20, ', '"reason": "Brea']
+    with patch("trading.chat_stream", _broken_stream(*chunks)):
+        # 주문이 나간 뒤 스트림이 끊겨도 예외 없이 기록 단계로 넘어간다
+        assert stream_decision(parser, [], "KRW-BTC", None) is True
+    mock_excute_trade.assert_called_once_with(
+        decision="BUY", percentage=20, market="KRW-BTC"
+    )
+    logged = executed_decision(parser.signal, parser.finish())
+    assert (logged["decision"], logged["percentage"]) == ("BUY", 20)
+
+    # 주문 전에 끊기면 예외를 그대로 올린다
+    with patch("trading.chat_stream", _broken_stream('{"decision": ')):
+        with pytest.raises(TimeoutError):
+            stream_decision(StreamingDecisionParser(), [], "KRW-BTC", None)
+    assert mock_excute_trade.call_count == 1
+
+
+def test_executed_decision_logs_the_streamed_signal():
+    signal = {"decision": "buy", "percentage": 20, "reason": None}
+    agrees = {"decision": "buy", "percentage": 20, "reason": "Breakout"}
+    disagrees = {"decision": "sell", "percentage": 50, "reason": "Reversal"}
+
+    assert executed_decision(signal, agrees) == agrees
+    # 최종 응답이 달라도 실제로 주문한 결정을 기록한다
+    assert executed_decision(signal, disagrees) == signal
+    assert executed_decision(signal, None) == signal
+
+
+@patch("trading.candle_store")
+def test_hourly_atr_needs_enough_candles(mock_candle_store):
+    mock_candle_store.load.return_value = _candles(0, "h")
+    assert hourly_atr() is None
+    mock_candle_store.load.return_value = _candles(10, "h")
+    assert hourly_atr() is None
+    mock_candle_store.load.return_value = _candles(24, "h")
+    assert hourly_atr() > 0
@@ -0,0 +1,107 @@
+import random
+
+from news_dedup import NearDuplicateIndex, dedupe_articles, index_articles
+
+
+def _article(title, source, url, description=None):
+    return {"title": title, "description": description, "url": url, "source": source}
+
+
+def test_signature_similarity_estimates_jaccard():
+    index = NearDuplicateIndex()
+    a = index.signature("Bitcoin jumps to just shy of $68K, highest since late July")
+    b = index.signature("Bitcoin jumps to just shy of $68K - highest since late July")
+    c = index.signature("Taylor Swift announces new tour dates in Europe")
+
+    assert index.similarity(a, a) == 1.0
+    assert index.similarity(a, b) > 0.8
+    assert index.similarity(a, c) < 0.2
+
+
+def test_index_clusters_to_first_representative():
+    index = NearDuplicateIndex()
+    assert index.add("a", "SEC sues Cumberland over unregistered crypto trading") == "a"
+    assert index.add("b", "Taylor Swift announces new tour dates") == "b"
+    assert (
+        index.add("c", "SEC sues Cumberland over unregistered crypto trading.") == "a"
+    )
+    # 같은 키를 다시 넣어도 클러스터는 그대로
+    assert index.add("c", "anything") == "a"
+    assert len(index) == 3
+    assert index.query("SEC sues Cumberland over unregistered crypto-trading") == ["a"]
+    assert index.query("Completely unrelated sports result") == []
+
+
+def test_dedupe_articles_counts_sources():
+    articles = [
+        _article(
+            "Bitcoin Jumps to Just Shy of $68K, Highest Since Late July",
+            "CoinDesk",
+            "u1",
+        ),
+        _article("Crypto exchange hacked, $50M stolen", "Reuters", "u2"),
+        _article(
+            "Bitcoin jumps to just shy of $68K, highest since late July",
+            "Biztoc.com",
+            "u3",
+        ),
+        _article(
+            "Bitcoin Jumps To Just Shy Of $68K: Highest Since Late July", "Yahoo", "u4"
+        ),
+        _article(
+            "Bitcoin Jumps to Just Shy of $68K, Highest Since Late July",
+            "CoinDesk",
+            "u5",
+        ),
+    ]
+    deduped = dedupe_articles(articles)
+
+    assert [a["url"] for a in deduped] == ["u1", "u2"]
+    assert deduped[0]["source_count"] == 3
+    assert deduped[0]["sources"] == ["CoinDesk", "Biztoc.com", "Yahoo"]
+    assert deduped[1]["source_count"] == 1
+    assert [a["duplicate_of"] for a in deduped] == [None, None]
+    assert dedupe_articles([]) == []
+
+
+def test_long_lived_index_marks_copies_across_calls():
+    title = "Bitcoin Jumps to Just Shy of $68K, Highest Since Late July"
+    index = NearDuplicateIndex()
+    # 비어 있는 인덱스도 새로 만들지 않고 그대로 쓴다
+    assert index_articles(index, [_article(title, "CoinDesk", "u1")]) == 1
+    assert (
+        dedupe_articles([_article(title, "CoinDesk", "u1")], index)[0]["duplicate_of"]
+        is None
+    )
+
+    # 몇 시간 뒤 다른 실행에서 들어온 사본은 먼저 저장된 기사를 가리킨다
+    copy = _article(title.upper(), "Yahoo", "u2")
+    other = _article("Crypto exchange hacked, $50M stolen", "Reuters", "u3")
+    later = dedupe_articles([copy, other], index)
+    assert [(a["url"], a["duplicate_of"]) for a in later] == [
+        ("u2", "u1"),
+        ("u3", None),
+    ]
+
+    # 대표가 다시 오면 사본 대신 대표를 남긴다
+    again = dedupe_articles([copy, _article(title, "CoinDesk", "u1")], index)
+    assert [(a["url"], a["duplicate_of"]) for a in again] == [("u1", None)]
+    assert again[0]["sources"] == ["Yahoo", "CoinDesk"]
+
+    empty = NearDuplicateIndex()
+    dedupe_articles([_article(title, "CoinDesk", "u9")], empty)
+    assert "u9" in empty
+
+
+def test_bucket_entries_stay_bounded_for_large_clusters():
+    # 사본이 많아도 버킷에는 클러스터당 한 건만 쌓여 후보 비교가 늘지 않는다
+    random.seed(0)
+    title = "Bitcoin ETF sees record inflows as BTC price climbs above $68,000"
+    index = NearDuplicateIndex()
+    for i in range(300):
+        chars = list(title)
+        chars[random.randrange(len(chars))] = random.choice("abcdefgh")
+        index.add(i, "".join(chars))
+
+    assert {index.find(i) for i in range(300)} == {0}
+    assert max(len(e) for bucket in index._buckets for e in bucket.values()) == 1
@@ -0,0 +1,317 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import news_factory
+from article_store import ArticleStore
+from news_dedup import NearDuplicateIndex
+from news_factory import NewsAPIClient, NewsApiFactory, ProviderStats, merge_articles
+from news_watermarks import NewsWatermarks
+from provider_health import ProviderHealth, QuotaExceededError, QuotaLimits
+
+NOW = datetime(2024, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeProvider:
+    def __init__(self, name, articles=None, delay=0.0, error=None):
+        self.name = name
+        self.articles = articles
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.params = None
+
+    def request_top_headlines(self, params, on_request=None):
+        self.calls += 1
+        self.params = dict(params)
+        if on_request is not None and not on_request():
+            return []
+        params.pop("from", None)
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.articles
+
+
+def _article(url, title=None, published=None):
+    return {
+        "title": title or f"Bitcoin story {url}",
+        "url": url,
+        "source": "x",
+        "publishedAt": published,
+    }
+
+
+@pytest.fixture
+def health(tmp_path):
+    return ProviderHealth(str(tmp_path / "news.db"), limits={})
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def watermarks(tmp_path):
+    return NewsWatermarks(str(tmp_path / "news.db"), clock=NOW.timestamp)
+
+
+@pytest.fixture
+def make_factory(executor, health, watermarks):
+    def make(mode, clients, deadline=2.0, stats=None):
+        return NewsApiFactory(
+            mode=mode,
+            deadline=deadline,
+            clients=clients,
+            stats=stats or ProviderStats(),
+            executor=executor,
+            health=health,
+            watermarks=watermarks,
+            index=NearDuplicateIndex(),
+        )
+
+    return make
+
+
+def test_merge_articles_keeps_first_per_url():
+    merged = merge_articles(
+        [[_article("a"), _article("b")], None, [_article("b", "dup")]]
+    )
+    assert [a["url"] for a in merged] == ["a", "b"]
+    assert merged[1]["title"] == "Bitcoin story b"
+
+
+def test_fanout_merges_within_shared_deadline(make_factory):
+    fast = FakeProvider(
+        "fast", [_article("a", "Bitcoin ETF inflows hit a record"), _article("b")]
+    )
+    other = FakeProvider(
+        "other", [_article("b"), _article("c", "Miners sell as hashprice falls")]
+    )
+    slow = FakeProvider("slow", [_article("d")], delay=1.0)
+    factory = make_factory("fanout", [fast, other, slow], deadline=0.3)
+
+    start = time.monotonic()
+    articles = factory.request_top_headlines({"q": "bitcoin", "from": "x"})
+    # 느린 공급자를 기다리지 않고 마감 시점에 반환
+    assert time.monotonic() - start < 0.8
+    assert sorted(a["url"] for a in articles) == ["a", "b", "c"]
+
+
+def test_first_mode_returns_first_good_response(make_factory):
+    broken = FakeProvider("broken", error=RuntimeError("boom"))
+    empty = FakeProvider("empty", [])
+    quick = FakeProvider("quick", [_article("q")], delay=0.05)
+    slow = FakeProvider("slow", [_article("s")], delay=1.0)
+    factory = make_factory("first", [broken, empty, slow, quick])
+
+    start = time.monotonic()
+    articles = factory.request_top_headlines({"q": "bitcoin"})
+    assert time.monotonic() - start < 0.8
+    assert [a["url"] for a in articles] == ["q"]
+
+
+def test_failover_mode_is_serial(make_factory):
+    first = FakeProvider("first", None)
+    second = FakeProvider("second", [_article("x")])
+    third = FakeProvider("third", [_article("y")])
+    factory = make_factory("failover", [first, second, third])
+
+    articles = factory.request_top_headlines({})
+    assert [(a["url"], a["provider"]) for a in articles] == [("x", "second")]
+    assert (first.calls, second.calls, third.calls) == (1, 1, 0)
+
+
+def test_slow_and_failing_providers_move_down(make_factory):
+    stats = ProviderStats()
+    slow = FakeProvider("slow", [_article("a")], delay=0.2)
+    failing = FakeProvider("failing", error=RuntimeError("boom"))
+    fast = FakeProvider("fast", [_article("b")])
+    factory = make_factory("fanout", [slow, failing, fast], stats=stats)
+
+    factory.request_top_headlines({})
+    assert [c.name for c in factory.available_clients()] == ["fast", "slow", "failing"]
+    snapshot = stats.snapshot()
+    assert snapshot["failing"]["failures"] == 1
+    assert snapshot["slow"]["latency"] >= 0.2
+
+
+def test_errors_when_nothing_available(make_factory, health):
+    exhausted = FakeProvider("exhausted", [_article("a")])
+    health.record_failure("exhausted", quota_exhausted=True)
+    with pytest.raises(Exception, match="quotas are exhausted"):
+        make_factory("fanout", [exhausted]).request_top_headlines({})
+    assert exhausted.calls == 0
+
+    broken = FakeProvider("broken", error=RuntimeError("boom"))
+    with pytest.raises(Exception, match="Unable to fetch news"):
+        make_factory("fanout", [broken]).request_top_headlines({})
+
+    with pytest.raises(ValueError):
+        NewsApiFactory(mode="random", clients=[])
+
+
+def test_factory_records_provider_health(make_factory, health):
+    ok = FakeProvider("ok", [_article("a")])
+    quota = FakeProvider("quota", error=QuotaExceededError("run out of searches"))
+    broken = FakeProvider("broken", error=RuntimeError("boom"))
+    factory = make_factory("fanout", [ok, quota, broken])
+    factory.request_top_headlines({})
+
+    assert health.status("ok")["day_count"] == 1
+    assert health.status("quota")["state"] == "exhausted"
+    assert health.status("broken")["failures"] == 1
+    # 할당량이 소진된 공급자는 다음 호출부터 요청하지 않는다
+    factory.request_top_headlines({})
+    assert (ok.calls, quota.calls, broken.calls) == (2, 1, 2)
+
+
+def test_watermarks_are_per_provider_and_query(make_factory, watermarks):
+    watermarks.advance("newsapi", "bitcoin", "2024-10-18T10:00:00Z")
+    newsapi = FakeProvider(
+        "newsapi",
+        [
+            _article("new", "ETF inflows hit a record", "2024-10-18T11:00:00Z"),
+            _article("seen", "Miners sell", "2024-10-18T09:00:00Z"),
+            _article("undated", "Exchange hacked overnight"),
+        ],
+    )
+    serpapi = FakeProvider("serpapi", [])
+    factory = make_factory("fanout", [newsapi, serpapi])
+
+    articles = factory.request_top_headlines({"q": "bitcoin"})
+    # 워터마크보다 오래된 기사는 버리고, 시각을 모르는 기사는 유지
+    assert sorted(a["url"] for a in articles) == ["new", "undated"]
+    assert newsapi.params["from"] == "2024-10-18T10:00:00"
+    # 워터마크가 없는 공급자는 lookback 만큼 거슬러 올라간다
+    assert serpapi.params["from"] == "2024-10-17T12:00:00"
+
+    # 저장이 끝나 commit 하기 전에는 워터마크가 그대로
+    assert watermarks.get("newsapi", "bitcoin") == "2024-10-18T10:00:00Z"
+    factory.commit_watermarks()
+    assert watermarks.get("newsapi", "bitcoin") == "2024-10-18T11:00:00Z"
+    assert watermarks.get("newsapi", "ethereum") is None
+    # 새 기사가 없어도 실패가 아니다
+    assert watermarks.get("serpapi", "bitcoin") is None
+
+
+def test_late_provider_keeps_its_watermark(make_factory, watermarks):
+    fast = FakeProvider("fast", [_article("a", "ETF inflows", "2024-10-18T11:00:00Z")])
+    slow = FakeProvider(
+        "slow", [_article("b", "Miners sell", "2024-10-18T11:30:00Z")], delay=0.3
+    )
+    factory = make_factory("first", [fast, slow])
+
+    assert [a["url"] for a in factory.request_top_headlines({"q": "bitcoin"})] == ["a"]
+    factory.commit_watermarks()
+    # 버려진 응답은 다음에 다시 받도록 워터마크를 옮기지 않는다
+    time.sleep(0.5)
+    assert slow.calls == 1
+    assert watermarks.get("fast", "bitcoin") == "2024-10-18T11:00:00Z"
+    assert watermarks.get("slow", "bitcoin") is None
+    assert factory.pending_watermarks == {}
+
+
+def test_empty_success_is_not_an_error(make_factory):
+    factory = make_factory("failover", [FakeProvider("a", []), FakeProvider("b")])
+    assert factory.request_top_headlines({"q": "bitcoin"}) == []
+
+
+class FakeSDK:
+    def __init__(self, total):
+        self.total = total
+        self.calls = []
+
+    def get_everything(self, **kwargs):
+        self.calls.append(kwargs)
+        start = (kwargs["page"] - 1) * kwargs["page_size"]
+        stop = min(start + kwargs["page_size"], self.total)
+        articles = [
+            {
+                "title": f"t{i}",
+                "description": "d",
+                "url": f"u{i}",
+                "publishedAt": "2024-10-18T10:00:00Z",
+                "source": {"id": None, "name": "x"},
+            }
+            for i in range(start, stop)
+        ]
+        return {"totalResults": self.total, "articles": articles}
+
+
+def test_newsapi_client_pages_until_results_run_out():
+    client = NewsAPIClient(page_size=2, max_pages=10)
+    client.client = FakeSDK(total=5)
+    articles = client.request_top_headlines(
+        {"q": "bitcoin", "from": "2024-10-18T00:00:00"}
+    )
+    assert [a["url"] for a in articles] == [f"u{i}" for i in range(5)]
+    assert [c["page"] for c in client.client.calls] == [1, 2, 3]
+    assert client.client.calls[0]["from_param"] == "2024-10-18T00:00:00"
+
+    # 최대 페이지 수에서 멈춘다
+    client = NewsAPIClient(page_size=2, max_pages=2)
+    client.client = FakeSDK(total=5)
+    assert len(client.request_top_headlines({"q": "bitcoin"})) == 4
+
+
+def test_each_page_counts_against_the_quota(tmp_path, executor, watermarks):
+    health = ProviderHealth(
+        str(tmp_path / "news.db"), limits={"newsapi": QuotaLimits(daily=3)}
+    )
+    client = NewsAPIClient(page_size=2, max_pages=10)
+    client.client = FakeSDK(total=50)
+    factory = NewsApiFactory(
+        mode="fanout",
+        clients=[client],
+        stats=ProviderStats(),
+        executor=executor,
+        health=health,
+        watermarks=watermarks,
+        index=NearDuplicateIndex(),
+    )
+
+    # 한도에 닿으면 페이지 넘김을 멈추고 받은 만큼만 반환한다
+    assert len(factory.request_top_headlines({"q": "bitcoin"})) == 6
+    assert len(client.client.calls) == 3
+    assert health.status("newsapi")["day_count"] == 3
+    with pytest.raises(Exception, match="quotas are exhausted"):
+        factory.request_top_headlines({"q": "bitcoin"})
+
+
+def test_story_index_is_seeded_from_the_store(tmp_path, monkeypatch):
+    store = ArticleStore(str(tmp_path / "news.db"))
+    title = "Bitcoin Jumps to Just Shy of $68K, Highest Since Late July"
+    published = datetime.now(timezone.utc) - timedelta(hours=30)
+    store.upsert([_article("u1", title, published.isoformat())])
+    monkeypatch.setattr(news_factory, "_story_index", None)
+
+    index = news_factory.story_index(store, hours=72)
+    assert news_factory.story_index() is index
+    assert index.query(title.upper()) == ["u1"]
+
+
+def test_story_index_forgets_stories_older_than_the_window(tmp_path, monkeypatch):
+    store = ArticleStore(str(tmp_path / "news.db"))
+    title = "Bitcoin Jumps to Just Shy of $68K, Highest Since Late July"
+    store.upsert([_article("u1", title, (NOW - timedelta(hours=70)).isoformat())])
+    monkeypatch.setattr(news_factory, "_story_index", None)
+    now = [NOW.timestamp()]
+
+    def index():
+        return news_factory.story_index(
+            store, hours=72, rebuild_every=6 * 3600, clock=lambda: now[0]
+        )
+
+    assert index().query(title) == ["u1"]
+    # 다시 만들기 전까지는 같은 인덱스를 쓴다
+    now[0] += 5 * 3600
+    assert index().query(title) == ["u1"]
+    # 다시 만들면 기간(72시간)이 지난 기사는 더 이상 중복으로 잡지 않는다
+    now[0] += 3600
+    assert index().query(title) == []
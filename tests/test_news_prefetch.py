@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from news_prefetch import NewsPrefetcher, minutes_before
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeFetch:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_minutes_before_wraps_midnight():
+    assert minutes_before("09:00", 5) == "08:55"
+    assert minutes_before("00:03", 5) == "23:58"
+    assert minutes_before("15:00", 0) == "15:00"
+
+
+def test_fresh_cache_is_served_without_fetching():
+    clock = FakeClock()
+    fetch = FakeFetch("news v1")
+    prefetcher = NewsPrefetcher(fetch, max_age=600, clock=clock)
+    prefetcher.refresh()
+
+    clock.now += 599
+    assert prefetcher.headlines() == "news v1"
+    assert fetch.calls == 1
+    assert prefetcher.metrics["hits"] == 1
+
+
+def test_stale_cache_is_refreshed_synchronously():
+    clock = FakeClock()
+    fetch = FakeFetch("news v1", "news v1", "news v2")
+    prefetcher = NewsPrefetcher(fetch, max_age=600, clock=clock)
+
+    # 캐시가 비어 있으면 바로 가져온다
+    assert prefetcher.headlines() == "news v1"
+    clock.now += 601
+    assert prefetcher.headlines() == "news v1"
+    # 내용이 같으면 버전은 그대로
+    assert prefetcher.get().version == 1
+    clock.now += 601
+    assert prefetcher.headlines() == "news v2"
+    assert prefetcher.get().version == 2
+    assert prefetcher.metrics["misses"] == 3
+    # 호출별로 더 엄격한 기준을 줄 수 있다
+    clock.now += 60
+    assert prefetcher.get(max_age=30) is None
+    assert prefetcher.get() is not None
+
+
+def test_failed_refresh_serves_stale_cache():
+    clock = FakeClock()
+    fetch = FakeFetch("news v1", RuntimeError("providers down"))
+    prefetcher = NewsPrefetcher(fetch, max_age=600, clock=clock)
+    with pytest.raises(RuntimeError):
+        NewsPrefetcher(FakeFetch(RuntimeError("down")), clock=clock).headlines()
+
+    prefetcher.refresh()
+    clock.now += 3600
+    assert prefetcher.headlines() == "news v1"
+    assert prefetcher.metrics["failures"] == 1
+
+
+def test_concurrent_misses_share_one_fetch():
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return "news"
+
+    prefetcher = NewsPrefetcher(fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(prefetcher.headlines()))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    assert wait_until(lambda: len(calls) == 1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert results == ["news"] * 4
+    assert len(calls) == 1
+
+
+def test_start_warms_cache_in_background():
+    fetch = FakeFetch("news")
+    prefetcher = NewsPrefetcher(fetch, interval=3600)
+    prefetcher.start(daily_at=["03:00", "09:00"], lead_minutes=5)
+    try:
+        assert wait_until(lambda: prefetcher.get() is not None)
+        assert prefetcher.headlines() == "news"
+        assert fetch.calls == 1
+        # 다음 갱신은 주기 또는 실행 5분 전 중 빠른 쪽
+        assert prefetcher._scheduler.next_deadline() <= time.time() + 3600
+    finally:
+        prefetcher.stop()
+
+
+def test_default_cadence_only_refreshes_before_runs():
+    prefetcher = NewsPrefetcher(FakeFetch("news"))
+    assert prefetcher.interval is None
+    prefetcher.start(daily_at=["03:00", "09:00"], lead_minutes=5)
+    try:
+        # 주기 갱신 없이 실행 시각 5분 전에만 갱신해 할당량을 아낀다
+        labels = sorted(label for *_, label in prefetcher._scheduler._deadlines)
+        assert labels == ["daily 02:55", "daily 08:55"]
+    finally:
+        prefetcher.stop()
@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from news_scoring import (
+    clean_articles,
+    format_headlines,
+    news_sentiment,
+    score_articles,
+    sentiment_series,
+    top_headlines,
+)
+
+
+@pytest.fixture
+def articles():
+    return pd.DataFrame(
+        [
+            {
+                "title": "Bitcoin surges to record high as ETF inflows jump",
+                "description": "BTC rallied above $70K.",
+                "url": "https://a.com/1",
+                "publishedAt": "2024-10-17T01:00:00Z",
+            },
+            {
+                "title": "Crypto exchange hacked, bitcoin plunges",
+                "description": "Stolen funds and fraud fears hit the market.",
+                "url": "https://a.com/2",
+                "publishedAt": "2024-10-17T20:00:00Z",
+            },
+            {
+                "title": "Taylor Swift announces new tour dates",
+                "description": "Fans rush to buy tickets.",
+                "url": "https://a.com/3",
+                "publishedAt": "2024-10-17T02:00:00Z",
+            },
+            {
+                "title": "[Removed]",
+                "description": "[Removed]",
+                "url": "https://removed.com",
+                "publishedAt": "1970-01-01T00:00:00Z",
+            },
+            {
+                "title": "bitcoin surges to record high as ETF inflows jump",
+                "description": None,
+                "url": "https://b.com/1",
+                "publishedAt": "2024-10-17T01:30:00Z",
+            },
+            {
+                "title": None,
+                "description": "no title",
+                "url": "https://a.com/4",
+                "publishedAt": "2024-10-17T03:00:00Z",
+            },
+        ]
+    )
+
+
+def test_clean_articles_drops_junk(articles):
+    cleaned = clean_articles(articles)
+    # [Removed], 제목 없음, 대소문자만 다른 중복 제거
+    assert list(cleaned["url"]) == [
+        "https://a.com/1",
+        "https://a.com/2",
+        "https://a.com/3",
+    ]
+
+
+def test_score_articles(articles):
+    scored = score_articles(articles)
+    bullish, bearish, unrelated = scored.itertuples(index=False)
+
+    assert bullish.sentiment > 0.5
+    assert bearish.sentiment < -0.5
+    assert unrelated.sentiment == 0
+    assert unrelated.relevance == 0
+    assert 0 < bearish.relevance <= 1 and 0 < bullish.relevance <= 1
+
+
+def test_top_headlines_and_format(articles):
+    scored = score_articles(articles)
+    top = top_headlines(scored, k=5)
+    assert len(top) == 2
+    assert top["relevance"].is_monotonic_decreasing
+
+    text = format_headlines(top.head(1), news_sentiment(scored))
+    lines = text.splitlines()
+    assert lines[0].startswith("Aggregate news sentiment: ")
+    assert lines[1].startswith("1. [sentiment +")
+    assert format_headlines(top.iloc[:0]) == ""
+
+
+def test_sentiment_features(articles):
+    scored = score_articles(articles)
+    relevant = scored.head(2)
+    expected = (relevant["sentiment"] * relevant["relevance"]).sum()
+    assert news_sentiment(scored) == pytest.approx(
+        expected / relevant["relevance"].sum()
+    )
+
+    # UTC 20시 기사는 한국 시간으로 다음 날
+    series = sentiment_series(scored)
+    assert list(series.index) == [
+        pd.Timestamp("2024-10-17"),
+        pd.Timestamp("2024-10-18"),
+    ]
+    assert series.iloc[0] > 0 > series.iloc[1]
+
+
+def test_empty_input():
+    scored = score_articles(pd.DataFrame())
+    assert scored.empty
+    assert news_sentiment(scored) is None
+    assert top_headlines(scored).empty
+
+
+def test_format_headlines_shows_source_count(articles):
+    scored = score_articles(articles).assign(source_count=[3, 1, 1])
+    lines = format_headlines(top_headlines(scored)).splitlines()
+    assert lines[0].endswith(
+        ", 3 sources] Bitcoin surges to record high as ETF inflows jump"
+    )
+    assert "sources" not in lines[1]
+
+
+def test_format_headlines_treats_missing_source_count_as_one(articles):
+    # import_csv 로 옮긴 기사는 source_count 가 비어 있다
+    scored = score_articles(articles).assign(source_count=[2, None, None])
+    lines = format_headlines(top_headlines(scored)).splitlines()
+    assert ", 2 sources]" in lines[0]
+    assert all("sources" not in line for line in lines[1:])
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from news_watermarks import NewsWatermarks
+
+NOW = datetime(2024, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def watermarks(tmp_path):
+    return NewsWatermarks(
+        str(tmp_path / "news.db"), lookback_hours=6, clock=NOW.timestamp
+    )
+
+
+def test_since_defaults_to_lookback(watermarks):
+    assert watermarks.get("newsapi", "bitcoin") is None
+    assert watermarks.since("newsapi", "bitcoin") == "2024-10-18T06:00:00Z"
+
+
+def test_advance_only_moves_forward(watermarks):
+    watermarks.advance("newsapi", "bitcoin", "2024-10-18T10:00:00Z")
+    watermarks.advance("newsapi", "bitcoin", "2024-10-18T08:00:00Z")
+    assert watermarks.since("newsapi", "bitcoin") == "2024-10-18T10:00:00Z"
+    watermarks.advance("newsapi", "bitcoin", "2024-10-18T11:00:00Z")
+    assert watermarks.get("newsapi", "bitcoin") == "2024-10-18T11:00:00Z"
+
+
+def test_watermarks_are_separate_and_durable(watermarks):
+    watermarks.advance("newsapi", "bitcoin", "2024-10-18T10:00:00Z")
+    watermarks.advance("serpapi", "bitcoin", "2024-10-18T09:00:00Z")
+
+    # 같은 파일을 여는 새 인스턴스도 같은 값을 본다
+    reopened = NewsWatermarks(watermarks.path, clock=NOW.timestamp)
+    assert reopened.get("newsapi", "bitcoin") == "2024-10-18T10:00:00Z"
+    assert reopened.get("serpapi", "bitcoin") == "2024-10-18T09:00:00Z"
+    assert reopened.since("newsapi", "ethereum") == "2024-10-17T12:00:00Z"
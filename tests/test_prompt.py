@@ -0,0 +1,238 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+import prompt
+from article_store import ArticleStore
+from indicators import DEFAULT_PIPELINE, HOURLY_PIPELINE
+
+
+def make_ohlcv(n, freq, start=90_000_000.0):
+    rng = np.random.default_rng(0)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {
+            "open": close * 0.999,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.uniform(100, 200, n),
+            "value": close * 150,
+        },
+        index=pd.date_range("2024-01-01", periods=n, freq=freq),
+    )
+
+
+def make_orderbook(levels=15):
+    return {
+        "market": "KRW-BTC",
+        "total_ask_size": 3.0,
+        "total_bid_size": 1.0,
+        "orderbook_units": [
+            {
+                "ask_price": 90_001_000.0 + i * 1000,
+                "bid_price": 90_000_000.0 - i * 1000,
+                "ask_size": 0.123456,
+                "bid_size": 0.654321,
+            }
+            for i in range(levels)
+        ],
+    }
+
+
+def make_inputs():
+    return (
+        DEFAULT_PIPELINE.apply(make_ohlcv(30, "D")),
+        HOURLY_PIPELINE.apply(make_ohlcv(24, "h")),
+        [{"currency": "KRW", "balance": "1000000"}],
+        make_orderbook(),
+        "Bitcoin ETF inflows continue",
+        {"value": "55", "value_classification": "Greed"},
+    )
+
+
+def test_encode_frame_trims_warmup_and_rounds():
+    df = DEFAULT_PIPELINE.apply(make_ohlcv(30, "D"))
+    lines = prompt.encode_frame(df).splitlines()
+    header = lines[0].split(",")
+
+    # 30일 데이터로는 계산되지 않는 macd_signal 열은 빠진다
+    assert "macd_signal" not in header
+    assert header[:2] == ["t", "open"]
+    # 모든 이동 지표가 NaN 인 앞부분은 잘린다
+    first_valid = df["ema_12"].first_valid_index()
+    assert lines[1].startswith(first_valid.strftime("%Y-%m-%d") + ",")
+    assert len(lines) - 1 == len(df.loc[first_valid:])
+
+    # 큰 가격은 원 단위 정수, rsi 는 소수 1자리
+    row = dict(zip(header, lines[-1].split(",")))
+    assert row["close"] == str(int(round(df["close"].iloc[-1])))
+    assert float(row["rsi"]) == round(df["rsi"].iloc[-1], 1)
+
+
+def test_encode_frame_keeps_small_prices_precise():
+    df = make_ohlcv(5, "h", start=0.5)
+    row = prompt.encode_frame(df).splitlines()[-1].split(",")
+    assert abs(float(row[4]) - df["close"].iloc[-1]) < 1e-5
+    assert row[0] == df.index[-1].strftime("%Y-%m-%d %H:%M")
+
+
+def test_summarize_orderbook():
+    text = prompt.summarize_orderbook(make_orderbook(), levels=3)
+    assert "spread=1000" in text
+    assert "imbalance=-0.500" in text
+    assert len(text.splitlines()) == 2 + 1 + 3
+
+
+def test_compact_prompt_is_smaller_than_json():
+    df_daily, df_hourly, balances, orderbook, news, fgi = make_inputs()
+    text, tokens = prompt.build_user_prompt(
+        df_daily, df_hourly, balances, orderbook, news, fgi
+    )
+    # 기존 JSON 직렬화 방식과 비교
+    legacy = json.dumps(orderbook) + df_daily.to_json() + df_hourly.to_json()
+
+    assert tokens["total"] < prompt.estimate_tokens(legacy) / 2
+    assert set(tokens) == {
+        "balances",
+        "orderbook",
+        "daily",
+        "hourly",
+        "news",
+        "fear_greed",
+        "total",
+    }
+    assert news in text
+    assert (
+        prompt.get_user_prompt(df_daily, df_hourly, balances, orderbook, news, fgi)
+        == text
+    )
+
+
+def test_token_budget_drops_oldest_candles_first():
+    inputs = make_inputs()
+    _, full = prompt.build_user_prompt(*inputs)
+    budget = full["total"] - 200
+
+    text, tokens = prompt.build_user_prompt(*inputs, token_budget=budget)
+
+    assert tokens["total"] <= budget
+    # 가장 최근 캔들과 뉴스는 남아 있다
+    assert inputs[1].index[-1].strftime("%Y-%m-%d %H:%M") in text
+    assert inputs[0].index[-1].strftime("%Y-%m-%d") in text
+    assert inputs[4] in text
+
+
+def test_token_budget_too_small_keeps_fixed_sections():
+    inputs = make_inputs()
+    text, tokens = prompt.build_user_prompt(*inputs, token_budget=10)
+    assert tokens["daily"] == tokens["hourly"] == 0
+    assert inputs[4] in text
+
+
+def test_retrieve_headlines(tmp_path):
+    store = ArticleStore(str(tmp_path / "news.db"))
+    now = datetime.now(timezone.utc)
+    store.upsert(
+        [
+            {
+                "title": "SEC approves bitcoin ETF options",
+                "url": "u1",
+                "publishedAt": (now - timedelta(hours=1)).isoformat(),
+                "source": "CoinDesk",
+                "sentiment": 0.5,
+            },
+            {
+                "title": "Bitcoin trades sideways",
+                "url": "u2",
+                "publishedAt": "1 hour ago",
+            },
+            {"title": "Weather report", "url": "u3", "publishedAt": "1 hour ago"},
+        ]
+    )
+
+    lines = prompt.retrieve_headlines(store, "KRW-BTC", k=5).splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith("1. [")
+    assert lines[0].endswith(
+        ", CoinDesk, sentiment +0.50] SEC approves bitcoin ETF options"
+    )
+    assert prompt.retrieve_headlines(store, "KRW-DOGE", terms=["dogecoin"]) is None
+
+
+def test_retrieved_headlines_keep_the_sentiment_line(tmp_path):
+    store = ArticleStore(str(tmp_path / "news.db"))
+    published = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    store.upsert(
+        [
+            {
+                "title": "SEC approves bitcoin ETF options",
+                "url": "u1",
+                "publishedAt": published,
+                "sentiment": 0.5,
+                "relevance": 1.0,
+            },
+            {
+                "title": "Miners capitulate as hashprice falls",
+                "url": "u2",
+                "publishedAt": published,
+                "sentiment": -0.3,
+                "relevance": 1.0,
+            },
+        ]
+    )
+
+    headlines = prompt.retrieve_headlines(store, "KRW-BTC", k=1)
+    lines = headlines.splitlines()
+    # 검색 결과와 별개로 기간 전체의 감성 요약을 맨 위에 둔다
+    assert lines[0] == "Aggregate news sentiment: +0.10 (-1 bearish, +1 bullish)"
+    assert lines[1].endswith("] SEC approves bitcoin ETF options")
+    assert len(lines) == 2
+
+    inputs = list(make_inputs())
+    inputs[4] = headlines
+    text, _ = prompt.build_user_prompt(*inputs)
+    assert "Aggregate news sentiment: +0.10" in text
+
+
+class FakeTiktoken:
+    """tiktoken 대역: get_encoding 호출 횟수를 센다"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def get_encoding(self, name):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self
+
+    def encode(self, text, disallowed_special="all"):
+        return text.split()
+
+
+def test_estimate_tokens_loads_the_encoder_once(monkeypatch):
+    fake = FakeTiktoken()
+    monkeypatch.setattr(prompt, "tiktoken", fake)
+    monkeypatch.setattr(prompt, "_encoding", None)
+    monkeypatch.setattr(prompt, "_encoding_loaded", False)
+
+    assert prompt.estimate_tokens("three word text") == 3
+    assert prompt.estimate_tokens("<|endoftext|> two") == 2
+    assert fake.calls == 1
+
+
+def test_estimate_tokens_falls_back_when_the_encoder_fails(monkeypatch, caplog):
+    fake = FakeTiktoken(OSError("download failed"))
+    monkeypatch.setattr(prompt, "tiktoken", fake)
+    monkeypatch.setattr(prompt, "_encoding", None)
+    monkeypatch.setattr(prompt, "_encoding_loaded", False)
+
+    assert prompt.estimate_tokens("x" * 10) == 3
+    assert prompt.estimate_tokens("x" * 10) == 3
+    # 실패는 한 번만 기록하고 다시 불러오지 않는다
+    assert fake.calls == 1
+    assert caplog.text.count("tiktoken encoding unavailable") == 1
@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from provider_health import ProviderHealth, QuotaLimits, next_reset
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _ts(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def clock():
+    return Clock(_ts(2024, 10, 31, 23, 0))
+
+
+@pytest.fixture
+def health(tmp_path, clock):
+    return ProviderHealth(
+        str(tmp_path / "news.db"),
+        limits={"newsapi": QuotaLimits(daily=2), "serpapi": QuotaLimits(monthly=3)},
+        failure_threshold=2,
+        cooldown=60,
+        max_cooldown=200,
+        clock=clock,
+    )
+
+
+def test_next_reset():
+    now = _ts(2024, 12, 31, 15, 30)
+    assert next_reset(now, "daily") == _ts(2025, 1, 1)
+    assert next_reset(now, "monthly") == _ts(2025, 1, 1)
+    assert next_reset(_ts(2024, 2, 10), "monthly") == _ts(2024, 3, 1)
+
+
+def test_daily_and_monthly_limits_reset(health, clock):
+    assert health.record_request("newsapi")
+    assert health.available("newsapi")
+    assert health.record_request("newsapi")
+    assert not health.available("newsapi")
+    assert health.status("newsapi")["state"] == "exhausted"
+    # 한도에 닿으면 더 요청하지 않고 세지도 않는다
+    assert not health.record_request("newsapi")
+    assert health.status("newsapi")["day_count"] == 2
+
+    for _ in range(3):
+        assert health.record_request("serpapi")
+    assert not health.available("serpapi")
+
+    # 다음 날(UTC)이면 일일 한도, 다음 달이면 월 한도가 풀린다
+    clock.now = _ts(2024, 11, 1, 0, 1)
+    assert health.available("newsapi")
+    assert health.available("serpapi")
+
+
+def test_quota_error_blocks_until_reset(health, clock):
+    health.record_failure("newsapi", "rateLimited", quota_exhausted=True)
+    health.record_failure("serpapi", "run out of searches", quota_exhausted=True)
+    clock.now += 1800
+    assert not health.available("newsapi")
+    assert health.status("newsapi")["last_error"] == "rateLimited"
+
+    clock.now = _ts(2024, 11, 1, 0, 0)
+    assert health.available("newsapi")
+    assert health.available("serpapi")
+
+
+def test_circuit_breaker_half_open(health, clock):
+    # 한도가 없는 공급자로 차단기만 확인
+    health.record_failure("gnews", "timeout")
+    assert health.available("gnews")
+    health.record_failure("gnews", "timeout")
+    assert health.status("gnews")["state"] == "open"
+    assert not health.available("gnews")
+
+    # 쿨다운 이후 한 번 시험 호출, 실패하면 두 배로 다시 연다
+    clock.now += 61
+    assert health.status("gnews")["state"] == "half_open"
+    assert health.available("gnews")
+    health.record_failure("gnews", "timeout")
+    clock.now += 61
+    assert not health.available("gnews")
+    clock.now += 60
+    assert health.available("gnews")
+
+    health.record_success("gnews")
+    state = health.status("gnews")
+    assert state["state"] == "closed"
+    assert state["failures"] == 0
+    # 닫힌 뒤에는 다시 임계치만큼 실패해야 열린다
+    health.record_failure("gnews", "timeout")
+    assert health.available("gnews")
+
+
+def test_state_persists_across_instances(health, clock, tmp_path):
+    health.record_failure("newsapi", "rateLimited", quota_exhausted=True)
+    reopened = ProviderHealth(str(tmp_path / "news.db"), clock=clock)
+    assert not reopened.available("newsapi")
+    assert reopened.available("unknown")
+
+
+def test_outcomes_do_not_count_requests(health):
+    # 요청 수는 record_request 로만 센다 (페이지마다 한 번)
+    health.record_request("newsapi")
+    health.record_success("newsapi")
+    health.record_failure("newsapi", "timeout")
+    assert health.status("newsapi")["day_count"] == 1
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from regime_filter import RegimeFilter, RegimeThresholds
+
+
+def make_ohlcv(close, volume=None):
+    close = np.asarray(close, dtype=float)
+    volume = np.full(len(close), 100.0) if volume is None else volume
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close * 1.003,
+            "low": close * 0.997,
+            "close": close,
+            "volume": volume,
+        },
+        index=pd.date_range("2024-01-01", periods=len(close), freq="D"),
+    )
+
+
+def ranging_df(n=30):
+    # 좁은 폭에서 오르내리는 가격, 일정한 거래량
+    return make_ohlcv(100 + 0.5 * np.sin(np.arange(n)))
+
+
+def test_range_bound_market_is_skipped():
+    regime_filter = RegimeFilter()
+    regime = regime_filter.should_skip(ranging_df())
+
+    assert regime is not None and regime.label == "ranging"
+    assert regime.metrics["adx"] < 20
+    assert regime.metrics["bandwidth"] < 0.08
+    assert regime_filter.stats == {"checked": 1, "skipped": 1}
+
+
+def test_trend_and_volume_spike_are_not_skipped():
+    regime_filter = RegimeFilter()
+    trending = make_ohlcv(100 * 1.02 ** np.arange(30))
+    assert regime_filter.should_skip(trending) is None
+    assert regime_filter.classify(trending).label == "trending"
+
+    # 횡보 중이라도 거래량이 급증하면 LLM 에 맡긴다
+    volume = np.full(30, 100.0)
+    volume[-2] = 500
+    assert regime_filter.should_skip(ranging_df().assign(volume=volume)) is None
+    assert regime_filter.stats == {"checked": 2, "skipped": 0}
+
+
+def test_in_progress_candle_is_ignored():
+    df = ranging_df()
+    # 진행 중인 마지막 캔들의 거래량은 아직 적다
+    df.iloc[-1, df.columns.get_loc("volume")] = 1
+    assert RegimeFilter().classify(df).metrics["volume_ratio"] == 1
+    assert RegimeFilter(completed_only=False).classify(df).metrics["volume_ratio"] < 1
+
+
+def test_short_history_and_disabled_filter():
+    assert RegimeFilter().classify(ranging_df(20)).label == "unknown"
+    assert RegimeFilter().should_skip(ranging_df(20)) is None
+    assert RegimeFilter(enabled=False).should_skip(ranging_df()) is None
+
+
+def test_thresholds_from_env(monkeypatch):
+    monkeypatch.setenv("REGIME_MAX_ADX", "5")
+    thresholds = RegimeThresholds.from_env()
+    assert thresholds.max_adx == 5
+    assert thresholds.max_bandwidth == RegimeThresholds().max_bandwidth
+    assert RegimeFilter(thresholds).should_skip(ranging_df()) is None
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from scheduler import EventScheduler, PriceMoveTrigger
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_interval_cadence_runs_job():
+    calls = []
+    scheduler = EventScheduler(lambda: calls.append(time.monotonic()))
+    scheduler.every(minutes=0.05 / 60)  # 50ms 간격
+    scheduler.start()
+    try:
+        assert wait_until(lambda: len(calls) >= 3)
+    finally:
+        scheduler.stop()
+    assert scheduler.metrics["runs"] >= 3
+    assert scheduler.metrics["last_reason"].startswith("every")
+
+
+def test_triggers_during_a_run_are_queued_once():
+    release = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        release.wait(2)
+
+    scheduler = EventScheduler(job)
+    scheduler.start()
+    try:
+        scheduler.trigger("first")
+        assert wait_until(lambda: len(calls) == 1)
+        # 실행 중 요청: 하나만 대기열에 남고 나머지는 skip
+        for _ in range(3):
+            scheduler.trigger("event")
+        release.set()
+        assert wait_until(lambda: scheduler.metrics["runs"] == 2)
+    finally:
+        scheduler.stop()
+
+    assert len(calls) == 2
+    assert scheduler.metrics["skipped"] == 2
+    assert scheduler.metrics["triggered"] == 4
+
+
+def test_daily_deadline_is_next_occurrence():
+    scheduler = EventScheduler(lambda: None)
+    scheduler.every_day_at("03:00")
+    deadline = scheduler.next_deadline()
+    assert 0 < deadline - time.time() <= 24 * 3600
+
+
+def test_price_move_trigger():
+    class Recorder:
+        def __init__(self):
+            self.reasons = []
+
+        def trigger(self, reason):
+            self.reasons.append(reason)
+
+    recorder = Recorder()
+    trigger = PriceMoveTrigger(recorder, threshold=0.03, cooldown=0)
+
+    for price in (100.0, 101.0, 102.0, 104.0, 104.5):
+        trigger({"type": "ticker", "code": "KRW-BTC", "trade_price": price})
+
+    assert len(recorder.reasons) == 1
+    assert trigger.reference == 104.0
+
+
+def test_failed_atr_lookup_is_cached():
+    calls = []
+
+    def atr():
+        calls.append(1)
+        raise ValueError("no hourly candles yet")
+
+    trigger = PriceMoveTrigger(
+        EventScheduler(lambda: None), threshold=0, atr_multiple=2, atr=atr
+    )
+    # 실패해도 예외 없이 넘어가고, atr_ttl 동안 다시 조회하지 않는다
+    for price in (100.0, 101.0, 102.0, 103.0):
+        trigger({"type": "ticker", "code": "KRW-BTC", "trade_price": price})
+    assert len(calls) == 1
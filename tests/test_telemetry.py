@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+import trading
+from llm_cache import LLMCache
+from llm_client import LLMClient
+from telemetry import (
+    call_cost,
+    daily_spend,
+    init_telemetry,
+    latency_percentiles,
+    record_llm_call,
+)
+from tests.fake_openai_server import FakeOpenAIServer
+
+USAGE = {
+    "prompt_tokens": 1000,
+    "completion_tokens": 500,
+    "completion_tokens_details": {"reasoning_tokens": 300},
+}
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    init_telemetry(conn)
+    yield conn
+    conn.close()
+
+
+def test_record_llm_call(conn):
+    record_llm_call(
+        conn,
+        "decision",
+        "o1-preview-2024-09-12",
+        12.5,
+        usage=USAGE,
+        retries=1,
+        market="KRW-BTC",
+        sections={"daily": 600, "hourly": 400, "news": 50, "orderbook": 80},
+    )
+    row = conn.execute(
+        """
+        SELECT model, prompt_tokens, completion_tokens, reasoning_tokens, latency,
+               retries, cache_hit, cost_usd, ohlcv_tokens, news_tokens,
+               orderbook_tokens
+        FROM llm_calls"""
+    ).fetchone()
+
+    # o1-preview: 입력 $15, 출력 $60 / 100만 토큰
+    assert row == (
+        "o1-preview-2024-09-12",
+        1000,
+        500,
+        300,
+        12.5,
+        1,
+        0,
+        pytest.approx(0.045),
+        1000,
+        50,
+        80,
+    )
+
+
+def test_cache_hits_cost_nothing(conn):
+    record_llm_call(conn, "reflection", "o1-preview", 0.01, usage=USAGE, cache_hit=True)
+    assert conn.execute("SELECT cost_usd FROM llm_calls").fetchone() == (0.0,)
+    assert call_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_latency_percentiles_and_daily_spend(conn):
+    for latency in range(1, 101):
+        record_llm_call(conn, "decision", "o1-preview", float(latency), usage=USAGE)
+    record_llm_call(conn, "decision", "o1-preview", 0.001, cache_hit=True)
+    record_llm_call(conn, "decision", "o1-preview", 500, error="timed out")
+    record_llm_call(conn, "reflection", "gpt-4o-mini", 1.0, usage=USAGE)
+
+    stats = latency_percentiles(conn, purpose="decision")
+    assert stats["count"] == 100
+    assert stats["p50"] == pytest.approx(50.5)
+    assert stats["p95"] == pytest.approx(95.05)
+    assert latency_percentiles(conn, model="o3")["p95"] is None
+
+    spend = daily_spend(conn)
+    assert list(spend["model"]) == ["gpt-4o-mini", "o1-preview"]
+    o1 = spend[spend["model"] == "o1-preview"].iloc[0]
+    assert o1["calls"] == 102
+    assert o1["cache_hits"] == 1
+    assert o1["cost_usd"] == pytest.approx(100 * 0.045)
+
+
+def test_chat_records_calls(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    trading.init_db().close()
+    messages = [{"role": "user", "content": "hi"}]
+
+    with FakeOpenAIServer(failures={"o1-preview": [500]}) as server:
+        monkeypatch.setattr(
+            trading,
+            "llm_client",
+            LLMClient(api_key="test", base_url=server.base_url, backoff=0.01),
+        )
+        monkeypatch.setattr(trading, "llm_cache", LLMCache(str(tmp_path / "c.db")))
+        trading.chat("reflection", "o1-preview", messages, market="KRW-BTC")
+        list(trading.chat_stream("decision", "o1-preview", messages, "KRW-BTC"))
+
+    with sqlite3.connect("bitcoin_trades.db") as conn:
+        rows = conn.execute(
+            "SELECT purpose, retries, cache_hit, prompt_tokens FROM llm_calls"
+        ).fetchall()
+    # 두 번째 호출은 같은 요청이라 캐시에서 응답
+    assert rows == [("reflection", 1, 0, 10), ("decision", 0, 1, 10)]
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from upbit_gateway import TokenBucket, UpbitGateway
+
+
+class FakeResponse:
+    def __init__(
+        self, payload, status_code=200, remaining="group=ticker; min=599; sec=9"
+    ):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = {"Remaining-Req": remaining}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """requests.Session 대신 응답을 순서대로 돌려주는 테스트용 세션"""
+
+    def __init__(self, responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.calls = []
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs.get("params")))
+        time.sleep(self.delay)
+        return self.responses.pop(0)
+
+
+TICKER = [{"market": "KRW-BTC", "trade_price": 90000000.0}]
+
+
+def test_identical_reads_are_coalesced():
+    session = FakeSession([FakeResponse(TICKER)], delay=0.1)
+    gateway = UpbitGateway(session=session, coalesce_window=1.0)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(gateway.get_current_price()))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 윈도우 안의 후속 요청도 같은 응답을 재사용
+    results.append(gateway.get_current_price("KRW-BTC"))
+
+    assert results == [90000000.0] * 6
+    assert len(session.calls) == 1
+    assert gateway.stats["coalesced"] == 5
+
+
+def test_rate_limited_response_is_retried():
+    session = FakeSession([FakeResponse({}, status_code=429), FakeResponse(TICKER)])
+    gateway = UpbitGateway(session=session, coalesce_window=0)
+
+    assert gateway.get_current_price() == 90000000.0
+    assert gateway.stats["throttled"] == 1
+    assert len(session.calls) == 2
+
+
+def test_remaining_req_header_clamps_bucket():
+    session = FakeSession(
+        [FakeResponse(TICKER, remaining="group=ticker; min=599; sec=0")]
+    )
+    gateway = UpbitGateway(session=session, coalesce_window=0)
+
+    gateway.get_current_price()
+
+    assert gateway.buckets["ticker"].tokens < 1
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # 첫 요청 이후 4번은 1/20초 간격
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.08)
+
+
+def test_get_ohlcv_returns_pyupbit_shaped_frame():
+    candles = [
+        {
+            "candle_date_time_utc": f"2024-10-20T0{h}:00:00",
+            "candle_date_time_kst": f"2024-10-20T{h + 9}:00:00",
+            "opening_price": 1.0 + h,
+            "high_price": 2.0 + h,
+            "low_price": 0.5 + h,
+            "trade_price": 1.5 + h,
+            "candle_acc_trade_volume": 10.0,
+            "candle_acc_trade_price": 15.0,
+        }
+        for h in (2, 1)
+    ]
+    gateway = UpbitGateway(session=FakeSession([FakeResponse(candles)]))
+
+    df = gateway.get_ohlcv("KRW-BTC", interval="minute60", count=2)
+
+    assert list(df.columns) == ["open", "high", "low", "close", "volume", "value"]
+    assert df.index.is_monotonic_increasing
+    assert df["close"].tolist() == [2.5, 3.5]
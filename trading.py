@@ -1,27 +1,44 @@
 ## TODO
 # 코드 완성해서 실행까지 시켜보기 누락된 부분들 추가하기
 
-import json
+import functools
+import hashlib
 import logging
 import os
-import re
 import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from sqlite3.dbapi2 import Connection
+from typing import Dict, Optional
 
-import openai
 import pandas as pd
-import pyupbit
 import requests
-import schedule
-import ta
 from dotenv import load_dotenv
-from openai import OpenAI
 from ta.utils import dropna
 
 import prompt
-from news_factory_excute import fetch_and_save_news
+from article_store import article_store
+from candle_store import CandleStore
+from decision_parser import StreamingDecisionParser, extract_json_object
+from indicators import (
+    DAILY_PIPELINE,
+    DEFAULT_PIPELINE,
+    HOURLY_PIPELINE,
+    INDICATOR_WARMUP,
+    IndicatorPipeline,
+)
+from live_feed import MarketFeed
+from llm_cache import LLMCache
+from llm_client import LLMClient
+from market_data import MarketSnapshot, gather_market_snapshot
+from news_factory_excute import NEWS_TOP_K, NEWS_WINDOW_HOURS, fetch_and_save_news
+from news_prefetch import NewsPrefetcher
+from regime_filter import RegimeFilter, RegimeThresholds
+from scheduler import EventScheduler, PriceMoveTrigger
+from telemetry import init_telemetry, record_llm_call
+from upbit_gateway import UpbitGateway
 
 load_dotenv()
 
@@ -32,7 +49,54 @@ logger = logging.getLogger(__name__)
 # # 4. Execute trade decision using Upbit API
 access = os.getenv("UPBIT_ACCESS_KEY")
 secret = os.getenv("UPBIT_SECRET_KEY")
-upbit = pyupbit.Upbit(access, secret)
+# 모든 Upbit REST 호출은 gateway 를 거친다 (커넥션 풀, 요청 제한, 중복 요청 병합)
+upbit = UpbitGateway(access, secret)
+
+candle_store = CandleStore(fetcher=upbit.get_ohlcv)
+
+# 운용할 마켓 목록 (예: TRADING_MARKETS=KRW-BTC,KRW-ETH)
+MARKETS = os.getenv("TRADING_MARKETS", "KRW-BTC").split(",")
+# 사용자 프롬프트 토큰 예산 (미설정 시 제한 없음)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "0")) or None
+
+# 횡보장 사전 필터 (REGIME_FILTER=false 로 끔, 기준값은 REGIME_MAX_ADX 등)
+regime_filter = RegimeFilter(
+    RegimeThresholds.from_env(),
+    enabled=os.getenv("REGIME_FILTER", "true").lower() == "true",
+)
+
+# 결정 응답을 스트리밍으로 받아 결정이 나오는 즉시 주문 (STREAM_DECISIONS=false 로 끔)
+STREAM_DECISIONS = os.getenv("STREAM_DECISIONS", "true").lower() == "true"
+
+# 모든 LLM 호출이 공유하는 클라이언트 (호출별 제한 시간, 재시도, 대체 모델 헤징)
+llm_client = LLMClient(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    deadline=float(os.getenv("LLM_DEADLINE_SECONDS", "180")),
+    hedge_model=os.getenv("LLM_HEDGE_MODEL") or None,
+)
+
+# LLM 응답 캐시 (LLM_CACHE_MODE=readwrite|replay|off)
+llm_cache = LLMCache(mode=os.getenv("LLM_CACHE_MODE", "readwrite"))
+
+# 실시간 시세/호가 캐시 (시작 전에는 REST 로 조회)
+market_feed = MarketFeed(MARKETS, rest=upbit)
+
+# 정기 실행 시각 (뉴스는 이보다 조금 먼저 미리 가져온다)
+TRADING_TIMES = ("03:00", "09:00", "15:00", "21:00")
+# 뉴스 헤드라인 캐시 (시작 전이거나 오래되면 호출 시 동기적으로 가져온다)
+news_prefetcher = NewsPrefetcher(fetch_and_save_news)
+
+# 같은 마켓의 실행은 겹치지 않게, 주문은 KRW 잔고를 공유하므로 한 번에 하나씩
+_market_locks = {}
+_market_locks_guard = threading.Lock()
+_order_lock = threading.Lock()
+
+# 회고 생성은 결정 경로 밖에서 한 번에 하나씩
+_reflection_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="reflection"
+)
+_pending_reflections = set()
+_reflection_guard = threading.Lock()
 
 
 def init_db():
@@ -49,9 +113,25 @@ def init_db():
               krw_balance REAL,
               btc_avg_buy_price REAL,
               btc_krw_price REAL,
-              reflection TEXT)
+              reflection TEXT,
+              market TEXT DEFAULT 'KRW-BTC')
+              """)
+    # 이전 버전 DB 에는 market 컬럼이 없다
+    columns = {row[1] for row in c.execute("PRAGMA table_info(trades)")}
+    if "market" not in columns:
+        c.execute("ALTER TABLE trades ADD COLUMN market TEXT DEFAULT 'KRW-BTC'")
+    # 거래 기록이 바뀔 때마다 백그라운드에서 만들어 두는 회고
+    c.execute("""
+              CREATE TABLE IF NOT EXISTS reflections
+              (id INTEGER PRIMARY KEY AUTOINCREMENT,
+              market TEXT NOT NULL,
+              trades_hash TEXT NOT NULL,
+              reflection TEXT,
+              created_at TEXT,
+              UNIQUE (market, trades_hash))
               """)
     conn.commit()
+    init_telemetry(conn)
     return conn
 
 
@@ -65,14 +145,16 @@ def log_trade(
     btc_avg_buy_price,
     btc_krw_price,
     reflection,
+    market="KRW-BTC",
 ):
+    # btc_* 컬럼은 해당 마켓 코인의 잔고/평단/가격을 뜻한다
     c = conn.cursor()
     timestamp = datetime.now().isoformat()
     c.execute(
         """
             INSERT INTO trades
-            (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection, market)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
         (
             timestamp,
             decision,
@@ -83,18 +165,27 @@ def log_trade(
             btc_avg_buy_price,
             btc_krw_price,
             reflection,
+            market,
         ),
     )
     conn.commit()
 
 
-def get_recent_trades(conn: Connection, days=7):
+def get_recent_trades(conn: Connection, days=7, market=None):
     c = conn.cursor()
     days_ago = (datetime.now() - timedelta(days=days)).isoformat()
 
-    c.execute(
-        "SELECT * FROM trades WHERE timestamp > ? ORDER BY timestamp DESC", (days_ago,)
-    )
+    if market is None:
+        c.execute(
+            "SELECT * FROM trades WHERE timestamp > ? ORDER BY timestamp DESC",
+            (days_ago,),
+        )
+    else:
+        c.execute(
+            "SELECT * FROM trades WHERE timestamp > ? AND market = ? "
+            "ORDER BY timestamp DESC",
+            (days_ago, market),
+        )
 
     columns = [column[0] for column in c.description]
     return pd.DataFrame.from_records(data=c.fetchall(), columns=columns)
@@ -116,90 +207,45 @@ def get_fear_and_greed_index():
         return None
 
 
-def add_indicators(df: pd.DataFrame):
-    # 볼린저 밴드 (20일 윈도우)
-    df["bb_bbm"] = ta.volatility.BollingerBands(
-        close=df["close"], window=20, window_dev=2
-    ).bollinger_mavg()
-    df["bb_bbh"] = ta.volatility.BollingerBands(
-        close=df["close"], window=20, window_dev=2
-    ).bollinger_hband()
-    df["bb_bbl"] = ta.volatility.BollingerBands(
-        close=df["close"], window=20, window_dev=2
-    ).bollinger_lband()
-
-    # RSI (14일 윈도우)
-    df["rsi"] = ta.momentum.RSIIndicator(close=df["close"], window=14).rsi()
-
-    # MACD (기본 설정 12, 26, 9)
-    macd = ta.trend.MACD(
-        close=df["close"], window_slow=26, window_fast=12, window_sign=9
-    )
-    df["macd"] = macd.macd()
-    df["macd_signal"] = macd.macd_signal()
-    df["macd_diff"] = macd.macd_diff()
-
-    # 단순 이동 평균 (20일)
-    df["sma_20"] = ta.trend.SMAIndicator(close=df["close"], window=20).sma_indicator()
-
-    # 지수 이동 평균 (12일)
-    df["ema_12"] = ta.trend.EMAIndicator(close=df["close"], window=12).ema_indicator()
-
-    # Stochastic Oscillator (14일)
-    stoch = ta.momentum.StochasticOscillator(
-        high=df["high"], low=df["low"], close=df["close"], window=14, smooth_window=3
-    )
-    df["stoch_k"] = stoch.stoch()
-    df["stoch_d"] = stoch.stoch_signal()
-
-    # Average True Range (ATR) (14일)
-    df["atr"] = ta.volatility.AverageTrueRange(
-        high=df["high"], low=df["low"], close=df["close"], window=14
-    ).average_true_range()
-
-    # On-Balance Volume (OBV)
-    df["obv"] = ta.volume.OnBalanceVolumeIndicator(
-        close=df["close"], volume=df["volume"]
-    ).on_balance_volume()
-
-    # df = df.fillna(df.mean())
-
-    return df
+def add_indicators(df: pd.DataFrame, pipeline: IndicatorPipeline = DEFAULT_PIPELINE):
+    # 볼린저 밴드(20), RSI(14), MACD(12, 26, 9), SMA(20), EMA(12),
+    # Stochastic(14, 3), ATR(14), OBV - 공통 중간값(EMA 12, 20일 평균)은 한 번만 계산
+    return pipeline.apply(df)
 
 
 def parser_ai_response(response_json_text):
-    try:
-        json_match = re.search(r"\{.*?\}", response_json_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-            parsed_json = json.loads(json_str)
-            decision = parsed_json.get("decision").upper()
-            percentage = parsed_json.get("percentage")
-            reason = parsed_json.get("reason")
-            return {"decision": decision, "percentage": percentage, "reason": reason}
-        else:
-            logger.error("No JSON found in AI response.")
-            return None
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parsing error: {e}")
+    # 중첩된 중괄호가 있어도 첫 번째 완전한 JSON 객체를 읽는다
+    parsed_json = extract_json_object(response_json_text)
+    if parsed_json is None:
+        logger.error("No JSON found in AI response.")
+        return None
+    decision = parsed_json.get("decision")
+    if not isinstance(decision, str):
+        logger.error("No decision in AI response.")
         return None
+    percentage = parsed_json.get("percentage")
+    reason = parsed_json.get("reason")
+    return {"decision": decision.upper(), "percentage": percentage, "reason": reason}
 
 
-def calculate_performance(trades_df: pd.DataFrame):
+def calculate_performance(trades_df: pd.DataFrame, market="KRW-BTC"):
     if trades_df.empty:
         return 0
-    initial_balance = trades_df.iloc[-1]["krw_balance"] + trades_df.iloc[-1][
-        "btc_balance"
-    ] * pyupbit.get_current_price("KRW-BTC")
+    current_price = market_feed.get_current_price(market)
+    initial_balance = (
+        trades_df.iloc[-1]["krw_balance"]
+        + trades_df.iloc[-1]["btc_balance"] * current_price
+    )
 
-    final_balance = trades_df.iloc[0]["krw_balance"] + trades_df.iloc[0][
-        "btc_balance"
-    ] * pyupbit.get_current_price("KRW-BTC")
+    final_balance = (
+        trades_df.iloc[0]["krw_balance"]
+        + trades_df.iloc[0]["btc_balance"] * current_price
+    )
 
     return (final_balance - initial_balance) / initial_balance * 100
 
 
-def excute_trade(decision, percentage):
+def excute_trade(decision, percentage, market="KRW-BTC"):
     if decision == "BUY":
         my_krw = upbit.get_balance("KRW")
         if my_krw is None:
@@ -210,7 +256,7 @@ def excute_trade(decision, percentage):
         if buy_amount > 5000:
             logger.info(f"Buy Order Executed: {percentage}% of available KRW")
             try:
-                order = upbit.buy_market_order("KRW-BTC", buy_amount)
+                order = upbit.buy_market_order(market, buy_amount)
                 if order:
                     logger.info(f"Buy order executed successfully: {order}")
                     order_executed = True
@@ -222,17 +268,17 @@ def excute_trade(decision, percentage):
             logger.warning("Buy Order Failed: Insufficient KRW (less than 5000 KRW)")
 
     elif decision == "SELL":
-        my_btc = upbit.get_balance("KRW-BTC")
+        my_btc = upbit.get_balance(market)
         if my_btc is None:
             logger.error("Failed to retrieve BTC balance.")
             return
 
         sell_amount = my_btc * (percentage / 100)
-        current_price = pyupbit.get_current_price("KRW-BTC")
+        current_price = market_feed.get_current_price(market)
         if sell_amount * current_price > 5000:
             logger.info(f"Sell Order Executed: {percentage}% of held BTC")
             try:
-                order = upbit.sell_market_order("KRW-BTC", sell_amount)
+                order = upbit.sell_market_order(market, sell_amount)
                 if order:
                     logger.info(f"Sell order executed successfully: {order}")
                     order_executed = True
@@ -262,9 +308,128 @@ def get_reflection_from_db(conn: Connection):
     return c.fetchone()
 
 
-def get_reflection(trades_df, current_market_data):
-    response = openai.chat.completions.create(
+def trades_fingerprint(trades_df: pd.DataFrame) -> str:
+    return hashlib.sha256(trades_df.to_json(orient="records").encode()).hexdigest()
+
+
+def save_reflection(conn: Connection, market, trades_hash, reflection):
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO reflections (market, trades_hash, reflection, created_at)
+        VALUES (?, ?, ?, ?)""",
+        (market, trades_hash, reflection, datetime.now().isoformat()),
+    )
+    conn.commit()
+
+
+def get_latest_reflection(conn: Connection, market="KRW-BTC"):
+    """(reflection, trades_hash) most recently generated for ``market``, or None."""
+    return conn.execute(
+        """
+        SELECT reflection, trades_hash FROM reflections
+        WHERE market = ? ORDER BY id DESC LIMIT 1""",
+        (market,),
+    ).fetchone()
+
+
+def refresh_reflection(conn: Connection, current_market_data, market="KRW-BTC"):
+    """
+    Generate and store a reflection on the recent trades of ``market``,
+    unless one already exists for exactly this trade history.
+    """
+    trades_df = get_recent_trades(conn, market=market)
+    trades_hash = trades_fingerprint(trades_df)
+    latest = get_latest_reflection(conn, market)
+    if latest is not None and latest[1] == trades_hash:
+        return latest[0]
+
+    reflection = get_reflection(trades_df, current_market_data, market)
+    if reflection is not None:
+        save_reflection(conn, market, trades_hash, reflection)
+    return reflection
+
+
+def schedule_reflection(current_market_data, market="KRW-BTC"):
+    """Refresh the reflection of ``market`` in the background after a trade."""
+    with _reflection_guard:
+        # 이미 대기 중인 작업이 최신 거래 기록을 읽는다
+        if market in _pending_reflections:
+            return None
+        _pending_reflections.add(market)
+
+    def task():
+        try:
+            with _reflection_guard:
+                _pending_reflections.discard(market)
+            with sqlite3.connect("bitcoin_trades.db") as conn:
+                return refresh_reflection(conn, current_market_data, market)
+        except Exception as e:
+            logger.error(f"Error generating reflection for {market}: {e}")
+
+    return _reflection_executor.submit(task)
+
+
+def _record_llm_call(purpose, model, market, start, info, sections, error=None):
+    try:
+        with sqlite3.connect("bitcoin_trades.db") as conn:
+            record_llm_call(
+                conn,
+                purpose,
+                info.get("model") or model,
+                # 스트리밍은 소비자 처리 시간을 뺀 LLM 지연을 info 에 남긴다
+                info.get("latency", time.monotonic() - start),
+                usage=info.get("usage"),
+                retries=info.get("retries", 0),
+                cache_hit=info.get("cache_hit", False),
+                hedged=info.get("hedged", False),
+                market=market,
+                sections=sections,
+                error=error,
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Error recording LLM call: {e}")
+
+
+def chat(purpose, model, messages, market=None, sections=None):
+    """LLM call through the cache and shared client, recorded in ``llm_calls``."""
+    info = {}
+    start = time.monotonic()
+    try:
+        response = llm_cache.create(
+            functools.partial(llm_client.create, info=info),
+            model=model,
+            messages=messages,
+            info=info,
+        )
+    except Exception as e:
+        _record_llm_call(purpose, model, market, start, info, sections, str(e))
+        raise
+    _record_llm_call(purpose, model, market, start, info, sections)
+    return response
+
+
+def chat_stream(purpose, model, messages, market=None, sections=None):
+    """Streaming ``chat``: yields text chunks, recorded once the stream ends."""
+    info = {}
+    start = time.monotonic()
+    try:
+        yield from llm_cache.stream(
+            functools.partial(llm_client.create, info=info),
+            model=model,
+            messages=messages,
+            info=info,
+        )
+    except Exception as e:
+        _record_llm_call(purpose, model, market, start, info, sections, str(e))
+        raise
+    _record_llm_call(purpose, model, market, start, info, sections)
+
+
+def get_reflection(trades_df, current_market_data, market="KRW-BTC"):
+    response = chat(
+        "reflection",
         model="o1-preview",
+        market=market,
         messages=[
             {
                 "role": "user",
@@ -279,7 +444,7 @@ def get_reflection(trades_df, current_market_data):
                 Current market data:
                 {current_market_data}
 
-                Overall performance in the last 7 days: {calculate_performance(trades_df):.2f}%
+                Overall performance in the last 7 days: {calculate_performance(trades_df, market):.2f}%
 
                 Please analyze this data and provide:
                 1. A brief reflection on the recent trading decisions
@@ -301,45 +466,218 @@ def get_reflection(trades_df, current_market_data):
         return None
 
 
-def ai_trading():
-    global upbit
-
-    all_balances = upbit.get_balances()
-
-    filtered_balances = [
-        balance for balance in all_balances if balance["currency"] in ["BTC", "KRW"]
-    ]
-
-    orderbook = pyupbit.get_orderbook("KRW-BTC")
-
-    df_daily: pd.DataFrame = pyupbit.get_ohlcv("KRW-BTC", interval="day", count=30)
+def get_daily_ohlcv(market="KRW-BTC", count=30):
+    # 지표 warm-up 용 캔들을 더 받아 계산한 뒤 최근 count 개만 남긴다
+    df_daily: pd.DataFrame = candle_store.get_ohlcv(
+        market, interval="day", count=count + INDICATOR_WARMUP
+    )
     df_daily = dropna(df_daily)
 
     df_daily.index = df_daily.index.strftime("%Y%m%d")
-    df_daily = add_indicators(df_daily)
+    return add_indicators(df_daily, DAILY_PIPELINE).iloc[-count:]
+
 
-    df_hourly: pd.DataFrame = pyupbit.get_ohlcv(
-        "KRW-BTC", interval="minute60", count=24
+def get_hourly_ohlcv(market="KRW-BTC", count=24):
+    df_hourly: pd.DataFrame = candle_store.get_ohlcv(
+        market, interval="minute60", count=count + INDICATOR_WARMUP
     )
     # df_daily.index = pd.to_datetime(df_daily.index // 1000, unit="s")
     df_hourly.index = df_hourly.index.strftime("%Y%m%d%H")
 
-    df_hourly = add_indicators(df_hourly)
+    return add_indicators(df_hourly, HOURLY_PIPELINE).iloc[-count:]
+
+
+def hourly_atr(market="KRW-BTC", count=24) -> Optional[float]:
+    """Latest hourly ATR(14) from stored candles, or None if there are too few."""
+    df = candle_store.load(market, "minute60", count)
+    # ATR(14) 는 15번째 캔들부터 의미가 있다
+    if len(df) < 15:
+        return None
+    atr = add_indicators(df, HOURLY_PIPELINE)["atr"].iloc[-1]
+    return None if pd.isna(atr) else float(atr)
+
+
+# 모든 마켓이 함께 쓰는 입력
+SHARED_SOURCES = ("balances", "fear_greed_index", "news_headlines")
+
+
+def get_shared_sources():
+    return {
+        "balances": upbit.get_balances,
+        "fear_greed_index": get_fear_and_greed_index,
+        # serpapi.com, 백그라운드에서 미리 받아 둔 캐시
+        "news_headlines": news_prefetcher.headlines,
+    }
+
+
+def search_headlines(market):
+    try:
+        start = time.perf_counter()
+        headlines = prompt.retrieve_headlines(
+            article_store, market, k=NEWS_TOP_K, hours=NEWS_WINDOW_HOURS
+        )
+        logger.info(
+            "[%s] News search took %.1fms", market, (time.perf_counter() - start) * 1000
+        )
+        return headlines
+    except sqlite3.Error as e:
+        logger.error("[%s] News search failed: %s", market, e)
+        return None
+
+
+def _coin_balances(balances, coin):
+    """(coin balance, KRW balance, coin average buy price) from ``get_balances``."""
+    btc_balance = next(
+        (
+            float(balance["balance"])
+            for balance in balances
+            if balance["currency"] == coin
+        ),
+        0,
+    )
+    krw_balance = next(
+        (
+            float(balance["balance"])
+            for balance in balances
+            if balance["currency"] == "KRW"
+        ),
+        0,
+    )
+    btc_avg_buy_price = next(
+        (
+            float(balance["avg_buy_price"])
+            for balance in balances
+            if balance["currency"] == coin
+        ),
+        0,
+    )
+    return btc_balance, krw_balance, btc_avg_buy_price
+
+
+def hold_without_llm(market, balances, reason):
+    """Log a HOLD decided locally, without calling the LLM or placing an order."""
+    coin = market.split("-")[1]
+    btc_balance, krw_balance, btc_avg_buy_price = _coin_balances(balances, coin)
+    with sqlite3.connect("bitcoin_trades.db") as conn:
+        log_trade(
+            conn,
+            "HOLD",
+            0,
+            reason,
+            btc_balance,
+            krw_balance,
+            btc_avg_buy_price,
+            market_feed.get_current_price(market),
+            None,
+            market,
+        )
+
+
+def stream_decision(parser: StreamingDecisionParser, messages, market, sections):
+    """
+    Stream the decision call into ``parser`` and place the order as soon as
+    the signal is complete. Returns whether an order was placed; once it
+    was, a broken stream no longer raises so the trade still gets logged.
+    """
+    executed = False
+    try:
+        for text in chat_stream(
+            "decision",
+            model="o1-preview",
+            messages=messages,
+            market=market,
+            sections=sections,
+        ):
+            signal = parser.feed(text)
+            if signal is not None:
+                # reason 이 끝나기 전에 결정이 나오면 바로 주문한다
+                logger.info(
+                    "[%s] AI Decision (streamed): %s %s%%",
+                    market,
+                    signal["decision"],
+                    signal["percentage"],
+                )
+                with _order_lock:
+                    excute_trade(
+                        decision=signal["decision"],
+                        percentage=signal["percentage"],
+                        market=market,
+                    )
+                executed = True
+    except Exception as e:
+        if not executed:
+            raise
+        logger.error("[%s] Decision stream failed after the order: %s", market, e)
+    return executed
+
+
+def executed_decision(signal: Dict, final: Optional[Dict]) -> Dict:
+    """
+    The decision to log for an order placed from the streamed ``signal``:
+    always the executed decision and percentage, with the final reason only
+    when the full response agrees with it.
+    """
+    agrees = final is not None and (final["decision"], final["percentage"]) == (
+        signal["decision"],
+        signal["percentage"],
+    )
+    return {**signal, "reason": final["reason"] if agrees else None}
+
 
-    fear_greed_index = get_fear_and_greed_index()
+def ai_trading(market="KRW-BTC", shared: Optional[MarketSnapshot] = None):
+    global upbit
 
-    # serpapi.com
-    news_headlines = fetch_and_save_news()
+    coin = market.split("-")[1]
+
+    # 네트워크 I/O 를 병렬로 수행해 가장 느린 소스만큼만 기다린다
+    sources = {
+        "orderbook": lambda: market_feed.get_orderbook(market),
+        "df_daily": lambda: get_daily_ohlcv(market),
+        "df_hourly": lambda: get_hourly_ohlcv(market),
+    }
+    if shared is None:
+        sources.update(get_shared_sources())
+    snapshot = gather_market_snapshot(sources)
+    if shared is not None:
+        snapshot.update_from(shared, SHARED_SOURCES)
+
+    missing = snapshot.missing("balances", "df_daily", "df_hourly")
+    if missing:
+        logger.error("Skipping %s run, missing market data: %s", market, missing)
+        return
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    filtered_balances = [
+        balance for balance in snapshot.balances if balance["currency"] in [coin, "KRW"]
+    ]
+
+    orderbook = snapshot.orderbook
+    df_daily = snapshot.df_daily
+    df_hourly = snapshot.df_hourly
+    fear_greed_index = snapshot.fear_greed_index
+    # 저장된 기사에서 시장 이슈와 관련된 헤드라인을 찾고, 없으면 수집 결과를 쓴다
+    news_headlines = search_headlines(market) or snapshot.news_headlines
+
+    # 뚜렷한 횡보장이면 LLM 호출 없이 HOLD
+    regime = regime_filter.should_skip(df_daily)
+    if regime is not None:
+        logger.info(
+            "[%s] Ranging market, holding without LLM call (%s skipped so far): %s",
+            market,
+            regime_filter.stats["skipped"],
+            regime.describe(),
+        )
+        hold_without_llm(
+            market,
+            snapshot.balances,
+            "Regime filter: range-bound market (" + ", ".join(regime.reasons) + ")",
+        )
+        return
 
-    if not client.api_key:
+    if not os.getenv("OPENAI_API_KEY"):
         logger.error("OpenAI API key is missing or invalid.")
 
     try:
         with sqlite3.connect("bitcoin_trades.db") as conn:
-            recent_trades = get_recent_trades(conn)
-
             current_market_date = {
                 "feer_greed_index": fear_greed_index,
                 "news_headlines": news_headlines,
@@ -348,80 +686,86 @@ def ai_trading():
                 "hourly_ohlcv": df_hourly.to_dict(),
             }
 
-            reflection = get_reflection(recent_trades, current_market_date)
-
-            response = client.chat.completions.create(
-                model="o1-preview",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": (prompt.get_system_prompt(reflection)),
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt.get_user_prompt(
-                                    df_daily,
-                                    df_hourly,
-                                    filtered_balances,
-                                    orderbook,
-                                    news_headlines,
-                                    fear_greed_index,
-                                ),
-                            }
-                        ],
-                    },
-                ],
+            # 직전 거래 후 백그라운드에서 만들어 둔 회고를 사용한다
+            latest = get_latest_reflection(conn, market)
+            if latest is not None:
+                reflection = latest[0]
+            else:
+                reflection = refresh_reflection(conn, current_market_date, market)
+
+            user_prompt, prompt_tokens = prompt.build_user_prompt(
+                df_daily,
+                df_hourly,
+                filtered_balances,
+                orderbook,
+                news_headlines,
+                fear_greed_index,
+                token_budget=PROMPT_TOKEN_BUDGET,
             )
-
-            response_text = response.choices[0].message.content
-
-            parsed_response = parser_ai_response(response_text)
-
-            # parsed_response = {"decision": "HOLD", "percentage": 0, "reason": "test"}
+            logger.info("[%s] Prompt tokens: %s", market, prompt_tokens)
+
+            messages = [
+                {
+                    "role": "user",
+                    "content": (prompt.get_system_prompt(reflection)),
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": user_prompt,
+                        }
+                    ],
+                },
+            ]
+
+            parser = StreamingDecisionParser()
+            executed = False
+            if STREAM_DECISIONS:
+                executed = stream_decision(parser, messages, market, prompt_tokens)
+            else:
+                response = chat(
+                    "decision",
+                    model="o1-preview",
+                    messages=messages,
+                    market=market,
+                    sections=prompt_tokens,
+                )
+                parser.feed(response.choices[0].message.content or "")
+
+            parsed_response = parser.finish()
+            if executed:
+                parsed_response = executed_decision(parser.signal, parsed_response)
+            if parsed_response is None:
+                # 해석할 수 없는 응답은 주문 없이 HOLD 로 기록한다
+                parsed_response = {
+                    "decision": "HOLD",
+                    "percentage": 0,
+                    "reason": "Unparseable AI response",
+                }
 
             decision = parsed_response.get("decision")
             percentage = parsed_response.get("percentage")
             reason = parsed_response.get("reason")
 
-            logger.info("AI Decision: %s", decision.upper())
+            logger.info("[%s] AI Decision: %s", market, decision.upper())
             logger.info("percentage: %s", percentage)
             logger.info("Decision reason: %s", reason)
 
             order_excuted = False
 
-            result = excute_trade(decision=decision, percentage=percentage)
+            if not executed:
+                with _order_lock:
+                    result = excute_trade(
+                        decision=decision, percentage=percentage, market=market
+                    )
 
             time.sleep(2)
             balances = upbit.get_balances()
-            btc_balance = next(
-                (
-                    float(balance["balance"])
-                    for balance in balances
-                    if balance["currency"] == "BTC"
-                ),
-                0,
-            )
-            krw_balance = next(
-                (
-                    float(balance["balance"])
-                    for balance in balances
-                    if balance["currency"] == "KRW"
-                ),
-                0,
-            )
-            btc_avg_buy_price = next(
-                (
-                    float(balance["avg_buy_price"])
-                    for balance in balances
-                    if balance["currency"] == "BTC"
-                ),
-                0,
-            )
+            btc_balance, krw_balance, btc_avg_buy_price = _coin_balances(balances, coin)
 
-            current_btc_price = pyupbit.get_current_price("KRW-BTC")
+            current_btc_price = market_feed.get_current_price(market)
 
             log_trade(
                 conn,
@@ -433,38 +777,88 @@ def ai_trading():
                 btc_avg_buy_price,
                 current_btc_price,
                 reflection,
+                market,
             )
 
+        schedule_reflection(current_market_date, market)
+
     except sqlite3.Error as e:
         logger.error(f"Database connection error: {e}")
         return
 
 
-if __name__ == "__main__":
-    init_db()
-    load_dotenv()
+def _market_lock(market):
+    with _market_locks_guard:
+        return _market_locks.setdefault(market, threading.Lock())
 
-    trading_in_progress = False
 
-    def job():
-        global trading_in_progress
-        if trading_in_progress:
-            logger.warning("Trading job is already in progress, skipping this run")
-            return
+def _run_market(market, shared: MarketSnapshot):
+    lock = _market_lock(market)
+    if not lock.acquire(blocking=False):
+        logger.warning("Trading run for %s is already in progress, skipping", market)
+        return
+    try:
+        ai_trading(market, shared)
+    finally:
+        lock.release()
+
+
+def run_markets(markets=None, max_workers=4):
+    """
+    Run the decision pipeline for every market in a thread pool.
+
+    News, the Fear & Greed index and balances are fetched once and shared;
+    each market gathers its own orderbook and candles and logs its own trade.
+    """
+    markets = markets or MARKETS
+    shared = gather_market_snapshot(get_shared_sources())
+    if shared.balances is None:
+        logger.error("Skipping trading run, balances unavailable")
+        return
 
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(markets)), thread_name_prefix="market"
+    ) as executor:
+        futures = {
+            executor.submit(_run_market, market, shared): market for market in markets
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"An error occurred in {futures[future]}: {e}")
+
+
+if __name__ == "__main__":
+    init_db()
+    load_dotenv()
+    # 가격 이벤트의 ATR 계산용 시간봉을 피드 시작 전에 채워 둔다
+    for market in MARKETS:
         try:
-            trading_in_progress = True
-            ai_trading()
+            candle_store.sync(market, "minute60", 24)
         except Exception as e:
-            logger.error(f"An error occurred: {e}")
-        finally:
-            trading_in_progress = False
-
-    schedule.every().day.at("03:00").do(job)
-    schedule.every().day.at("09:00").do(job)
-    schedule.every().day.at("15:00").do(job)
-    schedule.every().day.at("21:00").do(job)
-
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+            logger.error("Hourly candle backfill failed for %s: %s", market, e)
+    market_feed.start()
+    news_prefetcher.start(daily_at=TRADING_TIMES)
+
+    scheduler = EventScheduler(run_markets)
+    scheduler.every_day_at(*TRADING_TIMES)
+
+    # 추가 주기 (분 단위, 예: TRADING_INTERVAL_MINUTES=30)
+    interval_minutes = os.getenv("TRADING_INTERVAL_MINUTES")
+    if interval_minutes:
+        scheduler.every(minutes=float(interval_minutes))
+
+    # 가격이 3% 또는 시간봉 ATR 의 2배 이상 움직이면 즉시 한 번 더 실행
+    for market in MARKETS:
+        market_feed.add_listener(
+            PriceMoveTrigger(
+                scheduler,
+                market,
+                threshold=0.03,
+                atr_multiple=2,
+                atr=lambda market=market: hourly_atr(market),
+            )
+        )
+
+    scheduler.run_forever()
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import jwt
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "https://api.upbit.com/v1"
+
+# Upbit 요청 수 제한 그룹별 초당 허용량
+# https://docs.upbit.com/reference/rest-api-guide
+GROUP_RATES = {
+    "market": 10,
+    "candle": 10,
+    "ticker": 10,
+    "orderbook": 10,
+    "default": 30,
+    "order": 8,
+}
+
+CANDLE_PATHS = {
+    "day": "/candles/days",
+    "week": "/candles/weeks",
+    "month": "/candles/months",
+    **{f"minute{n}": f"/candles/minutes/{n}" for n in (1, 3, 5, 10, 15, 30, 60, 240)},
+}
+
+_REMAINING_REQ = re.compile(r"group=([a-z\-]+); min=([0-9]+); sec=([0-9]+)")
+
+
+class TokenBucket:
+    """Blocking token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def observe_remaining(self, remaining: int):
+        """Clamp local tokens to what the server reports as left this second."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, remaining)
+
+
+class UpbitGateway:
+    """
+    Single entry point for Upbit REST calls.
+
+    Requests share one pooled ``requests.Session``, are paced by a token
+    bucket per Upbit rate-limit group (corrected from the ``Remaining-Req``
+    header of every response), and identical read requests issued within
+    ``coalesce_window`` seconds are served by one HTTP round trip. Method
+    names and return shapes follow ``pyupbit`` so it can replace both the
+    ``pyupbit.Upbit`` object and the free quotation functions.
+    """
+
+    def __init__(
+        self,
+        access: Optional[str] = None,
+        secret: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        coalesce_window: float = 0.5,
+        pool_size: int = 10,
+        timeout: float = 10,
+        max_retries: int = 2,
+    ):
+        self.access = access
+        self.secret = secret
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+        self.buckets = {group: TokenBucket(rate) for group, rate in GROUP_RATES.items()}
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, Future] = {}
+        self._recent: Dict[tuple, tuple] = {}
+        self.stats = {"requests": 0, "coalesced": 0, "throttled": 0}
+
+    # ------------------------------------------------------------------
+    # 요청 공통 처리
+    # ------------------------------------------------------------------
+
+    def _auth_headers(self, query: Optional[Dict] = None) -> Dict[str, str]:
+        payload = {"access_key": self.access, "nonce": str(uuid.uuid4())}
+        if query:
+            query_hash = hashlib.sha512(
+                urlencode(query, doseq=True).replace("%5B%5D=", "[]=").encode()
+            ).hexdigest()
+            payload["query_hash"] = query_hash
+            payload["query_hash_alg"] = "SHA512"
+        token = jwt.encode(payload, self.secret, algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        group: str,
+        params: Optional[Dict] = None,
+        body: Optional[Dict] = None,
+        auth: bool = False,
+    ) -> Any:
+        for attempt in range(self.max_retries + 1):
+            self.buckets[group].acquire()
+            headers = {"Accept": "application/json"}
+            if auth:
+                headers.update(self._auth_headers(body or params))
+            if body is not None:
+                headers["Content-Type"] = "application/json"
+
+            self.stats["requests"] += 1
+            response = self.session.request(
+                method,
+                BASE_URL + path,
+                params=params,
+                data=json.dumps(body) if body is not None else None,
+                headers=headers,
+                timeout=self.timeout,
+            )
+
+            matched = _REMAINING_REQ.search(response.headers.get("Remaining-Req", ""))
+            if matched:
+                bucket = self.buckets.get(matched.group(1), self.buckets[group])
+                bucket.observe_remaining(int(matched.group(3)))
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                self.stats["throttled"] += 1
+                logger.warning("Upbit rate limit hit on %s, backing off", path)
+                time.sleep(0.2 * (attempt + 1))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def _get(self, path: str, group: str, params: Optional[Dict] = None, auth=False):
+        """GET with coalescing of identical requests inside the window."""
+        key = (path, tuple(sorted((params or {}).items())), auth)
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent and time.monotonic() - recent[0] <= self.coalesce_window:
+                self.stats["coalesced"] += 1
+                return recent[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._request("GET", path, group, params=params, auth=auth)
+            future.set_result(result)
+            with self._lock:
+                now = time.monotonic()
+                self._recent = {
+                    k: v
+                    for k, v in self._recent.items()
+                    if now - v[0] <= self.coalesce_window
+                }
+                self._recent[key] = (now, result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # 시세 조회 (quotation)
+    # ------------------------------------------------------------------
+
+    def get_current_price(self, ticker="KRW-BTC"):
+        markets = [ticker] if isinstance(ticker, str) else list(ticker)
+        tickers = self._get("/ticker", "ticker", {"markets": ",".join(markets)})
+        if isinstance(ticker, str):
+            return tickers[0]["trade_price"]
+        return {x["market"]: x["trade_price"] for x in tickers}
+
+    def get_orderbook(self, ticker="KRW-BTC"):
+        markets = [ticker] if isinstance(ticker, str) else list(ticker)
+        orderbooks = self._get(
+            "/orderbook", "orderbook", {"markets": ",".join(markets)}
+        )
+        return orderbooks[0] if isinstance(ticker, str) else orderbooks
+
+    def get_ohlcv(self, ticker="KRW-BTC", interval="day", count=200, to=None):
+        """Same frame as ``pyupbit.get_ohlcv`` (KST index, open..value columns)."""
+        path = CANDLE_PATHS.get(interval, CANDLE_PATHS["day"])
+        if to is None:
+            to = datetime.now(timezone.utc).replace(tzinfo=None)
+        to = pd.to_datetime(to).strftime("%Y-%m-%d %H:%M:%S")
+
+        contents: List[Dict] = []
+        while count > 0:
+            page = self._get(
+                path, "candle", {"market": ticker, "count": min(count, 200), "to": to}
+            )
+            if not page:
+                break
+            contents += page
+            count -= len(page)
+            to = page[-1]["candle_date_time_utc"].replace("T", " ")
+
+        if not contents:
+            return None
+        df = pd.DataFrame(
+            {
+                "open": [x["opening_price"] for x in contents],
+                "high": [x["high_price"] for x in contents],
+                "low": [x["low_price"] for x in contents],
+                "close": [x["trade_price"] for x in contents],
+                "volume": [x["candle_acc_trade_volume"] for x in contents],
+                "value": [x["candle_acc_trade_price"] for x in contents],
+            },
+            index=pd.to_datetime(
+                [x["candle_date_time_kst"] for x in contents],
+                format="%Y-%m-%dT%H:%M:%S",
+            ),
+        )
+        return df.sort_index()
+
+    # ------------------------------------------------------------------
+    # 거래 (exchange)
+    # ------------------------------------------------------------------
+
+    def get_balances(self):
+        return self._get("/accounts", "default", auth=True)
+
+    def get_balance(self, ticker="KRW"):
+        """Available balance of ``ticker`` ("KRW", "BTC" or "KRW-BTC")."""
+        fiat = "KRW"
+        if "-" in ticker:
+            fiat, ticker = ticker.split("-")
+        for balance in self.get_balances():
+            if balance["currency"] == ticker and balance["unit_currency"] == fiat:
+                return float(balance["balance"])
+        return 0
+
+    def _order(self, body: Dict):
+        result = self._request("POST", "/orders", "order", body=body, auth=True)
+        # 주문 후 잔고 캐시는 더 이상 유효하지 않음
+        with self._lock:
+            self._recent.clear()
+        return result
+
+    def buy_market_order(self, ticker, price):
+        return self._order(
+            {"market": ticker, "side": "bid", "price": str(price), "ord_type": "price"}
+        )
+
+    def sell_market_order(self, ticker, volume):
+        return self._order(
+            {
+                "market": ticker,
+                "side": "ask",
+                "volume": str(volume),
+                "ord_type": "market",
+            }
+        )